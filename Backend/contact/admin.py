@@ -1,17 +1,52 @@
 from django.contrib import admin
-from .models import ContactMessage
+
+from pages.pagination import EstimatedCountPaginator
+from .export import export_response
+from .models import ContactMessage, OutboundEmail
+from .search import search_messages
 
 
 @admin.register(ContactMessage)
 class ContactMessageAdmin(admin.ModelAdmin):
+    """
+    Stays fast with millions of (mostly spam) messages: counts are
+    estimated, the date filter and the newest-first ordering are ranges over
+    the ``created`` index, and search goes through the full-text index. There
+    is no ``date_hierarchy``; its year/month links aggregate the whole table
+    on every page load.
+    """
     list_display = ("name", "email", "subject", "created", "preview_message")
     search_fields = ("name", "email", "subject", "message")
+    search_help_text = "Words from the name, email, subject or message, or a full email address."
     readonly_fields = ("created",)
     list_filter = ("created",)
     ordering = ("-created",)
-    date_hierarchy = "created"
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    actions = ("export_csv", "export_ndjson")
+
+    def get_search_results(self, request, queryset, search_term):
+        result = search_messages(queryset, search_term)
+        if result is None:
+            return super().get_search_results(request, queryset, search_term)
+        return result, False
+
+    @admin.action(description="Export selected messages as CSV")
+    def export_csv(self, request, queryset):
+        return export_response(request, queryset, output="csv")
+
+    @admin.action(description="Export selected messages as NDJSON")
+    def export_ndjson(self, request, queryset):
+        return export_response(request, queryset, output="ndjson")
 
     def preview_message(self, obj):
         return (obj.message[:80] + "...") if obj.message and len(obj.message) > 80 else (obj.message or "")
     preview_message.short_description = "Message preview"
 
+
+@admin.register(OutboundEmail)
+class OutboundEmailAdmin(admin.ModelAdmin):
+    list_display = ("subject", "to", "status", "attempts", "next_attempt", "sent")
+    list_filter = ("status",)
+    readonly_fields = ("message", "created", "sent", "last_error")
+    ordering = ("-created",)
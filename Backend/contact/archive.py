@@ -0,0 +1,196 @@
+"""
+Retention for ``ContactMessage``.
+
+Messages outside the retention policy (older than
+``CONTACT_RETENTION_DAYS``, or beyond the newest
+``CONTACT_RETENTION_MAX_ROWS``) are moved out of the database into gzipped
+NDJSON files under ``CONTACT_ARCHIVE_DIR``, one per UTC day of ``created``:
+``2025/09/2025-09-21.ndjson.gz``. Every chunk is appended as a gzip member of
+its own, which readers see as one stream, so an interrupted run never
+leaves a file that cannot be read to the end.
+
+A chunk is fsynced before its rows are deleted: a crash can leave a message
+both archived and in the table (the next run archives it again), never in
+neither.
+"""
+import gzip
+import json
+import os
+import re
+import time
+from datetime import date, timedelta, timezone as dt_timezone
+from pathlib import Path
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from pages.search import search_terms
+from .models import ContactMessage
+from .search import FTS_TABLE
+
+FIELDS = ("id", "name", "email", "subject", "message", "created")
+SEARCHED_FIELDS = ("name", "email", "subject", "message")
+ARCHIVE_FILE = re.compile(r"^(\d{4}-\d{2}-\d{2})\.ndjson\.gz$")
+# SQLite files are only rewritten once deletes have freed this share of their pages
+VACUUM_FREE_RATIO = 0.25
+
+
+def expired_messages(days=None, max_rows=None, now=None):
+    """Messages the retention policy no longer keeps; ``None`` uses the settings, 0 turns a rule off."""
+    days = settings.CONTACT_RETENTION_DAYS if days is None else days
+    max_rows = settings.CONTACT_RETENTION_MAX_ROWS if max_rows is None else max_rows
+    condition = Q()
+    if days:
+        condition |= Q(created__lt=(now or timezone.now()) - timedelta(days=days))
+    if max_rows:
+        # the newest row past the cap, and everything older
+        boundary = list(ContactMessage.objects.order_by("-created", "-id").values("created", "id")[max_rows:max_rows + 1])
+        if boundary:
+            created, pk = boundary[0]["created"], boundary[0]["id"]
+            condition |= Q(created__lt=created) | Q(created=created, id__lte=pk)
+    if not condition:
+        return ContactMessage.objects.none()
+    return ContactMessage.objects.filter(condition)
+
+
+def archive_path(root, day):
+    return Path(root) / f"{day:%Y}" / f"{day:%m}" / f"{day.isoformat()}.ndjson.gz"
+
+
+def day_of(created):
+    return created.astimezone(dt_timezone.utc).date()
+
+
+def write_chunk(root, rows):
+    """Append ``rows`` to their days' files and fsync them; returns the paths written."""
+    by_day = {}
+    for row in rows:
+        by_day.setdefault(day_of(row["created"]), []).append(row)
+    paths = []
+    for day, day_rows in by_day.items():
+        path = archive_path(root, day)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "ab") as raw:
+            # mtime=0: the same rows always archive to the same bytes
+            with gzip.GzipFile(fileobj=raw, mode="wb", mtime=0) as fh:
+                for row in day_rows:
+                    # unescaped, so search can test the raw line before decoding it
+                    fh.write(json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False).encode() + b"\n")
+            raw.flush()
+            os.fsync(raw.fileno())
+        paths.append(path)
+    return paths
+
+
+def archive_messages(queryset, chunk_size=1000, pause=0.0, root=None):
+    """
+    Move ``queryset``'s messages into the archive in id order, ``chunk_size``
+    at a time. Each chunk's delete is its own short transaction, and
+    ``pause`` seconds between chunks let the site's own writes through.
+    Returns ``(archived, paths)``.
+    """
+    root = root or settings.CONTACT_ARCHIVE_DIR
+    queryset = queryset.order_by("id")
+    archived, paths, last = 0, set(), 0
+    while True:
+        rows = list(queryset.filter(id__gt=last).values(*FIELDS)[:chunk_size])
+        if not rows:
+            break
+        paths.update(write_chunk(root, rows))
+        ids = [row["id"] for row in rows]
+        with transaction.atomic(using=queryset.db):
+            ContactMessage.objects.using(queryset.db).filter(id__in=ids).delete()
+        archived += len(rows)
+        last = ids[-1]
+        if pause:
+            time.sleep(pause)
+    return archived, sorted(paths)
+
+
+def reclaim_space(using="default", vacuum="auto"):
+    """
+    Tidy up after a large delete: refresh planner statistics, merge the
+    full-text index and, on SQLite, ``VACUUM`` the file when ``vacuum`` is
+    "always", or when it is "auto" and enough pages are free. Returns what
+    was done.
+    """
+    connection = connections[using]
+    table = ContactMessage._meta.db_table
+    done = []
+    with connection.cursor() as cursor:
+        if connection.vendor == "sqlite":
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')")
+            cursor.execute(f"ANALYZE {table}")
+            done += ["optimize", "analyze"]
+            cursor.execute("PRAGMA freelist_count")
+            free = cursor.fetchone()[0]
+            cursor.execute("PRAGMA page_count")
+            pages = cursor.fetchone()[0]
+            wanted = vacuum == "always" or (vacuum == "auto" and pages and free / pages >= VACUUM_FREE_RATIO)
+            # VACUUM rewrites the whole file and cannot run inside a transaction
+            if wanted and not connection.in_atomic_block:
+                cursor.execute("VACUUM")
+                done.append("vacuum")
+        elif connection.vendor == "postgresql":
+            if connection.in_atomic_block:
+                cursor.execute(f"ANALYZE {table}")
+                done.append("analyze")
+            else:
+                # plain VACUUM: marks the space reusable without locking out writers
+                cursor.execute(f"VACUUM (ANALYZE) {table}")
+                done.append("vacuum analyze")
+    return done
+
+
+def archive_files(root=None, start=None, end=None):
+    """``(day, path)`` for the archive files from ``start`` to ``end``, oldest first."""
+    root = Path(root or settings.CONTACT_ARCHIVE_DIR)
+    found = []
+    for path in root.glob("*/*/*.ndjson.gz"):
+        match = ARCHIVE_FILE.match(path.name)
+        if not match:
+            continue
+        day = date.fromisoformat(match.group(1))
+        if (start is None or day >= start) and (end is None or day <= end):
+            found.append((day, path))
+    return sorted(found)
+
+
+def search_archive(text="", start=None, end=None, after=None, limit=50, root=None):
+    """
+    Archived messages whose name, email, subject or message contain every
+    word of ``text``, oldest first. Files are read a line at a time, and a
+    line is only decoded once it contains every word.
+
+    ``after`` is the cursor returned with an earlier page. Returns
+    ``(results, cursor)``; the cursor is ``None`` once nothing is left.
+    """
+    terms = search_terms(text)
+    after_day, after_line = parse_cursor(after) if after else (None, -1)
+    results = []
+    for day, path in archive_files(root, max(filter(None, (start, after_day)), default=None), end):
+        skip = after_line if day == after_day else -1
+        with gzip.open(path, "rt", encoding="utf-8") as fh:
+            for number, line in enumerate(fh):
+                if number <= skip:
+                    continue
+                lowered = line.lower()
+                if not all(term in lowered for term in terms):
+                    continue
+                record = json.loads(line)
+                searched = " ".join(str(record.get(f) or "") for f in SEARCHED_FIELDS).lower()
+                if all(term in searched for term in terms):
+                    if len(results) == limit:
+                        return results, cursor
+                    results.append(record)
+                    cursor = f"{day.isoformat()}:{number}"
+    return results, None
+
+
+def parse_cursor(cursor):
+    """``"2025-09-21:17"`` -> ``(date(2025, 9, 21), 17)``; raises ``ValueError``."""
+    day, _, line = cursor.partition(":")
+    return date.fromisoformat(day), int(line)
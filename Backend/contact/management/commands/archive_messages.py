@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+
+from contact.archive import archive_messages, expired_messages, reclaim_space
+
+
+class Command(BaseCommand):
+    help = (
+        "Move contact messages outside the retention policy (CONTACT_RETENTION_DAYS, "
+        "CONTACT_RETENTION_MAX_ROWS) into gzipped NDJSON files under CONTACT_ARCHIVE_DIR, "
+        "then reclaim the space they used."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, help="Keep messages this many days old (default: the setting).")
+        parser.add_argument("--max-rows", type=int, help="Keep at most this many messages (default: the setting).")
+        parser.add_argument("--chunk-size", type=int, default=1000, help="Messages written and deleted per step.")
+        parser.add_argument("--pause", type=float, default=0.0, help="Seconds to wait between chunks.")
+        parser.add_argument(
+            "--vacuum", choices=("auto", "always", "never"), default="auto",
+            help="VACUUM SQLite afterwards: always, never, or when a large share of the file is free.",
+        )
+        parser.add_argument("--dry-run", action="store_true", help="Count what would be archived; change nothing.")
+
+    def handle(self, *args, **options):
+        expired = expired_messages(days=options["days"], max_rows=options["max_rows"])
+        if options["dry_run"]:
+            self.stdout.write(f"Would archive {expired.count()} messages")
+            return
+        archived, paths = archive_messages(expired, chunk_size=options["chunk_size"], pause=options["pause"])
+        for path in paths:
+            self.stdout.write(f"wrote {path}")
+        done = reclaim_space(expired.db, options["vacuum"]) if archived else []
+        self.stdout.write(
+            f"Archived {archived} messages into {len(paths)} files"
+            + (f"; ran {', '.join(done)}" if done else "")
+        )
@@ -0,0 +1,147 @@
+import json
+import random
+import statistics
+import time
+from datetime import timedelta
+from pathlib import Path
+from unittest import mock
+
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.core.paginator import Paginator
+from django.db import connection, transaction
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from contact.admin import ContactMessageAdmin
+from contact.models import ContactMessage
+
+WORDS = (
+    "hello project hire freelance quote website redesign question collaboration budget timeline react django "
+    "python api mobile app crypto seo backlinks casino offer loan discount winner prize click free"
+).split()
+DROPPED_INDEXES = ("contact_message_created_idx", "contact_message_email_idx")
+
+
+class LegacyContactMessageAdmin(ContactMessageAdmin):
+    """The changelist as it was: exact counts, date hierarchy and ``LIKE '%…%'`` search."""
+    paginator = Paginator
+    show_full_result_count = True
+    date_hierarchy = "created"
+
+    def get_search_results(self, request, queryset, search_term):
+        return admin.ModelAdmin.get_search_results(self, request, queryset, search_term)
+
+
+class Command(BaseCommand):
+    help = (
+        "Render the contact message changelist over a large seeded inbox (rolled back), with the "
+        "indexed, estimated-count admin and with the one it replaced."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--messages", type=int, default=1_000_000)
+        parser.add_argument("--days", type=int, default=365, help="How far back the seeded messages go.")
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--batch-size", type=int, default=10_000)
+        parser.add_argument("--output", default="bench-contact-admin-results.json", help="Where to write the JSON results.")
+
+    def handle(self, *args, **options):
+        count = options["messages"]
+        today = timezone.localtime().replace(hour=0, minute=0, second=0, microsecond=0)
+        probe = count // 2
+        scenarios = {
+            "first page": {},
+            "page 100": {"p": "100"},
+            "past 7 days": {"created__gte": str(today - timedelta(days=7)), "created__lt": str(today + timedelta(days=1))},
+            "search common word": {"q": "django"},
+            "search two words": {"q": "casino winner"},
+            "search name": {"q": f"Visitor {probe}"},
+            "search email": {"q": f"visitor{probe}@example.com"},
+        }
+        results = {
+            "started": timezone.now().isoformat(),
+            "vendor": connection.vendor,
+            "config": {key: options[key] for key in ("messages", "days", "repeat")},
+            "admins": {},
+        }
+        with transaction.atomic():
+            start = time.perf_counter()
+            self.seed(count, options["days"], options["batch_size"])
+            results["seed_s"] = round(time.perf_counter() - start, 1)
+            self.stdout.write(f"Seeded {count:,} messages in {results['seed_s']}s")
+            user = get_user_model().objects.create_superuser("bench-admin", "bench@example.com", "unused")
+
+            results["admins"]["current"] = self.run(ContactMessageAdmin, user, scenarios, options["repeat"])
+            # the old admin on the old schema
+            with connection.cursor() as cursor:
+                for name in DROPPED_INDEXES:
+                    cursor.execute(f"DROP INDEX {connection.ops.quote_name(name)}")
+            results["admins"]["legacy"] = self.run(LegacyContactMessageAdmin, user, scenarios, options["repeat"])
+            transaction.set_rollback(True)
+
+        self.report(results)
+        Path(options["output"]).write_text(json.dumps(results, indent=2))
+        self.stdout.write(f"Results written to {options['output']}")
+
+    def seed(self, count, days, batch):
+        rng = random.Random(0)
+        now = timezone.now()
+        span = days * 86400
+        created = ContactMessage._meta.get_field("created")
+        # keep the spread-out timestamps instead of stamping every row with now
+        with mock.patch.object(created, "auto_now_add", False):
+            ContactMessage.objects.bulk_create(
+                (
+                    ContactMessage(
+                        name=f"Visitor {i}", email=f"visitor{i}@example.com",
+                        subject=" ".join(rng.choices(WORDS, k=3)).capitalize(),
+                        message=" ".join(rng.choices(WORDS, k=rng.randint(20, 80))),
+                        created=now - timedelta(seconds=span * (count - i) / count),
+                    )
+                    for i in range(count)
+                ),
+                batch_size=batch,
+            )
+        with connection.cursor() as cursor:
+            # planner statistics, and the row estimate on Postgres
+            cursor.execute(f"ANALYZE {ContactMessage._meta.db_table}")
+
+    def run(self, admin_class, user, scenarios, repeat):
+        model_admin = admin_class(ContactMessage, admin.site)
+        factory = RequestFactory()
+        rows = {}
+        for name, params in scenarios.items():
+            self.stdout.write(f"{admin_class.__name__}: {name} ...")
+            samples = []
+            for _ in range(repeat):
+                request = factory.get("/admin/contact/contactmessage/", params)
+                request.user = user
+                with CaptureQueriesContext(connection) as queries:
+                    start = time.perf_counter()
+                    response = model_admin.changelist_view(request)
+                    response.render()
+                    samples.append(time.perf_counter() - start)
+            rows[name] = {
+                "status": response.status_code,
+                "median_ms": round(statistics.median(samples) * 1000, 1),
+                "max_ms": round(max(samples) * 1000, 1),
+                "queries": len(queries),
+                "result_count": response.context_data["cl"].result_count if response.status_code == 200 else None,
+            }
+        return rows
+
+    def report(self, results):
+        current, legacy = results["admins"]["current"], results["admins"]["legacy"]
+        self.stdout.write(
+            f"\n{results['config']['messages']:,} messages on {results['vendor']}\n"
+            f"{'scenario':<20} {'legacy ms':>10} {'queries':>8} {'current ms':>11} {'queries':>8} {'speedup':>8}"
+        )
+        for name, row in current.items():
+            old = legacy[name]
+            self.stdout.write(
+                f"{name:<20} {old['median_ms']:>10.1f} {old['queries']:>8} {row['median_ms']:>11.1f} "
+                f"{row['queries']:>8} {old['median_ms'] / max(row['median_ms'], 0.1):>7.1f}x"
+            )
@@ -0,0 +1,109 @@
+import socketserver
+import statistics
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import Client, override_settings
+
+from contact.outbox import drain
+
+
+class FakeSMTPHandler(socketserver.StreamRequestHandler):
+    """Just enough SMTP to accept mail, with a delay per connection and message."""
+
+    def reply(self, line):
+        self.wfile.write(line.encode() + b"\r\n")
+
+    def handle(self):
+        time.sleep(self.server.connect_delay)  # stands in for the TLS handshake
+        self.reply("220 fake ESMTP")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode(errors="replace").strip().upper()
+            if command.startswith(("EHLO", "HELO")):
+                self.reply("250 fake")
+            elif command == "DATA":
+                self.reply("354 go ahead")
+                while self.rfile.readline() not in (b".\r\n", b""):
+                    pass
+                time.sleep(self.server.message_delay)
+                self.server.messages += 1
+                self.reply("250 queued")
+            elif command == "QUIT":
+                self.reply("221 bye")
+                return
+            else:
+                self.reply("250 ok")
+
+
+class FakeSMTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, connect_delay, message_delay):
+        super().__init__(("127.0.0.1", 0), FakeSMTPHandler)
+        self.connect_delay = connect_delay
+        self.message_delay = message_delay
+        self.messages = 0
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+class Command(BaseCommand):
+    help = "Compare contact POST latency with inline SMTP delivery against the outbox, using a local fake SMTP server."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=100)
+        parser.add_argument("--connect-delay", type=float, default=0.05, help="Seconds per SMTP connection.")
+        parser.add_argument("--message-delay", type=float, default=0.02, help="Seconds per message.")
+
+    def handle(self, *args, **options):
+        server = FakeSMTPServer(options["connect_delay"], options["message_delay"])
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        smtp = {
+            "EMAIL_BACKEND": "django.core.mail.backends.smtp.EmailBackend",
+            "EMAIL_HOST": "127.0.0.1",
+            "EMAIL_PORT": server.server_address[1],
+            "EMAIL_USE_TLS": False,
+            "EMAIL_HOST_USER": "",
+            "EMAIL_HOST_PASSWORD": "",
+        }
+        try:
+            with override_settings(**smtp), transaction.atomic():
+                for outbox in (False, True):
+                    with override_settings(CONTACT_EMAIL_OUTBOX=outbox):
+                        self.run(outbox, options["requests"], server)
+                transaction.set_rollback(True)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def run(self, outbox, count, server):
+        client = Client()
+        samples = []
+        for i in range(count):
+            payload = {"name": f"Bench {i}", "email": f"bench{i}@example.com", "subject": "Hi", "message": "Hello"}
+            start = time.perf_counter()
+            response = client.post("/api/contact/messages/", payload, content_type="application/json")
+            samples.append((time.perf_counter() - start) * 1000)
+            assert response.status_code == 201, response.content
+
+        label = "outbox" if outbox else "inline SMTP"
+        self.stdout.write(
+            f"{label:<12} POST p50 {statistics.median(samples):8.2f} ms   p99 {percentile(samples, 99):8.2f} ms"
+        )
+        if outbox:
+            before = server.messages
+            start = time.perf_counter()
+            sent, _ = drain()
+            self.stdout.write(
+                f"{'':<12} worker drained {sent} emails ({server.messages - before} delivered) "
+                f"in {time.perf_counter() - start:.2f} s over one connection"
+            )
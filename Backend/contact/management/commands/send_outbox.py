@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from contact.outbox import drain
+
+
+class Command(BaseCommand):
+    help = (
+        "Deliver queued contact emails over a single reused SMTP connection. Must run (with --loop) "
+        "wherever CONTACT_EMAIL_OUTBOX is on, the default."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=50)
+        parser.add_argument("--max-attempts", type=int, default=5)
+        parser.add_argument("--loop", action="store_true", help="Keep polling instead of exiting when the outbox is empty.")
+        parser.add_argument("--interval", type=float, default=5.0, help="Seconds between polls with --loop.")
+
+    def handle(self, *args, **options):
+        while True:
+            sent, failed = drain(batch_size=options["batch_size"], max_attempts=options["max_attempts"])
+            if sent or failed or not options["loop"]:
+                self.stdout.write(f"sent {sent}, gave up on {failed}")
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
@@ -0,0 +1,80 @@
+# Generated by Django 5.2.6 on 2026-10-18 12:11
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+# the message search index; contact.search queries it by these names
+SQLITE_SETUP = [
+    """
+    CREATE VIRTUAL TABLE contact_message_fts USING fts5(
+        name, email, subject, message,
+        content='contact_contactmessage', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER contact_message_fts_ai AFTER INSERT ON contact_contactmessage BEGIN
+        INSERT INTO contact_message_fts(rowid, name, email, subject, message)
+        VALUES (new.id, new.name, new.email, new.subject, new.message);
+    END
+    """,
+    """
+    CREATE TRIGGER contact_message_fts_ad AFTER DELETE ON contact_contactmessage BEGIN
+        INSERT INTO contact_message_fts(contact_message_fts, rowid, name, email, subject, message)
+        VALUES ('delete', old.id, old.name, old.email, old.subject, old.message);
+    END
+    """,
+    """
+    CREATE TRIGGER contact_message_fts_au AFTER UPDATE ON contact_contactmessage BEGIN
+        INSERT INTO contact_message_fts(contact_message_fts, rowid, name, email, subject, message)
+        VALUES ('delete', old.id, old.name, old.email, old.subject, old.message);
+        INSERT INTO contact_message_fts(rowid, name, email, subject, message)
+        VALUES (new.id, new.name, new.email, new.subject, new.message);
+    END
+    """,
+    "INSERT INTO contact_message_fts(contact_message_fts) VALUES ('rebuild')",
+]
+SQLITE_TEARDOWN = [
+    "DROP TRIGGER IF EXISTS contact_message_fts_ai",
+    "DROP TRIGGER IF EXISTS contact_message_fts_ad",
+    "DROP TRIGGER IF EXISTS contact_message_fts_au",
+    "DROP TABLE IF EXISTS contact_message_fts",
+]
+POSTGRES_SETUP = [
+    "CREATE INDEX IF NOT EXISTS contact_message_search_gin ON contact_contactmessage USING gin (("
+    "to_tsvector('simple', coalesce(name, '') || ' ' || coalesce(email, '') || ' ' "
+    "|| coalesce(subject, '') || ' ' || coalesce(message, ''))"
+    "))",
+]
+POSTGRES_TEARDOWN = ["DROP INDEX IF EXISTS contact_message_search_gin"]
+
+
+def install_search(apps, schema_editor):
+    statements = {"sqlite": SQLITE_SETUP, "postgresql": POSTGRES_SETUP}
+    for sql in statements.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(sql)
+
+
+def uninstall_search(apps, schema_editor):
+    statements = {"sqlite": SQLITE_TEARDOWN, "postgresql": POSTGRES_TEARDOWN}
+    for sql in statements.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contact', '0002_outboundemail'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='contactmessage',
+            index=models.Index(fields=['created', 'id'], name='contact_message_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contactmessage',
+            index=models.Index(django.db.models.functions.text.Lower('email'), name='contact_message_email_idx'),
+        ),
+        migrations.RunPython(install_search, uninstall_search),
+    ]
@@ -1,4 +1,6 @@
 from django.db import models
+from django.db.models.functions import Lower
+from django.utils import timezone
 
 class ContactMessage(models.Model):
     name = models.CharField(max_length=200)
@@ -7,5 +9,41 @@ class ContactMessage(models.Model):
     message = models.TextField()
     created = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # newest first, for the admin and the API's (-created, -id) cursor
+            models.Index(fields=["created", "id"], name="contact_message_created_idx"),
+            models.Index(Lower("email"), name="contact_message_email_idx"),
+        ]
+
     def __str__(self):
         return f"{self.name} <{self.email}> - {self.subject}"
+
+
+class OutboundEmail(models.Model):
+    """Email job written in the same transaction as its ContactMessage."""
+    STATUS_CHOICES = [
+        ("pending", "Pending"),
+        ("sent", "Sent"),
+        ("failed", "Failed"),
+    ]
+
+    message = models.ForeignKey(
+        ContactMessage, null=True, blank=True, on_delete=models.SET_NULL, related_name="emails"
+    )
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=254)
+    to = models.TextField(help_text="Comma-separated recipients")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="pending")
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created = models.DateTimeField(auto_now_add=True)
+    sent = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["status", "next_attempt"], name="contact_outbox_due_idx")]
+
+    def __str__(self):
+        return f"{self.subject} -> {self.to} ({self.status})"
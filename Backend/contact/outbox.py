@@ -0,0 +1,120 @@
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection, send_mail
+from django.db import transaction
+from django.utils import timezone
+
+from .models import OutboundEmail
+
+logger = logging.getLogger(__name__)
+
+
+def contact_emails(instance):
+    """The notification to the owner and the thank-you to the sender."""
+    owner_subject = f"New contact from {instance.name}"
+    owner_message = (
+        f"Name: {instance.name}\n"
+        f"Email: {instance.email}\n"
+        f"Subject: {instance.subject}\n\n"
+        f"Message:\n{instance.message}"
+    )
+
+    thanks_subject = "Acknowledgment of Your Message"
+    thanks_body = f"""Hi {instance.name},
+
+Thank you for contacting me. I have received your message and will respond at the earliest opportunity.
+
+Kind regards,
+{settings.DEFAULT_FROM_EMAIL}
+Python Full Stack Developer
+"""
+    return [
+        (owner_subject, owner_message, settings.DEFAULT_FROM_EMAIL, [settings.OWNER_EMAIL]),
+        (thanks_subject, thanks_body, settings.DEFAULT_FROM_EMAIL, [instance.email]),
+    ]
+
+
+def queue_contact_emails(instance):
+    """Write the email jobs for ``instance``; call inside its transaction."""
+    OutboundEmail.objects.bulk_create(
+        OutboundEmail(message=instance, subject=subject, body=body, from_email=from_email, to=",".join(to))
+        for subject, body, from_email, to in contact_emails(instance)
+    )
+
+
+def send_contact_emails_now(instance):
+    """Synchronous delivery, used when CONTACT_EMAIL_OUTBOX is off."""
+    for subject, body, from_email, to in contact_emails(instance):
+        send_mail(subject, body, from_email, to, fail_silently=False)
+
+
+def backoff(attempts):
+    delay = settings.CONTACT_OUTBOX_RETRY_DELAY * 2 ** (attempts - 1)
+    return timedelta(seconds=min(delay, settings.CONTACT_OUTBOX_MAX_RETRY_DELAY))
+
+
+def claim_batch(batch_size):
+    """
+    Pick due jobs and push their ``next_attempt`` forward by a lease, so a
+    second worker does not send them too. A worker that dies mid-batch leaves
+    the jobs to be retried once the lease runs out.
+
+    On Postgres workers skip each other's locked rows. SQLite has no
+    ``SELECT ... FOR UPDATE`` and ignores ``skip_locked``, but the sqlite
+    database profile begins transactions ``IMMEDIATE``, taking the write lock
+    before the select, so claims there run one at a time. With
+    ``DATABASE_PROFILE=plain`` on SQLite they do not: run a single worker.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        jobs = list(
+            OutboundEmail.objects.select_for_update(skip_locked=True)
+            .filter(status="pending", next_attempt__lte=now)
+            .order_by("next_attempt", "id")[:batch_size]
+        )
+        OutboundEmail.objects.filter(pk__in=[job.pk for job in jobs]).update(
+            next_attempt=now + timedelta(seconds=settings.CONTACT_OUTBOX_LEASE)
+        )
+    return jobs
+
+
+def drain(batch_size=50, max_attempts=5, connection=None):
+    """
+    Send due jobs in batches over a single SMTP connection until none are due.
+    Returns ``(sent, failed)`` counts for this run.
+    """
+    connection = connection or get_connection()
+    sent = failed = 0
+    try:
+        while True:
+            jobs = claim_batch(batch_size)
+            if not jobs:
+                break
+            for job in jobs:
+                email = EmailMessage(job.subject, job.body, job.from_email, job.to.split(","), connection=connection)
+                try:
+                    # no-op while the connection is up; reconnects after a failure
+                    connection.open()
+                    email.send(fail_silently=False)
+                except Exception as exc:
+                    logger.warning("Sending outbox email %s failed: %s", job.pk, exc)
+                    # drop the possibly broken connection; the next send reopens it
+                    connection.close()
+                    job.attempts += 1
+                    job.last_error = str(exc)
+                    if job.attempts >= max_attempts:
+                        job.status = "failed"
+                        failed += 1
+                    else:
+                        job.next_attempt = timezone.now() + backoff(job.attempts)
+                    job.save(update_fields=["attempts", "last_error", "status", "next_attempt"])
+                else:
+                    job.status = "sent"
+                    job.sent = timezone.now()
+                    job.save(update_fields=["status", "sent"])
+                    sent += 1
+    finally:
+        connection.close()
+    return sent, failed
@@ -0,0 +1,62 @@
+import re
+
+from django.db import connections
+from django.db.models import BooleanField
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Lower
+
+from pages.search import fts5_query, search_terms, tsquery
+
+# the FTS5 table and its triggers, or the GIN index on Postgres, are created by
+# migration 0003; an SQLite migration that remakes contact_contactmessage drops
+# the triggers and must create them again
+FTS_TABLE = "contact_message_fts"
+FTS_COLUMNS = ("name", "email", "subject", "message")
+
+# the expression the GIN index is built on; queries must use it verbatim. The
+# 'simple' configuration keeps names and addresses as typed instead of stemming them.
+PG_DOCUMENT = " || ' ' || ".join(f"coalesce({col}, '')" for col in FTS_COLUMNS)
+PG_DOCUMENT = f"to_tsvector('simple', {PG_DOCUMENT})"
+
+EMAIL = re.compile(r"^\S+@\S+\.\S+$")
+# past this many hits a newest-first page is cheaper to find by walking the
+# ``created`` index than by sorting every hit
+DENSE_MATCHES = 1000
+
+def search_messages(queryset, text):
+    """
+    Filter ``queryset`` to messages matching ``text``, keeping its ordering.
+
+    A full address is looked up through the ``lower(email)`` index; anything
+    else must match every word (the last also as a prefix) anywhere in the
+    name, email, subject or message. Returns ``None`` when the database has
+    no full-text index, so callers can fall back to a plain scan.
+    """
+    text = text.strip()
+    if EMAIL.match(text):
+        return queryset.alias(email_lower=Lower("email")).filter(email_lower=text.lower())
+    terms = search_terms(text)
+    if not terms:
+        return queryset
+    vendor = connections[queryset.db].vendor
+    if vendor == "sqlite":
+        query = fts5_query(terms)
+        with connections[queryset.db].cursor() as cursor:
+            cursor.execute(
+                f"SELECT COUNT(*) FROM (SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s LIMIT %s)",
+                [query, DENSE_MATCHES],
+            )
+            dense = cursor.fetchone()[0] >= DENSE_MATCHES
+        # a few hits are fetched by rowid and sorted; for many, the unary "+"
+        # keeps SQLite off the rowid lookup so it walks the ``created`` index
+        # newest first, checks each row against the hits and stops at the page's end
+        column = "+contact_contactmessage.id" if dense else "contact_contactmessage.id"
+        return queryset.extra(
+            where=[f"{column} IN (SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s)"],
+            params=[query],
+        )
+    if vendor == "postgresql":
+        return queryset.filter(
+            RawSQL(f"{PG_DOCUMENT} @@ to_tsquery('simple', %s)", [tsquery(terms)], output_field=BooleanField()),
+        )
+    return None
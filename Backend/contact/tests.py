@@ -1,3 +1,420 @@
-from django.test import TestCase
+import asyncio
+import csv
+import gzip
+import io
+import json
+import shutil
+import tempfile
+import threading
+import tracemalloc
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings, tag
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from pages.pagination import EstimatedCountPaginator
+from portfolio_project.testing import SMALL_SEED, discover_routes, measure, seed
+from . import search
+from .archive import archive_files, expired_messages, search_archive
+from .export import export_stream
+from .models import ContactMessage, OutboundEmail
+from .outbox import drain
+from .views import ContactMessageCreateView
+
+QUERY_BUDGETS = {
+    "contact-messages-list": 2,
+    "contact-messages-detail": 1,
+}
+SERIALIZATION_BUDGET = 0.25  # seconds per request
+
+
+class QueryBudgetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seed(**SMALL_SEED)
+
+    def contact_routes(self):
+        return discover_routes(apps=["contact"])
+
+    def test_every_route_has_a_budget(self):
+        self.assertEqual({name for name, _ in self.contact_routes()}, set(QUERY_BUDGETS))
+
+    def test_query_counts_do_not_grow_with_data(self):
+        routes = self.contact_routes()
+        small = {name: len(measure(self.client, url)[1]) for name, url in routes}
+        seed(start=max(SMALL_SEED.values()))
+        for name, url in routes:
+            with self.subTest(route=name):
+                response, queries, elapsed = measure(self.client, url)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(len(queries), small[name], "\n".join(q["sql"] for q in queries))
+                self.assertEqual(len(queries), QUERY_BUDGETS[name])
+                self.assertLess(elapsed, SERIALIZATION_BUDGET)
+
+
+class MessageCursorPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        ContactMessage.objects.bulk_create(
+            ContactMessage(name=f"V{i}", email=f"v{i}@example.com", message="Hi") for i in range(7)
+        )
+
+    def test_cursor_walk_newest_first(self):
+        url, ids = reverse("contact-messages-list") + "?pagination=cursor&page_size=2", []
+        while url:
+            with self.assertNumQueries(1):
+                data = self.client.get(url).json()
+            ids += [m["id"] for m in data["results"]]
+            url = data["next"]
+        self.assertEqual(ids, list(ContactMessage.objects.order_by("-created", "-id").values_list("id", flat=True)))
+
+
+@override_settings(CONTACT_EMAIL_OUTBOX=True, OWNER_EMAIL="owner@example.com")
+class OutboxTests(TestCase):
+    payload = {"name": "Ann", "email": "ann@example.com", "subject": "Hi", "message": "Hello"}
+
+    def post(self):
+        return self.client.post(reverse("contact-messages-list"), self.payload, content_type="application/json")
+
+    def test_post_queues_instead_of_sending(self):
+        self.assertEqual(self.post().status_code, 201)
+        self.assertEqual(len(mail.outbox), 0)
+        jobs = OutboundEmail.objects.order_by("id")
+        self.assertEqual([job.to for job in jobs], ["owner@example.com", "ann@example.com"])
+        self.assertTrue(all(job.message_id == ContactMessage.objects.get().pk for job in jobs))
+
+    def test_failed_message_rolls_back_jobs(self):
+        with mock.patch("contact.views.queue_contact_emails", side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                self.post()
+        self.assertFalse(ContactMessage.objects.exists())
+
+    def test_drain_sends_everything_over_one_connection(self):
+        for _ in range(3):
+            self.post()
+        with mock.patch("contact.outbox.get_connection", wraps=mail.get_connection) as connect:
+            self.assertEqual(drain(batch_size=4), (6, 0))
+        connect.assert_called_once()
+        self.assertEqual(len(mail.outbox), 6)
+        self.assertFalse(OutboundEmail.objects.exclude(status="sent").exists())
+        self.assertEqual(drain(), (0, 0))
+
+    @override_settings(CONTACT_OUTBOX_RETRY_DELAY=60)
+    def test_failures_back_off_then_give_up(self):
+        self.post()
+        with mock.patch("django.core.mail.backends.locmem.EmailBackend.send_messages", side_effect=OSError("down")), \
+                self.assertLogs("contact.outbox", "WARNING"):
+            self.assertEqual(drain(max_attempts=2), (0, 0))
+            job = OutboundEmail.objects.order_by("id").first()
+            self.assertEqual((job.status, job.attempts, job.last_error), ("pending", 1, "down"))
+            self.assertGreater(job.next_attempt, timezone.now() + timedelta(seconds=50))
+
+            OutboundEmail.objects.update(next_attempt=timezone.now())
+            self.assertEqual(drain(max_attempts=2), (0, 2))
+        self.assertEqual(set(OutboundEmail.objects.values_list("status", flat=True)), {"failed"})
+
+
+@override_settings(CONTACT_EMAIL_OUTBOX=False, OWNER_EMAIL="owner@example.com")
+class InlineEmailTests(TestCase):
+    def test_inline_mode_sends_during_request(self):
+        payload = {"name": "Ann", "email": "ann@example.com", "subject": "Hi", "message": "Hello"}
+        self.client.post(reverse("contact-messages-list"), payload, content_type="application/json")
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertFalse(OutboundEmail.objects.exists())
+
+
+@override_settings(
+    ROOT_URLCONF="portfolio_project.urls_async", CONTACT_EMAIL_OUTBOX=False, OWNER_EMAIL="owner@example.com",
+)
+class AsyncCreateTests(TestCase):
+    payload = {"name": "Ann", "email": "ann@example.com", "subject": "Hi", "message": "Hello"}
+
+    async def post(self, data):
+        return await self.async_client.post(reverse("contact-messages-list"), data, content_type="application/json")
+
+    async def wait_for_emails(self):
+        await asyncio.gather(*ContactMessageCreateView.email_tasks, return_exceptions=True)
+
+    async def test_response_does_not_wait_for_email(self):
+        release = threading.Event()
+        sent = []
+
+        def slow_send(instance):
+            release.wait(5)
+            sent.append(instance.pk)
+
+        with mock.patch("contact.views.send_contact_emails_now", slow_send):
+            response = await self.post(self.payload)
+            self.assertEqual(response.status_code, 201)
+            self.assertEqual(sent, [])
+            release.set()
+            await self.wait_for_emails()
+        self.assertEqual(sent, [response.json()["id"]])
+        self.assertTrue(await ContactMessage.objects.filter(pk=response.json()["id"]).aexists())
+
+    async def test_emails_are_sent(self):
+        response = await self.post(self.payload)
+        await self.wait_for_emails()
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(set(response.json()), {"id", "name", "email", "subject", "message", "created"})
+        self.assertEqual(len(mail.outbox), 2)
+
+    async def test_failed_email_is_logged(self):
+        with mock.patch("contact.views.send_contact_emails_now", side_effect=OSError("smtp down")), \
+                self.assertLogs("contact.views", "ERROR"):
+            self.assertEqual((await self.post(self.payload)).status_code, 201)
+            await self.wait_for_emails()
+
+    def test_invalid_and_other_methods_match_drf(self):
+        invalid = {**self.payload, "email": "nope"}
+        response = async_to_sync(self.post)(invalid)
+        with self.settings(ROOT_URLCONF="portfolio_project.urls"):
+            expected = self.client.post(reverse("contact-messages-list"), invalid, content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.content, expected.content)
+        self.assertEqual(async_to_sync(self.async_client.get)(reverse("contact-messages-list")).status_code, 200)
+
+    @override_settings(CONTACT_EMAIL_OUTBOX=True)
+    async def test_outbox_mode_queues(self):
+        self.assertEqual((await self.post(self.payload)).status_code, 201)
+        self.assertEqual(await OutboundEmail.objects.acount(), 2)
+        self.assertEqual(ContactMessageCreateView.email_tasks, set())
+
+
+class MessageAdminTests(TestCase):
+    url = "/admin/contact/contactmessage/"
+
+    @classmethod
+    def setUpTestData(cls):
+        ContactMessage.objects.bulk_create([
+            ContactMessage(name="Ann Lee", email="Ann.Lee@Example.com", subject="Hiring", message="Freelance React work?"),
+            ContactMessage(name="Bob", email="bob@example.com", subject="Offer", message="Cheap backlinks, casino bonus"),
+            ContactMessage(name="Cy", email="cy@example.com", subject="", message="Loved the Django portfolio"),
+        ])
+        cls.admin = get_user_model().objects.create_superuser("admin", "admin@example.com", "pw")
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def search(self, text):
+        response = self.client.get(self.url, {"q": text})
+        self.assertEqual(response.status_code, 200)
+        return sorted(m.name for m in response.context["cl"].result_list)
+
+    def test_search_uses_the_full_text_index(self):
+        self.assertEqual(self.search("casino"), ["Bob"])
+        self.assertEqual(self.search("djan"), ["Cy"])  # the last word also as a prefix
+        self.assertEqual(self.search("react work"), ["Ann Lee"])
+        self.assertEqual(self.search("lee hiring"), ["Ann Lee"])
+        self.assertEqual(self.search("casino react"), [])
+
+    def test_search_for_an_address_is_exact(self):
+        self.assertEqual(self.search("ann.lee@example.COM"), ["Ann Lee"])
+        self.assertEqual(self.search("lee@example.com"), [])
+
+    def test_index_follows_edits_and_deletes(self):
+        ContactMessage.objects.filter(name="Bob").update(message="Quarterly newsletter")
+        ContactMessage.objects.filter(name="Cy").delete()
+        self.assertEqual(self.search("casino"), [])
+        self.assertEqual(self.search("newsletter"), ["Bob"])
+        self.assertEqual(self.search("django"), [])
+
+    def test_many_hits_walk_the_created_index(self):
+        with mock.patch.object(search, "DENSE_MATCHES", 1):
+            self.assertEqual(self.search("example"), ["Ann Lee", "Bob", "Cy"])
+            self.assertEqual(self.search("casino"), ["Bob"])
+
+    def test_changelist_queries_do_not_grow_with_data(self):
+        self.client.get(self.url)
+        with CaptureQueriesContext(connection) as before:
+            self.client.get(self.url)
+        ContactMessage.objects.bulk_create(
+            ContactMessage(name=f"V{i}", email=f"v{i}@example.com", message="Hi") for i in range(200)
+        )
+        with CaptureQueriesContext(connection) as after:
+            self.client.get(self.url)
+        self.assertEqual(len(after), len(before))
+
+    def test_paginator_estimates_large_tables(self):
+        ContactMessage.objects.bulk_create(
+            ContactMessage(name=f"V{i}", email=f"v{i}@example.com", message="Hi") for i in range(20)
+        )
+        ContactMessage.objects.filter(name="V5").delete()  # a gap the estimate does not see
+        queryset = ContactMessage.objects.order_by("-created")
+        with mock.patch.object(EstimatedCountPaginator, "count_cap", 10):
+            self.assertEqual(EstimatedCountPaginator(queryset, 5).count, queryset.count() + 1)
+            self.assertEqual(EstimatedCountPaginator(queryset.filter(message="Hi"), 5).count, 10)
+        self.assertEqual(EstimatedCountPaginator(queryset, 5).count, queryset.count())
+
+
+class ArchiveTests(TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        self.enterContext(override_settings(
+            CONTACT_ARCHIVE_DIR=self.root, CONTACT_RETENTION_DAYS=30, CONTACT_RETENTION_MAX_ROWS=0,
+        ))
+        now = timezone.now()
+        for i, age in enumerate((400, 400, 90, 31, 5, 0)):
+            message = ContactMessage.objects.create(
+                name=f"V{i}", email=f"v{i}@example.com", subject="Spam" if i % 2 else "Hello", message=f"Body {i}",
+            )
+            # auto_now_add ignores a value passed to create()
+            ContactMessage.objects.filter(pk=message.pk).update(created=now - timedelta(days=age))
+
+    def archive(self, *args):
+        call_command("archive_messages", "--chunk-size", "2", "--vacuum", "never", *args, stdout=io.StringIO())
+
+    def test_old_messages_move_to_daily_files(self):
+        self.archive()
+        self.assertEqual(sorted(ContactMessage.objects.values_list("name", flat=True)), ["V4", "V5"])
+        files = archive_files(self.root)
+        self.assertEqual(len(files), 3)  # two rows share a day
+        with gzip.open(files[0][1], "rt", encoding="utf-8") as fh:
+            rows = [json.loads(line) for line in fh]
+        self.assertEqual([row["name"] for row in rows], ["V0", "V1"])
+        self.assertEqual(set(rows[0]), {"id", "name", "email", "subject", "message", "created"})
+
+    def test_reruns_append_readable_members(self):
+        self.archive()
+        self.archive("--days", "1")
+        self.assertEqual(list(ContactMessage.objects.values_list("name", flat=True)), ["V5"])
+        results, cursor = search_archive()
+        self.assertEqual([r["name"] for r in results], ["V0", "V1", "V2", "V3", "V4"])
+        self.assertIsNone(cursor)
+
+    def test_row_cap(self):
+        self.assertEqual(sorted(expired_messages(days=0, max_rows=4).values_list("name", flat=True)), ["V0", "V1"])
+        self.assertEqual(expired_messages(days=0, max_rows=0).count(), 0)
+        self.archive("--days", "0", "--max-rows", "1")
+        self.assertEqual(list(ContactMessage.objects.values_list("name", flat=True)), ["V5"])
+
+    def test_dry_run_changes_nothing(self):
+        call_command("archive_messages", "--dry-run", stdout=io.StringIO())
+        self.assertEqual(ContactMessage.objects.count(), 6)
+        self.assertEqual(archive_files(self.root), [])
+
+    def test_search_pages_through_matches(self):
+        self.archive("--days", "1")
+        first, cursor = search_archive("spam", limit=1)
+        self.assertEqual([r["name"] for r in first], ["V1"])
+        second, cursor = search_archive("spam", after=cursor, limit=1)
+        self.assertEqual([r["name"] for r in second], ["V3"])
+        self.assertIsNone(cursor)
+        self.assertEqual([r["name"] for r in search_archive("v2 body")[0]], ["V2"])
+
+    def test_api_is_staff_only(self):
+        self.archive()
+        url = reverse("contact-archive")
+        self.assertEqual(self.client.get(url).status_code, 403)
+        self.client.force_login(get_user_model().objects.create_superuser("admin", "a@example.com", "pw"))
+        data = self.client.get(url, {"q": "hello", "limit": 1}).json()
+        self.assertEqual([r["name"] for r in data["results"]], ["V0"])
+        data = self.client.get(data["next"]).json()
+        self.assertEqual([r["name"] for r in data["results"]], ["V2"])
+        self.assertIsNone(data["next"])
+        self.assertEqual(self.client.get(url, {"from": "yesterday"}).status_code, 400)
+
+
+class ExportTests(TestCase):
+    url = "/api/contact/messages/export/"
+
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        for i, age in enumerate((10, 3, 0)):
+            message = ContactMessage.objects.create(
+                name=f"V{i}", email=f"v{i}@example.com", subject="Hi", message=f'Line one, "quoted"\nline {i} é',
+            )
+            ContactMessage.objects.filter(pk=message.pk).update(created=now - timedelta(days=age))
+        cls.admin = get_user_model().objects.create_superuser("admin", "admin@example.com", "pw")
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def download(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200, response.content if not response.streaming else "")
+        self.assertTrue(response.streaming)
+        return response, b"".join(response.streaming_content)
+
+    def test_csv(self):
+        response, body = self.download()
+        self.assertEqual(response["Content-Type"], "text/csv; charset=utf-8")
+        self.assertRegex(response["Content-Disposition"], r'^attachment; filename="contact-messages-.+\.csv"$')
+        rows = list(csv.reader(io.StringIO(body.decode())))
+        self.assertEqual(rows[0], ["id", "name", "email", "subject", "message", "created"])
+        self.assertEqual([row[1] for row in rows[1:]], ["V0", "V1", "V2"])  # oldest first
+        self.assertEqual(rows[1][4], 'Line one, "quoted"\nline 0 é')
+
+    def test_ndjson_with_fields_and_dates(self):
+        today = timezone.localdate()
+        response, body = self.download(
+            output="ndjson", fields="name,message", **{"from": str(today - timedelta(days=5)), "to": str(today)},
+        )
+        rows = [json.loads(line) for line in body.decode().splitlines()]
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        self.assertEqual(rows, [
+            {"name": "V1", "message": 'Line one, "quoted"\nline 1 é'},
+            {"name": "V2", "message": 'Line one, "quoted"\nline 2 é'},
+        ])
+
+    def test_gzip(self):
+        response, body = self.download(gzip="1", output="ndjson")
+        self.assertEqual(response["Content-Type"], "application/gzip")
+        self.assertTrue(response["Content-Disposition"].endswith('.ndjson.gz"'))
+        self.assertEqual(len(gzip.decompress(body).decode().splitlines()), 3)
+
+    def test_invalid_parameters_and_staff_only(self):
+        for params in ({"output": "xml"}, {"fields": "name,password"}, {"from": "monday"}):
+            with self.subTest(params=params):
+                self.assertEqual(self.client.get(self.url, params).status_code, 400)
+        self.client.logout()
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+    def test_admin_action(self):
+        ids = list(ContactMessage.objects.filter(name__in=["V0", "V2"]).values_list("pk", flat=True))
+        response = self.client.post(
+            "/admin/contact/contactmessage/", {"action": "export_ndjson", "_selected_action": ids},
+        )
+        body = b"".join(response.streaming_content)
+        self.assertEqual([json.loads(line)["name"] for line in body.splitlines()], ["V0", "V2"])
+
+    @override_settings(ROOT_URLCONF="portfolio_project.urls_async")
+    async def test_asgi_streams_without_buffering(self):
+        await self.async_client.aforce_login(self.admin)
+        response = await self.async_client.get(self.url, {"output": "ndjson"})
+        self.assertTrue(response.is_async)
+        body = b"".join([chunk async for chunk in response.streaming_content])
+        self.assertEqual(len(body.splitlines()), 3)
+
+    @tag("slow")
+    def test_million_rows_in_constant_memory(self):
+        rows = 1_000_000
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                INSERT INTO {ContactMessage._meta.db_table} (name, email, subject, message, created)
+                WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < %s)
+                SELECT 'Visitor ' || i, 'visitor' || i || '@example.com', 'Hello',
+                       'Message number ' || i || ' about a project', %s
+                FROM n
+                """,
+                [rows, timezone.now()],
+            )
+        tracemalloc.start()
+        try:
+            lines = sum(chunk.count(b"\n") for chunk in export_stream(ContactMessage.objects.order_by("created", "id")))
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        self.assertEqual(lines, rows + 3 + 3 + 1)  # three embedded newlines, the header
+        self.assertLess(peak, 8 * 1024 * 1024)
@@ -1,8 +1,24 @@
 from rest_framework.routers import DefaultRouter
 from django.urls import include, path
-from .views import ContactMessageViewSet
+from .views import ContactArchiveView, ContactExportView, ContactMessageCreateView, ContactMessageViewSet
 
 router = DefaultRouter()
 router.register("messages", ContactMessageViewSet, basename="contact-messages")
 
-urlpatterns = [path("", include(router.urls))]
+urlpatterns = [
+    path("archive/", ContactArchiveView.as_view(), name="contact-archive"),
+    # ahead of the router, whose detail route would take "export" for a pk
+    path("messages/export/", ContactExportView.as_view(), name="contact-messages-export"),
+    path("", include(router.urls)),
+]
+
+# under ASGI, in front of urlpatterns (portfolio_project/urls_async.py)
+async_urlpatterns = [
+    path(
+        "messages/",
+        ContactMessageCreateView.as_view(
+            sync_view=next(p.callback for p in router.urls if p.name == "contact-messages-list")
+        ),
+        name="contact-messages-list",
+    ),
+]
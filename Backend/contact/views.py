@@ -1,55 +1,141 @@
+import asyncio
+import logging
+from datetime import date
+
+from asgiref.sync import sync_to_async
 from rest_framework import viewsets, status
+from rest_framework.exceptions import APIException, ValidationError
+from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+from rest_framework.views import APIView
 from django.conf import settings
-from django.core.mail import send_mail
+from django.db import transaction
+from pages.async_views import AsyncView, Delegate, negotiate, render
+from pages.pagination import OptionalCursorPagination
+from portfolio_project.metrics import phase
+from .archive import parse_cursor, search_archive
+from .export import FIELDS as EXPORT_FIELDS, FORMATS as EXPORT_FORMATS, export_response, in_date_range
 from .models import ContactMessage
+from .outbox import queue_contact_emails, send_contact_emails_now
 from .serializers import ContactMessageSerializer
 
+logger = logging.getLogger(__name__)
+
 
 class ContactMessageViewSet(viewsets.ModelViewSet):
     queryset = ContactMessage.objects.all().order_by("-created")
     serializer_class = ContactMessageSerializer
+    pagination_class = OptionalCursorPagination
+    cursor_ordering = ["-created", "-id"]
 
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        instance = serializer.save()
-
-        # Prepare email to OWNER
-        owner_subject = f"New contact from {instance.name}"
-        owner_message = (
-            f"Name: {instance.name}\n"
-            f"Email: {instance.email}\n"
-            f"Subject: {instance.subject}\n\n"
-            f"Message:\n{instance.message}"
-        )
-        send_mail(
-            owner_subject,
-            owner_message,
-            settings.DEFAULT_FROM_EMAIL,
-            [settings.OWNER_EMAIL],
-            fail_silently=False,
-        )
-
-        # Thank-you email to sender
-        thanks_subject = "Acknowledgment of Your Message"
-        thanks_body = f"""Hi {instance.name},
-
-Thank you for contacting me. I have received your message and will respond at the earliest opportunity.
-
-Kind regards,
-{settings.DEFAULT_FROM_EMAIL}
-Python Full Stack Developer
-"""
-        send_mail(
-            thanks_subject,
-            thanks_body,
-            settings.DEFAULT_FROM_EMAIL,
-            [instance.email],
-            fail_silently=False,
-        )
+        instance = self.save_message(serializer)
+        if not settings.CONTACT_EMAIL_OUTBOX:
+            with phase("email"):
+                send_contact_emails_now(instance)
 
         headers = self.get_success_headers(serializer.data)
         return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
 
+    def save_message(self, serializer):
+        with transaction.atomic():
+            instance = serializer.save()
+            if settings.CONTACT_EMAIL_OUTBOX:
+                # delivered by `manage.py send_outbox`
+                queue_contact_emails(instance)
+        return instance
+
+
+class ContactMessageCreateView(AsyncView):
+    """
+    ``POST /api/contact/messages/`` under ASGI. Validation and the insert
+    are awaited, and when the outbox is off the emails are sent by a
+    background task, so a slow SMTP server never holds the response (a
+    failure is logged instead of turning into a 500). Other methods go to
+    the DRF viewset.
+    """
+    http_method_names = ["post"]
+    # running email tasks; the loop only keeps weak references
+    email_tasks = set()
+
+    async def post(self, request, *args, **kwargs):
+        viewset = self.viewset
+        renderer, media_type = negotiate(viewset)
+        try:
+            serializer = viewset.get_serializer(data=viewset.request.data)
+        except APIException:
+            raise Delegate  # unparsable body: DRF's 400/415
+        if not serializer.is_valid():
+            return render(viewset, renderer, media_type, serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        instance = await sync_to_async(viewset.save_message)(serializer)
+        if not settings.CONTACT_EMAIL_OUTBOX:
+            task = asyncio.create_task(sync_to_async(send_contact_emails_now, thread_sensitive=False)(instance))
+            self.email_tasks.add(task)
+            task.add_done_callback(email_sent)
+
+        response = render(viewset, renderer, media_type, serializer.data, status=status.HTTP_201_CREATED)
+        for header, value in viewset.get_success_headers(serializer.data).items():
+            response[header] = value
+        return response
+
+
+def email_sent(task):
+    ContactMessageCreateView.email_tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.error("Sending contact emails failed", exc_info=task.exception())
+
+
+class ContactArchiveView(APIView):
+    """
+    Read-only search of the archived messages, for staff:
+    ``?q=words&from=2025-01-01&to=2025-03-31&limit=50``. Results are oldest
+    first; ``next`` continues after the last one.
+    """
+    permission_classes = [IsAdminUser]
+    max_limit = 500
+
+    def get(self, request):
+        params = request.query_params
+        try:
+            start = parse_day(params.get("from"))
+            end = parse_day(params.get("to"))
+            limit = min(max(int(params.get("limit", 50)), 1), self.max_limit)
+            if params.get("cursor"):
+                parse_cursor(params["cursor"])
+        except ValueError:
+            raise ValidationError("from/to must be YYYY-MM-DD dates, limit a number and cursor one returned by next.")
+        results, cursor = search_archive(params.get("q", ""), start, end, params.get("cursor"), limit)
+        next_url = replace_query_param(request.build_absolute_uri(), "cursor", cursor) if cursor else None
+        return Response({"next": next_url, "results": results})
+
+
+
+class ContactExportView(APIView):
+    """
+    Streaming download of the messages, for staff:
+    ``?output=csv|ndjson&fields=name,email&from=2025-01-01&to=2025-03-31&gzip=1``.
+    (``format`` is taken by DRF's renderer selection, hence ``output``.)
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        params = request.query_params
+        output = params.get("output", "csv")
+        fields = tuple(f.strip() for f in params.get("fields", "").split(",") if f.strip()) or EXPORT_FIELDS
+        if output not in EXPORT_FORMATS:
+            raise ValidationError({"output": f"One of: {', '.join(EXPORT_FORMATS)}."})
+        unknown = [f for f in fields if f not in EXPORT_FIELDS]
+        if unknown:
+            raise ValidationError({"fields": f"Unknown: {', '.join(unknown)}. Choose from {', '.join(EXPORT_FIELDS)}."})
+        try:
+            queryset = in_date_range(ContactMessage.objects.all(), parse_day(params.get("from")), parse_day(params.get("to")))
+        except ValueError:
+            raise ValidationError("from/to must be YYYY-MM-DD dates.")
+        compress = params.get("gzip", "").lower() in ("1", "true", "yes")
+        return export_response(request, queryset, fields, output, compress)
 
+def parse_day(value):
+    return date.fromisoformat(value) if value else None
@@ -0,0 +1,289 @@
+"""
+Async twins of the hot read endpoints, routed in front of the DRF views when
+the app runs under ASGI (see ``portfolio_project/urls_async.py``).
+
+DRF views are synchronous: under ASGI each one runs in a thread, which it
+holds for the whole request. These views build the same DRF viewset the
+router would, use it for everything lazy (queryset, filters, serializers,
+paginator) and only await the ORM. They share the response cache, ETags and
+JSON bytes with the DRF views. Whatever they do not handle themselves goes to
+the routed DRF view in a thread, so bodies never differ: other methods, the
+browsable API, keyset pages and errors such as 404s.
+
+They do not authenticate (the read API is public), so unlike DRF they do not
+touch the session and their responses carry no ``Vary: Cookie``.
+"""
+import asyncio
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist, ValidationError
+from django.core.paginator import InvalidPage
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.decorators import classonlymethod
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.exceptions import APIException
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.renderers import JSONRenderer
+
+from portfolio_project.metrics import phase
+
+from .cache import CACHED_HEADERS, CachedResponseMixin, conditional_validators, get_cache, response_cache_key
+from .compression import acompressed_content, negotiate_encoding, set_encoded_content, should_compress
+from .fast import FastReadMixin
+from .pagination import OptionalCursorPagination
+from .singletons import alatest
+from .versioning import acurrent_versions
+
+
+class Delegate(Exception):
+    """Hand the request over to the DRF view."""
+
+
+def build_viewset(view, request, args, kwargs):
+    """
+    The view instance a routed DRF ``view`` would dispatch to, initialised
+    up to (not including) authentication, without running it.
+    """
+    viewset = view.cls(**view.initkwargs)
+    actions = getattr(view, "actions", None)
+    if actions:
+        viewset.action_map = actions
+        for method, action in actions.items():
+            setattr(viewset, method, getattr(viewset, action))
+    viewset.setup(request, *args, **kwargs)
+    viewset.request = viewset.initialize_request(request, *args, **kwargs)
+    viewset.headers = viewset.default_response_headers
+    viewset.format_kwarg = viewset.get_format_suffix(**kwargs)
+    return viewset
+
+
+def negotiate(viewset):
+    """``(renderer, media_type)`` if the client gets JSON, else ``Delegate``."""
+    try:
+        renderer, media_type = viewset.perform_content_negotiation(viewset.request)
+        viewset.check_permissions(viewset.request)
+    except APIException:
+        raise Delegate
+    if not isinstance(renderer, JSONRenderer):
+        raise Delegate
+    return renderer, media_type
+
+
+def render(viewset, renderer, media_type, data, status=200):
+    """An ``HttpResponse`` with the bytes and headers DRF would send."""
+    with phase("render"):
+        content = renderer.render(data, media_type, {"view": viewset, "request": viewset.request})
+    response = HttpResponse(content, status=status, content_type=renderer.media_type)
+    for header, value in viewset.headers.items():
+        response[header] = value
+    return response
+
+
+class AsyncView(View):
+    """Base for views that stand in for the routed DRF ``sync_view``."""
+    sync_view = None
+
+    @classonlymethod
+    def as_view(cls, **initkwargs):
+        # like DRF's views; nothing here authenticates with the session
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    async def dispatch(self, request, *args, **kwargs):
+        handler = getattr(self, request.method.lower(), None)
+        if request.method.lower() not in self.http_method_names or handler is None:
+            return await self.delegate(request, *args, **kwargs)
+        try:
+            self.viewset = build_viewset(self.sync_view, request, args, kwargs)
+            return await handler(request, *args, **kwargs)
+        except Delegate:
+            return await self.delegate(request, *args, **kwargs)
+
+    async def delegate(self, request, *args, **kwargs):
+        return await sync_to_async(self.sync_view)(request, *args, **kwargs)
+
+
+class AsyncReadView(AsyncView, CachedResponseMixin):
+    """
+    ``CachedResponseMixin`` on the async side: subclasses implement
+    ``get_data()``, and the result is cached and validated exactly as the
+    DRF view's would be. HEAD goes to the DRF view. (The mixin comes
+    second so that ``AsyncView.dispatch`` wins over its sync one.)
+    """
+    http_method_names = ["get"]
+
+    def get_cache_models(self):
+        return self.viewset.get_cache_models()
+
+    async def get(self, request, *args, **kwargs):
+        self.renderer, self.media_type = negotiate(self.viewset)
+        key = response_cache_key(request)
+        self.encoding = negotiate_encoding(request)
+        versions, modified = await acurrent_versions(self.get_cache_models())
+        self.content_versions = versions
+        validators = conditional_validators(key, versions, modified, self.encoding)
+        not_modified = get_conditional_response(request, **validators)
+        if not_modified is not None:
+            return self.add_validators(not_modified, validators)
+
+        if not settings.PAGES_CACHE_ENABLED:
+            key = None
+        response = await self.get_cached_response(request, key, versions, validators)
+        if should_compress(response, self.encoding):
+            if response.get("X-Cache") == "STALE":
+                key = None
+            content = await acompressed_content(response, self.encoding, key, versions, get_cache())
+            set_encoded_content(response, content, self.encoding)
+        return response
+
+    async def get_cached_response(self, request, key, versions, validators):
+        if key is None:
+            return await self.render_and_store(request, None, versions, validators)
+
+        cache = get_cache()
+        lock_key = key + ":lock"
+        entry = await cache.aget(key)
+        if entry is not None and entry["versions"] == versions:
+            return self.cached_response(key, entry, "HIT")
+
+        if await cache.aadd(lock_key, 1, settings.PAGES_CACHE_LOCK_TIMEOUT):
+            try:
+                return await self.render_and_store(request, key, versions, validators)
+            finally:
+                await cache.adelete(lock_key)
+
+        if entry is not None:
+            return self.cached_response(key, entry, "STALE")
+
+        deadline = time.monotonic() + settings.PAGES_CACHE_FILL_WAIT
+        while time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+            entry = await cache.aget(key)
+            if entry is not None and entry["versions"] == versions:
+                return self.cached_response(key, entry, "HIT")
+        return await self.render_and_store(request, key, versions, validators)
+
+    async def render_and_store(self, request, key, versions, validators):
+        data = await self.get_data()
+        response = self.add_validators(render(self.viewset, self.renderer, self.media_type, data), validators)
+        if key is None:
+            return response
+        entry = {
+            "versions": versions,
+            "status": response.status_code,
+            "content": response.content,
+            "headers": {h: response[h] for h in CACHED_HEADERS if h in response},
+        }
+        await get_cache().aset(key, entry, settings.PAGES_CACHE_TIMEOUT)
+        response["X-Cache"] = "MISS"
+        return response
+
+    async def in_thread(self, serialize, *args, **kwargs):
+        """
+        Run a serializer off the event loop: media URLs stat files and read
+        the digest cache. Everything it reads is loaded by then, so no query
+        runs there.
+        """
+        return await sync_to_async(serialize, thread_sensitive=False)(*args, **kwargs)
+
+
+class ModelReadView(AsyncReadView):
+    """Shared by the list and detail views of a (``FastReadMixin``) viewset."""
+
+    def get_rows(self):
+        """``(row_serializer or None, filtered queryset)``, as the viewset would."""
+        viewset = self.viewset
+        queryset = viewset.filter_queryset(viewset.get_queryset())
+        if isinstance(viewset, FastReadMixin) and viewset.use_fast_path():
+            rows = viewset.row_serializer_class(viewset.request)
+            return rows, rows.fetch(queryset)
+        return None, queryset
+
+    def serialize(self, rows, objects, many=False):
+        if rows is None:
+            return self.viewset.serialize(objects, many=many)
+        with phase("serialize"):
+            if many:
+                return [rows.to_representation(row) for row in objects]
+            return rows.to_representation(objects)
+
+
+class ListView(ModelReadView):
+    """A viewset's ``list``, page-number paginated as in DRF."""
+
+    async def get_data(self):
+        rows, queryset = self.get_rows()
+        page = await self.paginate(queryset)
+        data = await self.in_thread(self.serialize, rows, page, many=True)
+        if self.pagination is None:
+            return data
+        return self.pagination.get_paginated_response(data).data
+
+    async def paginate(self, queryset):
+        """``PageNumberPagination.paginate_queryset()`` on the async ORM."""
+        request = self.viewset.request
+        pagination = self.viewset.paginator
+        if isinstance(pagination, OptionalCursorPagination):
+            pagination = pagination.select(request)
+        page_size = pagination.get_page_size(request) if pagination is not None else None
+        if pagination is not None and not isinstance(pagination, PageNumberPagination):
+            raise Delegate  # keyset pages
+        if not page_size:
+            self.pagination = None
+            return [obj async for obj in queryset]
+
+        paginator = pagination.django_paginator_class(queryset, page_size)
+        # set the cached_property up front so page() does not count synchronously
+        paginator.count = await queryset.acount()
+        try:
+            page = paginator.page(pagination.get_page_number(request, paginator))
+        except InvalidPage:
+            raise Delegate  # DRF's 404
+        page.object_list = [obj async for obj in page.object_list]
+        pagination.request, pagination.page = request, page
+        self.pagination = pagination
+        return page.object_list
+
+
+class DetailView(ModelReadView):
+    """A viewset's ``retrieve``."""
+
+    async def get_data(self):
+        viewset = self.viewset
+        rows, queryset = self.get_rows()
+        lookup_url_kwarg = viewset.lookup_url_kwarg or viewset.lookup_field
+        try:
+            obj = await queryset.aget(**{viewset.lookup_field: viewset.kwargs[lookup_url_kwarg]})
+            viewset.check_object_permissions(viewset.request, obj)
+        except (ObjectDoesNotExist, ValidationError, ValueError, TypeError, APIException):
+            raise Delegate
+        return await self.in_thread(self.serialize, rows, obj)
+
+
+class LatestView(AsyncReadView):
+    """The singleton pages' ``list``: the newest row, or ``null``."""
+
+    async def get_data(self):
+        instance = await alatest(self.viewset.singleton, self.content_versions)
+        if not instance:
+            return None
+        return await self.in_thread(self.viewset.serialize, instance)
+
+
+class PageBundleView(AsyncReadView):
+    """``pages.views.PageBundleView``, one awaited query set per section."""
+
+    async def get_data(self):
+        view = self.viewset
+        try:
+            sections = view.get_sections(view.request)
+        except APIException:
+            raise Delegate
+        data = {}
+        for name in sections:
+            instance = await alatest(name, self.content_versions)
+            data[name] = await self.in_thread(view.serialize_section, view.request, name, instance)
+        return data
@@ -0,0 +1,183 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, urlencode
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from portfolio_project.metrics import phase
+
+from .compression import compressed_content, negotiate_encoding, set_encoded_content, should_compress, vary_on_encoding
+from .versioning import current_versions
+
+# headers DRF sets on the original response that must survive a cache hit
+CACHED_HEADERS = ("Content-Type", "Vary", "Allow", "ETag", "Last-Modified", "Cache-Control")
+
+
+def get_cache():
+    return caches[settings.PAGES_CACHE_ALIAS]
+
+
+def response_cache_key(request):
+    """
+    Key a GET response on scheme, host, path, normalised query string and
+    Accept header. Scheme and host matter because the serializers emit
+    absolute media URLs.
+    """
+    query = urlencode(sorted(request.GET.lists()), doseq=True)
+    raw = "|".join((
+        request.scheme,
+        request.get_host(),
+        request.path,
+        query,
+        request.META.get("HTTP_ACCEPT", ""),
+    ))
+    return "pages:response:" + hashlib.sha1(raw.encode()).hexdigest()
+
+
+def content_etag(key, versions, encoding=None):
+    # each encoding is a different representation, so it gets its own tag
+    # (the one negotiated, even when the body was too small to compress)
+    etag = hashlib.sha1(f"{key}|{versions!r}".encode()).hexdigest()
+    return f'"{etag}-{encoding}"' if encoding else f'"{etag}"'
+
+
+def conditional_validators(key, versions, modified, encoding=None):
+    return {
+        "etag": content_etag(key, versions, encoding),
+        "last_modified": int(modified.timestamp()) if modified else None,
+    }
+
+
+class CachedResponseMixin:
+    """
+    Read-through cache and conditional GET for read-only views.
+
+    Entries are stored together with the content versions of ``cache_models``
+    they were rendered from. A post_save/post_delete/m2m_changed on any of
+    those models bumps its version (see ``pages.signals``), so the next request
+    sees the entry as stale. A stale entry keeps being served while a single
+    request re-renders it (stale-while-revalidate); on a cold miss the other
+    requests wait briefly for that render instead of all hitting the database.
+
+    The same versions give every JSON response a strong ETag and a
+    Last-Modified, so ``If-None-Match``/``If-Modified-Since`` are answered with
+    a 304 before the queryset or serializer runs.
+
+    Responses are compressed as ``Accept-Encoding`` allows, and their
+    compressed bodies cached per version too (see ``pages.compression``).
+    """
+    cache_models = ()
+    # the versions read for this request, for views that can reuse them (``pages.singletons``)
+    content_versions = None
+
+    def get_cache_models(self):
+        return self.cache_models
+
+    def serialize(self, instance, **kwargs):
+        """``get_serializer(instance).data``, timed as the ``serialize`` phase."""
+        serializer = self.get_serializer(instance, **kwargs)
+        with phase("serialize"):
+            return serializer.data
+
+    # ListModelMixin.list and RetrieveModelMixin.retrieve, through serialize()
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(self.serialize(page, many=True))
+        return Response(self.serialize(queryset, many=True))
+
+    def retrieve(self, request, *args, **kwargs):
+        return Response(self.serialize(self.get_object()))
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in ("GET", "HEAD"):
+            return super().dispatch(request, *args, **kwargs)
+
+        key = response_cache_key(request)
+        self.encoding = negotiate_encoding(request)
+        versions, modified = current_versions(self.get_cache_models())
+        self.content_versions = versions
+        validators = conditional_validators(key, versions, modified, self.encoding)
+        not_modified = get_conditional_response(request, **validators)
+        if not_modified is not None:
+            return self.add_validators(not_modified, validators)
+
+        if request.method != "GET" or not settings.PAGES_CACHE_ENABLED:
+            key = None
+        response = self.get_cached_response(request, key, versions, validators, *args, **kwargs)
+        if should_compress(response, self.encoding):
+            if response.get("X-Cache") == "STALE":
+                key = None  # not the body of these versions: compress it for this response only
+            content = compressed_content(response, self.encoding, key, versions, get_cache())
+            set_encoded_content(response, content, self.encoding)
+        return response
+
+    def get_cached_response(self, request, key, versions, validators, *args, **kwargs):
+        if key is None:
+            return self.render_and_store(request, None, versions, validators, *args, **kwargs)
+
+        cache = get_cache()
+        lock_key = key + ":lock"
+        entry = cache.get(key)
+        if entry is not None and entry["versions"] == versions:
+            return self.cached_response(key, entry, "HIT")
+
+        if cache.add(lock_key, 1, settings.PAGES_CACHE_LOCK_TIMEOUT):
+            try:
+                return self.render_and_store(request, key, versions, validators, *args, **kwargs)
+            finally:
+                cache.delete(lock_key)
+
+        if entry is not None:
+            return self.cached_response(key, entry, "STALE")
+
+        # someone else is filling this key: wait for them rather than pile on
+        deadline = time.monotonic() + settings.PAGES_CACHE_FILL_WAIT
+        while time.monotonic() < deadline:
+            time.sleep(0.05)
+            entry = cache.get(key)
+            if entry is not None and entry["versions"] == versions:
+                return self.cached_response(key, entry, "HIT")
+        return self.render_and_store(request, key, versions, validators, *args, **kwargs)
+
+    def render_and_store(self, request, key, versions, validators, *args, **kwargs):
+        response = super().dispatch(request, *args, **kwargs)
+        if response.status_code != 200 or not isinstance(getattr(response, "accepted_renderer", None), JSONRenderer):
+            return response
+        self.add_validators(response, validators)
+        with phase("render"):
+            response.render()
+        if key is None:
+            return response
+        entry = {
+            "versions": versions,
+            "status": response.status_code,
+            "content": response.content,
+            "headers": {h: response[h] for h in CACHED_HEADERS if h in response},
+        }
+        get_cache().set(key, entry, settings.PAGES_CACHE_TIMEOUT)
+        response["X-Cache"] = "MISS"
+        return response
+
+    def add_validators(self, response, validators):
+        response["ETag"] = validators["etag"]
+        if validators["last_modified"] is not None:
+            response["Last-Modified"] = http_date(validators["last_modified"])
+        # always revalidate: content changes whenever the admin saves
+        response["Cache-Control"] = "no-cache"
+        return vary_on_encoding(response)
+
+    def cached_response(self, key, entry, state):
+        response = HttpResponse(entry["content"], status=entry["status"])
+        for header, value in entry["headers"].items():
+            response[header] = value
+        response["X-Cache"] = state
+        # the stored ETag is for whichever encoding the first request negotiated
+        response["ETag"] = content_etag(key, entry["versions"], self.encoding)
+        return response
@@ -0,0 +1,127 @@
+"""
+Brotli/gzip for the pages API.
+
+A JSON body only changes when its content versions do, so its compressed
+forms are cached next to it: one cache entry per (response cache key,
+encoding), checked against the versions like the body itself. Each version
+of a URL is compressed once per encoding, however often it is served.
+
+Bodies below ``PAGES_COMPRESS_MIN_SIZE`` go out as they are; the bytes
+saved on them do not pay for the work on either end. Since cached bodies
+are compressed once per version, they get the slowest, smallest levels
+(``PAGES_COMPRESS_LEVELS``); anything not cached is compressed per request
+at cheaper ones (``PAGES_COMPRESS_UNCACHED_LEVELS``).
+"""
+import gzip
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+from portfolio_project.metrics import phase
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+
+def available_encodings():
+    """Supported encodings, most preferred first."""
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def negotiate_encoding(request):
+    """The encoding to send ``request``, or ``None`` for the identity."""
+    if not settings.PAGES_COMPRESS_ENABLED:
+        return None
+    accepted = {}
+    for item in request.headers.get("Accept-Encoding", "").split(","):
+        name, _, params = item.partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if name.strip():
+            accepted[name.strip().lower()] = quality
+    best, best_quality = None, 0.0
+    for encoding in available_encodings():
+        quality = accepted.get(encoding, accepted.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compress(content, encoding, level):
+    if encoding == "br":
+        return brotli.compress(content, mode=brotli.MODE_TEXT, quality=level)
+    # mtime=0: the same body always compresses to the same bytes
+    return gzip.compress(content, compresslevel=level, mtime=0)
+
+
+def encoded_cache_key(key, encoding):
+    return f"{key}:{encoding}"
+
+
+def compression_level(encoding, cached):
+    levels = settings.PAGES_COMPRESS_LEVELS if cached else settings.PAGES_COMPRESS_UNCACHED_LEVELS
+    return levels[encoding]
+
+
+def should_compress(response, encoding):
+    return (
+        encoding is not None
+        and response.status_code == 200
+        and not response.streaming
+        and getattr(response, "is_rendered", True)  # the browsable API's, which is left alone
+        and not response.has_header("Content-Encoding")
+        and len(response.content) >= settings.PAGES_COMPRESS_MIN_SIZE
+    )
+
+
+def compressed_content(response, encoding, key, versions, cache):
+    """The compressed body, from ``cache`` if it holds one for ``versions``."""
+    if key is not None:
+        entry = cache.get(encoded_cache_key(key, encoding))
+        if entry is not None and entry["versions"] == versions:
+            return entry["content"]
+    with phase("compress"):
+        content = compress(response.content, encoding, compression_level(encoding, key is not None))
+    if key is not None:
+        cache.set(encoded_cache_key(key, encoding), {"versions": versions, "content": content},
+                  settings.PAGES_CACHE_TIMEOUT)
+    return content
+
+
+async def acompressed_content(response, encoding, key, versions, cache):
+    """``compressed_content()``, compressing in a worker thread."""
+    if key is not None:
+        entry = await cache.aget(encoded_cache_key(key, encoding))
+        if entry is not None and entry["versions"] == versions:
+            return entry["content"]
+    with phase("compress"):
+        content = await sync_to_async(compress, thread_sensitive=False)(
+            response.content, encoding, compression_level(encoding, key is not None)
+        )
+    if key is not None:
+        await cache.aset(encoded_cache_key(key, encoding), {"versions": versions, "content": content},
+                         settings.PAGES_CACHE_TIMEOUT)
+    return content
+
+
+def set_encoded_content(response, content, encoding):
+    if len(content) < len(response.content):
+        response.content = content
+        response["Content-Encoding"] = encoding
+        if response.has_header("Content-Length"):
+            response["Content-Length"] = str(len(content))
+    return response
+
+
+def vary_on_encoding(response):
+    patch_vary_headers(response, ("Accept-Encoding",))
+    return response
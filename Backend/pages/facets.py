@@ -0,0 +1,69 @@
+"""
+Facet counts for the Work page's filter bar: how many projects fall in each
+category, featured or not, and carry each tag and tool, under the filters
+and search of the current request.
+
+Everything comes from one ``UNION ALL`` of grouped counts, so the bar needs
+one request and the request one query. Category counts leave out the
+category filter itself, so picking a category keeps the others' counts
+visible.
+"""
+from django.db.models import Case, CharField, Count, F, Value, When
+
+from .models import Project
+
+# tags and tools beyond this many (by count) are left out
+LABEL_LIMIT = 50
+
+
+def grouped(queryset, facet, value, label):
+    return (
+        queryset.order_by()
+        .annotate(facet=Value(facet, output_field=CharField()), value=value, label=label)
+        .values("facet", "value", "label")
+        .annotate(count=Count("id"))
+        .values_list("facet", "value", "label", "count")
+    )
+
+
+def facet_counts(queryset, category_queryset=None):
+    """
+    Counts over ``queryset``; the category ones over ``category_queryset``
+    (the same filters without the category) when given.
+    """
+    featured = Case(When(featured=True, then=Value("true")), default=Value("false"), output_field=CharField())
+    parts = [
+        grouped(category_queryset if category_queryset is not None else queryset, "category", F("category"),
+                F("category")),
+        grouped(queryset, "featured", featured, featured),
+        # joined rather than nested: search's raw SQL names pages_project, which a subquery would alias
+        grouped(queryset, "tag", F("tag_set__key"), F("tag_set__name")),
+        grouped(queryset, "tool", F("tool_set__key"), F("tool_set__name")),
+    ]
+    counts = {"category": {}, "featured": {}, "tag": [], "tool": []}
+    for facet, value, label, count in parts[0].union(*parts[1:], all=True):
+        if facet in ("tag", "tool"):
+            # the outer join's row for projects without any
+            if value is None:
+                continue
+            counts[facet].append({"value": value, "label": label, "count": count})
+        else:
+            counts[facet][value] = count
+
+    featured_counts = counts["featured"]
+    return {
+        "total": sum(featured_counts.values()),
+        # every category, so the bar needs no list of its own
+        "category": [
+            {"value": value, "label": label, "count": counts["category"].get(value, 0)}
+            for value, label in Project.CATEGORY_CHOICES
+        ],
+        "featured": [
+            {"value": True, "label": "Featured", "count": featured_counts.get("true", 0)},
+            {"value": False, "label": "Not featured", "count": featured_counts.get("false", 0)},
+        ],
+        **{
+            facet: sorted(counts[facet], key=lambda row: (-row["count"], row["value"]))[:LABEL_LIMIT]
+            for facet in ("tag", "tool")
+        },
+    }
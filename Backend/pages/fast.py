@@ -0,0 +1,48 @@
+from django.conf import settings
+from django.shortcuts import get_object_or_404
+from rest_framework.response import Response
+
+from portfolio_project.metrics import phase
+
+
+class FastReadMixin:
+    """
+    ``list`` and ``retrieve`` through the view's ``row_serializer_class``
+    when ``PAGES_FAST_SERIALIZERS`` is on. Filtering and pagination work as
+    before, on a ``values()`` queryset.
+
+    A row serializer is built with the request, narrows the queryset with
+    ``fetch(queryset)`` and turns each row into exactly the JSON of the
+    serializer it stands in for with ``to_representation(row)``
+    (``pages.serializers.ProjectRowSerializer``).
+    """
+    row_serializer_class = None
+
+    def use_fast_path(self):
+        return self.row_serializer_class is not None and settings.PAGES_FAST_SERIALIZERS
+
+    def list(self, request, *args, **kwargs):
+        if not self.use_fast_path():
+            return super().list(request, *args, **kwargs)
+        rows = self.row_serializer_class(request)
+        queryset = rows.fetch(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(queryset)
+        with phase("serialize"):
+            data = [rows.to_representation(row) for row in (queryset if page is None else page)]
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
+
+    def retrieve(self, request, *args, **kwargs):
+        if not self.use_fast_path():
+            return super().retrieve(request, *args, **kwargs)
+        rows = self.row_serializer_class(request)
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        row = get_object_or_404(
+            rows.fetch(self.filter_queryset(self.get_queryset())),
+            **{self.lookup_field: self.kwargs[lookup_url_kwarg]},
+        )
+        self.check_object_permissions(request, row)
+        with phase("serialize"):
+            data = rows.to_representation(row)
+        return Response(data)
@@ -0,0 +1,220 @@
+import base64
+import hashlib
+import io
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from PIL import Image, ImageOps, features
+
+from . import versioning
+
+logger = logging.getLogger(__name__)
+
+# model label -> image fields that get derivatives; each has a
+# ``<field>_renditions`` JSONField next to it
+IMAGE_FIELDS = {
+    "pages.project": ["image"],
+    "pages.homepage": ["profile_image"],
+    "pages.aboutpage": ["profile_image"],
+    "pages.sitesettings": ["logo"],
+}
+
+# stored next to each image field as <field>_width, _height, _color, _lqip
+METADATA = ("width", "height", "color", "lqip")
+LQIP_SIZE = 16
+
+WIDTHS = (320, 640, 960, 1280, 1920)
+FORMATS = {"webp": "WEBP", "avif": "AVIF"}
+QUALITY = 80
+
+# one background thread per process is plenty for admin uploads
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="image-derivatives")
+
+
+def formats():
+    names = ["webp"]
+    if settings.IMAGE_DERIVATIVES_AVIF and features.check("avif"):
+        names.append("avif")
+    return names
+
+
+def file_digest(name, storage=default_storage):
+    digest = hashlib.sha256()
+    with storage.open(name, "rb") as fh:
+        for chunk in iter(lambda: fh.read(64 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def open_image(fh):
+    image = ImageOps.exif_transpose(Image.open(fh))
+    image.load()
+    if image.mode not in ("RGB", "RGBA"):
+        has_alpha = image.mode in ("LA", "PA", "P") or "transparency" in image.info
+        image = image.convert("RGBA" if has_alpha else "RGB")
+    return image
+
+
+def dominant_color(image):
+    """The most common of a few representative colours, as ``#rrggbb``."""
+    small = image.convert("RGB")
+    small.thumbnail((64, 64))
+    palette = small.quantize(colors=5)
+    _, index = max(palette.getcolors())
+    r, g, b = palette.getpalette()[index * 3:index * 3 + 3]
+    return f"#{r:02x}{g:02x}{b:02x}"
+
+
+def lqip(image):
+    """A blurry ~16px WebP as a data URI, small enough to inline in JSON."""
+    tiny = image.copy()
+    tiny.thumbnail((LQIP_SIZE, LQIP_SIZE))
+    buf = io.BytesIO()
+    tiny.save(buf, "WEBP", quality=40)
+    return "data:image/webp;base64," + base64.b64encode(buf.getvalue()).decode()
+
+
+def image_metadata(fh):
+    """``{"width", "height", "color", "lqip"}`` for an open image file."""
+    image = open_image(fh)
+    width, height = image.size
+    return {"width": width, "height": height, "color": dominant_color(image), "lqip": lqip(image)}
+
+
+def stored_image_metadata(name, storage=default_storage):
+    with storage.open(name, "rb") as fh:
+        return image_metadata(fh)
+
+
+def metadata_columns(field, metadata):
+    """Map ``image_metadata()`` output (or ``None``) onto the model columns."""
+    metadata = metadata or {}
+    return {
+        f"{field}_width": metadata.get("width"),
+        f"{field}_height": metadata.get("height"),
+        f"{field}_color": metadata.get("color", ""),
+        f"{field}_lqip": metadata.get("lqip", ""),
+    }
+
+
+def fill_metadata(instance):
+    """
+    Set the metadata columns for new uploads on ``instance`` before it is
+    saved. Rows that already have them are left alone, so only the request
+    that uploads a file pays for decoding it.
+    """
+    for field in IMAGE_FIELDS.get(instance._meta.label_lower, ()):
+        file = getattr(instance, field)
+        if not file:
+            columns = metadata_columns(field, None)
+        elif file._committed and getattr(instance, f"{field}_width") is not None:
+            continue
+        else:
+            try:
+                if file._committed:
+                    metadata = stored_image_metadata(file.name, file.storage)
+                else:
+                    # a fresh upload, not written to storage yet
+                    file.open("rb")
+                    try:
+                        metadata = image_metadata(file)
+                    finally:
+                        file.seek(0)
+                columns = metadata_columns(field, metadata)
+            except Exception:
+                logger.exception("Could not read image metadata for %s.%s", instance._meta.label_lower, field)
+                continue
+        for name, value in columns.items():
+            setattr(instance, name, value)
+
+
+def build_renditions(name, storage=default_storage):
+    """
+    Render the width ladder for the image stored at ``name``.
+
+    Derivatives are named after the source's content hash, so re-uploads of
+    the same file share them and existing ones are never rendered twice.
+    Returns the ``<field>_renditions`` value: source name, original size and a
+    ``{format: {width: name}}`` map.
+    """
+    digest = file_digest(name, storage)
+    with storage.open(name, "rb") as fh:
+        image = open_image(fh)
+    width, height = image.size
+
+    # never upscale; a small original still gets one rendition at its own width
+    ladder = [w for w in WIDTHS if w < width] + [min(width, WIDTHS[-1])]
+    renditions = {"source": name, "width": width, "height": height}
+    for fmt in formats():
+        renditions[fmt] = {}
+        for target in ladder:
+            out = f"derivatives/{digest[:2]}/{digest}-{target}.{fmt}"
+            if not storage.exists(out):
+                resized = image.resize((target, max(1, round(height * target / width))), Image.LANCZOS)
+                buf = io.BytesIO()
+                resized.save(buf, FORMATS[fmt], quality=QUALITY)
+                storage.save(out, ContentFile(buf.getvalue()))
+            renditions[fmt][str(target)] = out
+    return renditions
+
+
+def generate(label, pk, field):
+    """Build renditions for one object and store them without firing signals."""
+    model = apps.get_model(label)
+    name = model.objects.filter(pk=pk).values_list(field, flat=True).first()
+    if not name:
+        return
+    try:
+        renditions = build_renditions(name)
+    except Exception:
+        logger.exception("Could not build derivatives for %s %s.%s", label, pk, field)
+        return
+    # only if the image was not replaced in the meantime
+    if model.objects.filter(pk=pk, **{field: name}).update(**{f"{field}_renditions": renditions}):
+        versioning.bump(model)
+
+
+def generate_in_background(label, pk, field):
+    try:
+        generate(label, pk, field)
+    finally:
+        # this thread's connection would otherwise stay open forever
+        connection.close()
+
+
+def schedule(instance):
+    """Queue derivative generation for any image on ``instance`` that changed."""
+    label = instance._meta.label_lower
+    for field in IMAGE_FIELDS.get(label, ()):
+        file = getattr(instance, field)
+        renditions = getattr(instance, f"{field}_renditions") or {}
+        if not file:
+            if renditions:
+                type(instance).objects.filter(pk=instance.pk).update(**{f"{field}_renditions": {}})
+            continue
+        if renditions.get("source") == file.name:
+            continue
+        job = (label, instance.pk, field)
+        if settings.IMAGE_DERIVATIVES_ASYNC:
+            transaction.on_commit(lambda job=job: _executor.submit(generate_in_background, *job))
+        else:
+            transaction.on_commit(lambda job=job: generate(*job))
+
+
+def srcset(renditions, media_url):
+    """
+    ``{format: {width: absolute url}}`` for a ``<field>_renditions`` value;
+    ``media_url`` is a ``pages.media.MediaURLs``.
+    """
+    if not renditions:
+        return None
+    urls = {}
+    for fmt in FORMATS:
+        if fmt in renditions:
+            urls[fmt] = {width: media_url(name) for width, name in renditions[fmt].items()}
+    return urls
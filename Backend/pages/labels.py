@@ -0,0 +1,131 @@
+"""
+Normalized project tags and tools.
+
+``Project.tags`` and ``Project.tools`` stay the free-form lists that are
+edited in the admin and emitted by the API. Every save mirrors them into
+``Tag``/``Tool`` rows linked through ``ProjectTag``/``ProjectTool``, whose
+``(label, project)`` indexes serve the ``?tag=``/``?tool=`` filters.
+"""
+import re
+from itertools import islice
+
+from django.apps import apps as global_apps
+from django.db.models import Q
+from rest_framework import filters
+from rest_framework.exceptions import ValidationError
+
+from . import versioning
+
+LABELS = {
+    # query parameter -> (Project string field, label model, through model)
+    "tag": ("tags", "Tag", "ProjectTag"),
+    "tool": ("tools", "Tool", "ProjectTool"),
+}
+MATCH_PARAM = "match"
+# the lists are written "a, b", "a · b" or "a. b"; a dot inside a word ("React.js") stays
+SEPARATORS = re.compile(r"[,;|·]|\.(?=[\s,;|·]|$)")
+MAX_LENGTH = 100
+# rows per bulk statement and values per IN (...), under SQLite's variable limit
+BATCH_SIZE = 500
+
+
+def label_key(name):
+    return " ".join(name.split()).lower()
+
+
+def split_labels(text):
+    """``"React, django · react"`` -> ``{"react": "React", "django": "django"}``; the first spelling wins."""
+    labels = {}
+    for part in SEPARATORS.split(text or ""):
+        name = " ".join(part.split())[:MAX_LENGTH]
+        if name:
+            labels.setdefault(name.lower(), name)
+    return labels
+
+
+def batches(items, size=BATCH_SIZE):
+    iterator = iter(items)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def sync_labels(projects, apps=global_apps, using="default"):
+    """
+    Rebuild the tag and tool links of ``projects`` from their strings, in a
+    number of queries that depends on the batch count, not on the projects.
+    ``apps`` lets migrations pass their historical models.
+
+    The label models send no content signals (``pages.signals``), so the
+    link deletes stay single statements; the content versions are bumped
+    once here instead.
+    """
+    pks = [project.pk for project in projects]
+    changed = []
+    for param, (field, label_name, through_name) in LABELS.items():
+        Label = apps.get_model("pages", label_name)
+        Through = apps.get_model("pages", through_name)
+        changed += [Label, Through]
+        wanted = {project.pk: split_labels(getattr(project, field)) for project in projects}
+        names = {}
+        for labels in wanted.values():
+            for key, name in labels.items():
+                names.setdefault(key, name)
+        Label.objects.using(using).bulk_create(
+            [Label(key=key, name=name) for key, name in names.items()], ignore_conflicts=True, batch_size=BATCH_SIZE,
+        )
+        ids = {}
+        for keys in batches(names):
+            ids.update(Label.objects.using(using).filter(key__in=keys).values_list("key", "id"))
+        for batch in batches(pks):
+            Through.objects.using(using).filter(project_id__in=batch).delete()
+        Through.objects.using(using).bulk_create(
+            [Through(project_id=pk, **{f"{param}_id": ids[key]}) for pk, labels in wanted.items() for key in labels],
+            batch_size=BATCH_SIZE,
+        )
+    if apps is global_apps:
+        versioning.bump(*changed)
+
+
+def requested_labels(params):
+    """``{"tag": ["react", "vue"], "tool": [...]}`` from repeated and comma-separated parameters."""
+    requested = {}
+    for param in LABELS:
+        keys = [label_key(value) for values in params.getlist(param) for value in values.split(",")]
+        keys = list(dict.fromkeys(key for key in keys if key))
+        if keys:
+            requested[param] = keys
+    return requested
+
+
+def label_condition(params):
+    """
+    A ``Q`` on project ids for the requested tags and tools, or ``None``.
+    ``?match=all`` (the default) wants every label, ``?match=any`` one of them.
+    """
+    requested = requested_labels(params)
+    if not requested:
+        return None
+    match = params.get(MATCH_PARAM, "all")
+    if match not in ("all", "any"):
+        raise ValidationError({MATCH_PARAM: 'Either "all" or "any".'})
+    condition = Q()
+    for param, keys in requested.items():
+        Through = global_apps.get_model("pages", LABELS[param][2])
+        if match == "all":
+            for key in keys:
+                condition &= Q(id__in=Through.objects.filter(**{f"{param}__key": key}).values("project_id"))
+        else:
+            condition |= Q(id__in=Through.objects.filter(**{f"{param}__key__in": keys}).values("project_id"))
+    return condition
+
+
+class ProjectLabelFilter(filters.BaseFilterBackend):
+    """
+    ``?tag=react&tool=django``: projects with every listed tag and tool, or
+    any of them with ``?match=any``. Repeat a parameter or separate values
+    with commas; matching ignores case.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        condition = label_condition(request.query_params)
+        return queryset if condition is None else queryset.filter(condition)
@@ -0,0 +1,55 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from pages import versioning
+from pages.images import IMAGE_FIELDS, metadata_columns, stored_image_metadata
+
+
+class Command(BaseCommand):
+    help = "Fill in width, height, dominant colour and LQIP for stored images, in a process pool."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count).")
+        parser.add_argument("--force", action="store_true", help="Recompute rows that already have metadata.")
+
+    def handle(self, *args, **options):
+        # source name -> [(model, pk, field)], so shared files are decoded once
+        pending = {}
+        for label, fields in IMAGE_FIELDS.items():
+            model = apps.get_model(label)
+            for field in fields:
+                rows = model.objects.exclude(**{field: ""}).exclude(**{f"{field}__isnull": True})
+                if not options["force"]:
+                    rows = rows.filter(**{f"{field}_width__isnull": True})
+                for pk, name in rows.values_list("pk", field):
+                    pending.setdefault(name, []).append((model, pk, field))
+
+        if not pending:
+            self.stdout.write("Nothing to do.")
+            return
+
+        # children must not inherit open database connections
+        connections.close_all()
+        done = failed = 0
+        touched = set()
+        with ProcessPoolExecutor(max_workers=options["workers"]) as pool:
+            futures = {pool.submit(stored_image_metadata, name): name for name in pending}
+            for future in as_completed(futures):
+                name = futures[future]
+                try:
+                    metadata = future.result()
+                except Exception as exc:
+                    failed += 1
+                    self.stderr.write(f"{name}: {exc}")
+                    continue
+                for model, pk, field in pending[name]:
+                    model.objects.filter(pk=pk, **{field: name}).update(**metadata_columns(field, metadata))
+                    touched.add(model)
+                done += 1
+                self.stdout.write(f"{name}: {metadata['width']}x{metadata['height']} {metadata['color']}")
+
+        versioning.bump(*touched)
+        self.stdout.write(f"Filled metadata for {done} images, {failed} failed.")
@@ -0,0 +1,257 @@
+import asyncio
+import json
+import os
+import resource
+import shutil
+import statistics
+import tempfile
+import time
+from importlib.util import find_spec
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from .loadtest import percentile, seed_database, server_env, start_gunicorn, stop_server
+
+DEPLOYMENTS = {
+    # name -> (application, extra gunicorn arguments, ASYNC_API_VIEWS)
+    "sync": ("portfolio_project.wsgi:application", [], "False"),
+    "async": ("portfolio_project.asgi:application", ["--worker-class", "uvicorn.workers.UvicornWorker"], "True"),
+}
+PROBE_PATHS = ("/pages/site-settings/", "/pages/projects/", "/pages/bundle/")
+# a slow client sends its request in this many pieces
+SLOW_PIECES = 10
+
+
+def request_bytes(host, path, method="GET", body=b""):
+    head = [f"{method} {path} HTTP/1.1", f"Host: {host}", "Accept: application/json", "Connection: close"]
+    if body:
+        head += ["Content-Type: application/json", f"Content-Length: {len(body)}"]
+    return ("\r\n".join(head) + "\r\n\r\n").encode() + body
+
+
+async def read_status(reader):
+    """The response status; the rest of the response is read and dropped."""
+    line = await reader.readline()
+    parts = line.split()
+    if len(parts) < 2 or not parts[1].isdigit():
+        raise ConnectionError("no HTTP response")
+    while await reader.read(65536):
+        pass
+    return int(parts[1])
+
+
+async def slow_client(host, port, path, seconds):
+    """Trickle one request out over ``seconds``, then read the response."""
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        payload = request_bytes(f"{host}:{port}", path)
+        step = -(-len(payload) // SLOW_PIECES)
+        for i in range(0, len(payload), step):
+            writer.write(payload[i:i + step])
+            await writer.drain()
+            await asyncio.sleep(seconds / SLOW_PIECES)
+        return await read_status(reader)
+    finally:
+        writer.close()
+
+
+async def fast_request(host, port, path):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        writer.write(request_bytes(f"{host}:{port}", path))
+        await writer.drain()
+        return await read_status(reader)
+    finally:
+        writer.close()
+
+
+def process_tree_rss(pid):
+    """Resident memory in bytes of ``pid`` and its descendants (Linux only)."""
+    children = {}
+    rss = {}
+    page = os.sysconf("SC_PAGE_SIZE")
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as fh:
+                stat = fh.read()
+            with open(f"/proc/{entry}/statm") as fh:
+                rss[int(entry)] = int(fh.read().split()[1]) * page
+        except (OSError, ValueError, IndexError):
+            continue
+        ppid = int(stat[stat.rindex(")") + 2:].split()[1])
+        children.setdefault(ppid, []).append(int(entry))
+    total, stack, count = 0, [pid], 0
+    while stack:
+        current = stack.pop()
+        total += rss.get(current, 0)
+        count += 1
+        stack.extend(children.get(current, ()))
+    return total, count
+
+
+class Command(BaseCommand):
+    help = (
+        "Hold many slow clients open against the sync (gunicorn) and async (gunicorn with uvicorn "
+        "workers) deployments while fast clients keep requesting, and compare how many of each got "
+        "served, the fast clients' latency and the servers' memory."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--deployments", default="sync,async", help="Comma-separated: sync, async.")
+        parser.add_argument(
+            "--url", action="append", default=[], metavar="NAME=URL",
+            help="Benchmark an already running server instead, e.g. async=http://127.0.0.1:8000/api (repeatable).",
+        )
+        parser.add_argument("--clients", type=int, default=1000, help="Concurrent slow clients.")
+        parser.add_argument("--slow-seconds", type=float, default=10.0, help="Time each slow client takes to send.")
+        parser.add_argument("--duration", type=float, default=30.0, help="Length of the run; unserved clients are cut.")
+        parser.add_argument("--probes", type=int, default=4, help="Fast clients requesting back to back.")
+        parser.add_argument("--probe-timeout", type=float, default=5.0)
+        parser.add_argument("--path", default="/pages/projects/", help="What the slow clients request.")
+        parser.add_argument("--workers", type=int, default=(os.cpu_count() or 2) + 1, help="gunicorn workers.")
+        parser.add_argument("--database", help="SQLite file for the launched servers (default: a temporary one).")
+        parser.add_argument("--projects", type=int, default=2000, help="Seeded projects.")
+        parser.add_argument("--messages", type=int, default=20_000, help="Seeded contact messages.")
+        parser.add_argument("--output", default="bench-asgi-results.json", help="Where to write the JSON results.")
+
+    def handle(self, *args, **options):
+        raise_file_limit(options["clients"] * 2 + 256)
+        results = {
+            "started": timezone.now().isoformat(),
+            "config": {
+                key: options[key]
+                for key in ("clients", "slow_seconds", "duration", "probes", "path", "workers")
+            },
+            "deployments": {},
+        }
+        if options["url"]:
+            for spec in options["url"]:
+                name, sep, url = spec.partition("=")
+                if not sep:
+                    raise CommandError(f"--url expects NAME=URL, got {spec!r}")
+                results["deployments"][name] = self.run(url.rstrip("/"), None, options)
+        else:
+            names = [n.strip() for n in options["deployments"].split(",") if n.strip()]
+            unknown = [n for n in names if n not in DEPLOYMENTS]
+            if unknown:
+                raise CommandError(f"Unknown deployment(s): {', '.join(unknown)}")
+            if "async" in names and find_spec("uvicorn") is None:
+                raise CommandError("uvicorn is not installed (pip install uvicorn), or pass --url.")
+            workdir = tempfile.mkdtemp(prefix="bench-asgi-")
+            try:
+                database = Path(options["database"] or Path(workdir) / "bench.sqlite3").resolve()
+                seed_database(database, options["projects"], options["messages"], self.stdout)
+                for name in names:
+                    app, extra, async_views = DEPLOYMENTS[name]
+                    env = server_env(database, ASYNC_API_VIEWS=async_views)
+                    base_url, server = start_gunicorn(
+                        app, env, options["workers"], extra, Path(workdir) / f"{name}.log"
+                    )
+                    try:
+                        results["deployments"][name] = self.run(base_url, server.pid, options)
+                    finally:
+                        stop_server(server)
+            finally:
+                shutil.rmtree(workdir, ignore_errors=True)
+
+        self.report(results)
+        Path(options["output"]).write_text(json.dumps(results, indent=2))
+        self.stdout.write(f"Results written to {options['output']}")
+
+    def run(self, base_url, pid, options):
+        self.stdout.write(f"{base_url}: {options['clients']} slow clients for {options['duration']:.0f}s ...")
+        return asyncio.run(self.drive(base_url, pid, options))
+
+    async def drive(self, base_url, pid, options):
+        parts = urlsplit(base_url)
+        host, port, prefix = parts.hostname, parts.port or 80, parts.path.rstrip("/")
+        stop = time.monotonic() + options["duration"]
+        slow, probes, memory = [], [], []
+        # spread the connects over the first second (at most a tenth of the run) rather than a single burst
+        ramp = min(1.0, options["duration"] / 10)
+
+        async def one_slow_client(index):
+            await asyncio.sleep(ramp * index / max(options["clients"], 1))
+            start = time.perf_counter()
+            try:
+                status = await slow_client(host, port, prefix + options["path"], options["slow_seconds"])
+            except (OSError, ConnectionError, asyncio.IncompleteReadError):
+                status = 0
+            slow.append((time.perf_counter() - start, status))
+
+        async def probe(index):
+            while time.monotonic() < stop:
+                path = prefix + PROBE_PATHS[len(probes) % len(PROBE_PATHS)]
+                start = time.perf_counter()
+                try:
+                    status = await asyncio.wait_for(fast_request(host, port, path), options["probe_timeout"])
+                except (OSError, ConnectionError, asyncio.TimeoutError, asyncio.IncompleteReadError):
+                    status = 0
+                probes.append((time.perf_counter() - start, status))
+
+        async def sample_memory():
+            while pid is not None and time.monotonic() < stop:
+                memory.append(await asyncio.to_thread(process_tree_rss, pid))
+                await asyncio.sleep(0.25)
+
+        clients = [asyncio.create_task(one_slow_client(i)) for i in range(options["clients"])]
+        await asyncio.gather(*(probe(i) for i in range(options["probes"])), sample_memory())
+        unserved = sum(1 for task in clients if not task.done())
+        for task in clients:
+            task.cancel()
+        await asyncio.gather(*clients, return_exceptions=True)
+        return summarize(slow, probes, memory, unserved, options["duration"])
+
+    def report(self, results):
+        self.stdout.write(
+            f"{'deployment':<12} {'slow ok':>8} {'unserved':>9} {'probe req':>10} {'probe err':>10} "
+            f"{'p50 ms':>9} {'p99 ms':>9} {'peak MB':>9}"
+        )
+        for name, row in results["deployments"].items():
+            probe, slow = row["probes"], row["slow_clients"]
+            peak = row["server"]["peak_rss_mb"]
+            self.stdout.write(
+                f"{name:<12} {slow['served']:>8} {slow['unserved']:>9} {probe['requests']:>10} "
+                f"{probe['errors']:>10} {fmt(probe['p50_ms']):>9} {fmt(probe['p99_ms']):>9} {fmt(peak):>9}"
+            )
+
+
+def summarize(slow, probes, memory, unserved, duration):
+    ok = [seconds * 1000 for seconds, status in probes if 200 <= status < 400]
+    served = [seconds for seconds, status in slow if 200 <= status < 400]
+    return {
+        "slow_clients": {
+            "served": len(served),
+            "failed": len(slow) - len(served),
+            "unserved": unserved,
+            "p50_s": round(statistics.median(served), 2) if served else None,
+        },
+        "probes": {
+            "requests": len(probes),
+            "errors": len(probes) - len(ok),
+            "rps": round(len(ok) / duration, 2),
+            "p50_ms": round(statistics.median(ok), 2) if ok else None,
+            "p99_ms": round(percentile(ok, 99), 2) if ok else None,
+        },
+        "server": {
+            "peak_rss_mb": round(max(rss for rss, _ in memory) / 2**20, 1) if memory else None,
+            "processes": max(count for _, count in memory) if memory else None,
+        },
+    }
+
+
+def fmt(value):
+    return "-" if value is None else f"{value:.1f}"
+
+
+def raise_file_limit(wanted):
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < wanted:
+        limit = wanted if hard == resource.RLIM_INFINITY else min(wanted, hard)
+        # servers launched from here inherit it
+        resource.setrlimit(resource.RLIMIT_NOFILE, (limit, hard))
@@ -0,0 +1,117 @@
+import gzip
+import io
+import json
+import statistics
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import Client, override_settings
+from django.utils import timezone
+
+from pages.compression import available_encodings, brotli, compress
+
+PATHS = ("/api/pages/projects/", "/api/pages/bundle/", "/api/pages/resume/", "/api/pages/about/",
+         "/api/pages/site-settings/")
+LEVELS = {"gzip": (1, 6, 9), "br": (1, 5, 6, 9, 11)}
+
+
+def decompress(content, encoding):
+    return brotli.decompress(content) if encoding == "br" else gzip.decompress(content)
+
+
+def median_ms(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+class Command(BaseCommand):
+    help = (
+        "CPU cost against bytes saved of gzip and brotli levels on the pages API's JSON, and the "
+        "request time of cached compressed responses against uncompressed ones."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--paths", default=",".join(PATHS), help="Comma-separated API paths.")
+        parser.add_argument("--projects", type=int, default=200, help="Projects seeded for the run (rolled back).")
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument("--output", default="bench-compression-results.json", help="Where to write the JSON results.")
+
+    def handle(self, *args, **options):
+        paths = [p.strip() for p in options["paths"].split(",") if p.strip()]
+        results = {
+            "started": timezone.now().isoformat(),
+            "levels": settings.PAGES_COMPRESS_LEVELS,
+            "uncached_levels": settings.PAGES_COMPRESS_UNCACHED_LEVELS,
+            "paths": {},
+        }
+        # a private cache, so nothing rendered from the rolled-back rows can be served later
+        caches = {**settings.CACHES, "bench": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "bench-compression",
+        }}
+        with override_settings(CACHES=caches, PAGES_CACHE_ALIAS="bench", PAGES_CACHE_ENABLED=True), \
+                transaction.atomic():
+            call_command(
+                "seed_load_data", "--projects", str(options["projects"]), "--messages", "0", "--revisions", "1",
+                stdout=io.StringIO(),
+            )
+            client = Client(headers={"accept": "application/json"})
+            for path in paths:
+                results["paths"][path] = self.bench(client, path, options["repeat"])
+            transaction.set_rollback(True)
+
+        self.report(results)
+        Path(options["output"]).write_text(json.dumps(results, indent=2))
+        self.stdout.write(f"Results written to {options['output']}")
+
+    def bench(self, client, path, repeat):
+        body = client.get(path).content
+        row = {"identity_bytes": len(body), "levels": [], "requests_ms": {}}
+        for encoding in available_encodings():
+            for level in LEVELS[encoding]:
+                compressed = compress(body, encoding, level)
+                row["levels"].append({
+                    "encoding": encoding,
+                    "level": level,
+                    "bytes": len(compressed),
+                    "saved": round(1 - len(compressed) / len(body), 3),
+                    "compress_ms": round(median_ms(lambda: compress(body, encoding, level), repeat), 3),
+                    "decompress_ms": round(median_ms(lambda: decompress(compressed, encoding), repeat), 3),
+                })
+        # whole requests once the cache is warm: a compressed hit costs one more cache read
+        for encoding in (None, *available_encodings()):
+            headers = {"accept-encoding": encoding} if encoding else {}
+            client.get(path, headers=headers)
+            row["requests_ms"][encoding or "identity"] = round(
+                median_ms(lambda: client.get(path, headers=headers), repeat), 3
+            )
+        return row
+
+    def report(self, results):
+        for path, row in results["paths"].items():
+            self.stdout.write(f"\n{path}  {row['identity_bytes']:,} bytes")
+            if row["identity_bytes"] < settings.PAGES_COMPRESS_MIN_SIZE:
+                self.stdout.write(f"  (under PAGES_COMPRESS_MIN_SIZE={settings.PAGES_COMPRESS_MIN_SIZE}: sent as is)")
+            self.stdout.write(f"  {'encoding':<9} {'level':>5} {'bytes':>10} {'saved':>7} {'compress ms':>12} "
+                              f"{'decompress ms':>14}")
+            for level in row["levels"]:
+                marker = "".join(
+                    mark for mark, levels in (("*", settings.PAGES_COMPRESS_LEVELS),
+                                              ("+", settings.PAGES_COMPRESS_UNCACHED_LEVELS))
+                    if levels.get(level["encoding"]) == level["level"]
+                )
+                self.stdout.write(
+                    f"  {level['encoding']:<9} {level['level']:>5} {level['bytes']:>10,} {level['saved']:>7.1%} "
+                    f"{level['compress_ms']:>12.3f} {level['decompress_ms']:>14.3f} {marker}".rstrip()
+                )
+            timings = ", ".join(f"{name} {ms:.2f}ms" for name, ms in row["requests_ms"].items())
+            self.stdout.write(f"  warm requests: {timings}")
+        self.stdout.write("\n* cached responses' level (PAGES_COMPRESS_LEVELS), + uncached ones' "
+                          "(PAGES_COMPRESS_UNCACHED_LEVELS)")
@@ -0,0 +1,120 @@
+import io
+import json
+import statistics
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.http import QueryDict
+from django.test import Client, override_settings
+from django.utils import timezone
+
+from pages.labels import label_condition, label_key, split_labels
+from pages.models import Project
+
+from .seed_load_data import WORDS
+
+PAGE = 12
+SCENARIOS = {
+    # name -> query string; the seeded tags and tools are drawn from WORDS
+    "one tag": f"tag={WORDS[0]}",
+    "tag and tool": f"tag={WORDS[0]}&tool={WORDS[1]}",
+    "two tags, any": f"tag={WORDS[0]},{WORDS[2]}&match=any",
+    "unknown tag": "tag=nothing-uses-this",
+}
+
+
+def median_ms(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def scan(params):
+    """
+    The only way before the label tables: ``LIKE`` over the strings, then
+    splitting every candidate in Python to drop partial-word matches.
+    Returns the matching ids in list order.
+    """
+    match_any = params.get("match") == "any"
+    requested = [
+        (field, label_key(value))
+        for param, field in (("tag", "tags"), ("tool", "tools"))
+        for value in params.get(param, "").split(",") if value
+    ]
+    queryset = Project.objects.order_by(*Project._meta.ordering, "-id")
+    if not match_any:
+        for field, key in requested:
+            queryset = queryset.filter(**{f"{field}__icontains": key})
+    ids = []
+    for row in queryset.values("id", "tags", "tools").iterator():
+        found = [key in split_labels(row[field]) for field, key in requested]
+        if any(found) if match_any else all(found):
+            ids.append(row["id"])
+    return ids
+
+
+class Command(BaseCommand):
+    help = (
+        "Time ?tag=/?tool= filtering over a large seeded project table (rolled back): the label "
+        "tables against LIKE plus splitting the strings."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--projects", type=int, default=100_000)
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--output", default="bench-project-labels-results.json", help="Where to write the JSON results.")
+
+    def handle(self, *args, **options):
+        repeat = options["repeat"]
+        results = {"started": timezone.now().isoformat(), "projects": options["projects"], "scenarios": {}}
+        # nothing cached, so every request runs its queries
+        with override_settings(PAGES_CACHE_ENABLED=False), transaction.atomic():
+            start = time.perf_counter()
+            call_command(
+                "seed_load_data", "--projects", str(options["projects"]), "--messages", "0", "--revisions", "1",
+                "--items", "1", stdout=io.StringIO(),
+            )
+            results["seed_s"] = round(time.perf_counter() - start, 1)
+            client = Client(headers={"accept": "application/json"})
+            for name, query in SCENARIOS.items():
+                params = QueryDict(query)
+                queryset = Project.objects.filter(label_condition(params)).order_by(*Project._meta.ordering, "-id")
+                expected = scan(params)
+                matched = list(queryset.values_list("id", flat=True))
+                if matched != expected:
+                    self.stderr.write(f"{name}: the label tables and the scan disagree")
+                results["scenarios"][name] = {
+                    "query": query,
+                    "matches": len(expected),
+                    "scan_ms": round(median_ms(lambda: scan(params)[:PAGE], repeat), 2),
+                    "labels_ms": round(median_ms(
+                        lambda: (queryset.count(), list(queryset.values_list("id", flat=True)[:PAGE])), repeat,
+                    ), 2),
+                    "request_ms": round(median_ms(
+                        lambda: client.get(f"/api/pages/projects/?{query}&page_size={PAGE}"), repeat,
+                    ), 2),
+                }
+            transaction.set_rollback(True)
+
+        self.report(results)
+        Path(options["output"]).write_text(json.dumps(results, indent=2))
+        self.stdout.write(f"Results written to {options['output']}")
+
+    def report(self, results):
+        self.stdout.write(
+            f"\n{results['projects']:,} projects on {settings.DATABASES['default']['ENGINE'].rsplit('.', 1)[-1]}\n"
+            f"{'scenario':<16} {'matches':>8} {'LIKE + split':>13} {'labels':>9} {'speedup':>8} {'request':>9}"
+        )
+        for name, row in results["scenarios"].items():
+            self.stdout.write(
+                f"{name:<16} {row['matches']:>8,} {row['scan_ms']:>11.1f}ms {row['labels_ms']:>7.1f}ms "
+                f"{row['scan_ms'] / max(row['labels_ms'], 0.01):>7.1f}x {row['request_ms']:>7.1f}ms"
+            )
+        self.stdout.write("labels: COUNT plus the first page's ids; request: the whole uncached API call")
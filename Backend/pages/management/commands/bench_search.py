@@ -0,0 +1,78 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+
+from pages.models import Project
+from pages.search import search_projects
+
+WORDS = (
+    "django react python shop cart checkout exam student course clinic patient "
+    "booking tracker habit budget planner dashboard api rest graphql chart login "
+    "auth payment stripe upload image gallery blog comment search filter admin"
+).split()
+# a long tail of filler vocabulary so common terms are not in every row
+FILLER = [f"term{i}" for i in range(5000)]
+QUERIES = ["django", "pay", "patient booking", "stripe checkout", "graphq", "nonexistentword"]
+
+
+class Command(BaseCommand):
+    help = "Compare full-text project search against an icontains scan on a synthetic table."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=100_000)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.seed(options["rows"])
+            for text in QUERIES:
+                fts = self.time(lambda: self.page(search_projects(Project.objects.all(), text).order_by("search_rank")),
+                                options["repeat"])
+                naive = self.time(lambda: self.page(self.icontains(text)), options["repeat"])
+                self.stdout.write(
+                    f"{text!r:<20} fts {fts[0]:>8.2f} ms ({fts[1]} hits)   icontains {naive[0]:>8.2f} ms ({naive[1]} hits)"
+                )
+            transaction.set_rollback(True)
+
+    def seed(self, rows):
+        rng = random.Random(0)
+        start = time.perf_counter()
+        Project.objects.bulk_create(
+            (
+                Project(
+                    title=" ".join(rng.choices(WORDS, k=3)).title(),
+                    slug=f"bench-{i}",
+                    description=" ".join(rng.choices(WORDS, k=4) + rng.choices(FILLER, k=36)),
+                    tools=", ".join(rng.choices(WORDS, k=3)),
+                    tags=", ".join(rng.choices(WORDS, k=2)),
+                )
+                for i in range(rows)
+            ),
+            batch_size=2000,
+        )
+        self.stdout.write(f"seeded {rows} projects (index kept in sync) in {time.perf_counter() - start:.1f}s")
+
+    def icontains(self, text):
+        qs = Project.objects.all()
+        for term in text.split():
+            qs = qs.filter(
+                Q(title__icontains=term) | Q(description__icontains=term)
+                | Q(tools__icontains=term) | Q(tags__icontains=term)
+            )
+        return qs
+
+    def page(self, qs):
+        # what the list endpoint does: a count plus the first page
+        return qs.count(), list(qs[:3])
+
+    def time(self, fn, repeat):
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            count, _ = fn()
+            samples.append((time.perf_counter() - start) * 1000)
+        return statistics.median(samples), count
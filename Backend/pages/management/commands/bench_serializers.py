@@ -0,0 +1,78 @@
+import gc
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from pages.models import Project
+from pages.serializers import ProjectRowSerializer, ProjectSerializer
+
+RENDITIONS = {
+    "source": "projects/bench.png", "width": 1600, "height": 900,
+    "webp": {str(w): f"derivatives/be/bench-{w}.webp" for w in (320, 640, 960, 1280, 1600)},
+}
+
+
+class Command(BaseCommand):
+    help = "Rows/sec of ProjectSerializer against the values() fast path, fetch and JSON rendering included."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", default="10,1000,100000", help="Comma-separated row counts.")
+        parser.add_argument("--repeat", type=int, default=3)
+
+    def handle(self, *args, **options):
+        sizes = sorted(int(n) for n in options["sizes"].split(","))
+        # a DRF request, so absolute URLs are built the way the API does
+        request = Request(APIRequestFactory().get("/api/pages/projects/", HTTP_HOST="example.com"))
+        with transaction.atomic():
+            seeded = 0
+            for size in sizes:
+                self.seed(seeded, size)
+                seeded = size
+                queryset = Project.objects.order_by("-created", "-id")
+                slow, slow_body = self.time(lambda: self.serializer(queryset, request), options["repeat"])
+                fast, fast_body = self.time(lambda: self.rows(queryset, request), options["repeat"])
+                if slow_body != fast_body:
+                    raise AssertionError(f"fast path output differs at {size} rows")
+                self.stdout.write(
+                    f"{size:>7} rows   serializer {size / slow:>10,.0f} rows/s   "
+                    f"fast path {size / fast:>10,.0f} rows/s   ({slow / fast:.1f}x)"
+                )
+            transaction.set_rollback(True)
+
+    def seed(self, start, stop):
+        Project.objects.bulk_create(
+            (
+                Project(
+                    title=f"Project {i}", slug=f"bench-{i}", description="A description of the project. " * 8,
+                    tools="Python, Django, React", tags="web, api", image=f"projects/bench-{i}.png",
+                    image_renditions=RENDITIONS, image_width=1600, image_height=900, image_color="#336699",
+                    image_lqip="data:image/webp;base64," + "A" * 200, live_url="https://example.com", order=i,
+                )
+                for i in range(start, stop)
+            ),
+            batch_size=2000,
+        )
+
+    def serializer(self, queryset, request):
+        # .all(): a fresh queryset, so repeats do not reuse the previous result cache
+        data = ProjectSerializer(queryset.all(), many=True, context={"request": request}).data
+        return JSONRenderer().render(data)
+
+    def rows(self, queryset, request):
+        rows = ProjectRowSerializer(request)
+        return JSONRenderer().render([rows.to_representation(row) for row in rows.fetch(queryset)])
+
+    def time(self, fn, repeat):
+        samples = []
+        for _ in range(repeat):
+            # start each sample from the same heap, so one path's garbage is not billed to the other
+            gc.collect()
+            start = time.perf_counter()
+            body = fn()
+            samples.append(time.perf_counter() - start)
+        return statistics.median(samples), body
@@ -0,0 +1,54 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from pages import versioning
+from pages.images import IMAGE_FIELDS, build_renditions
+
+
+class Command(BaseCommand):
+    help = "Render WebP/AVIF derivatives for every stored image, in a process pool."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count).")
+        parser.add_argument("--force", action="store_true", help="Rebuild rows that already have renditions.")
+
+    def handle(self, *args, **options):
+        # source name -> [(model, pk, field)], so shared files render once
+        pending = {}
+        for label, fields in IMAGE_FIELDS.items():
+            model = apps.get_model(label)
+            for field in fields:
+                rows = model.objects.exclude(**{field: ""}).exclude(**{f"{field}__isnull": True})
+                for pk, name, renditions in rows.values_list("pk", field, f"{field}_renditions"):
+                    if options["force"] or (renditions or {}).get("source") != name:
+                        pending.setdefault(name, []).append((model, pk, field))
+
+        if not pending:
+            self.stdout.write("Nothing to do.")
+            return
+
+        # children must not inherit open database connections
+        connections.close_all()
+        done = failed = 0
+        touched = set()
+        with ProcessPoolExecutor(max_workers=options["workers"]) as pool:
+            futures = {pool.submit(build_renditions, name): name for name in pending}
+            for future in as_completed(futures):
+                name = futures[future]
+                try:
+                    renditions = future.result()
+                except Exception as exc:
+                    failed += 1
+                    self.stderr.write(f"{name}: {exc}")
+                    continue
+                for model, pk, field in pending[name]:
+                    model.objects.filter(pk=pk, **{field: name}).update(**{f"{field}_renditions": renditions})
+                    touched.add(model)
+                done += 1
+                self.stdout.write(f"{name}: {sum(len(v) for k, v in renditions.items() if isinstance(v, dict))} renditions")
+
+        versioning.bump(*touched)
+        self.stdout.write(f"Built derivatives for {done} images, {failed} failed.")
@@ -0,0 +1,136 @@
+import os
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files import File
+from django.core.management.base import BaseCommand
+from django.db import models, transaction
+
+from pages import versioning
+from pages.media import DOWNLOAD_FIELDS
+from pages.storage import BLOB_DIR, ContentAddressedStorage, blob_name, content_digest, is_blob
+
+# not uploads: derivatives, precompressed copies and the blobs themselves
+SKIPPED_DIRS = {BLOB_DIR, "derivatives", "compressed"}
+
+
+def content_addressed_fields():
+    """``(model, field)`` for every file field stored by ``ContentAddressedStorage``."""
+    for model in apps.get_app_config("pages").get_models():
+        for field in model._meta.get_fields():
+            if isinstance(field, models.FileField) and isinstance(field.storage, ContentAddressedStorage):
+                yield model, field
+
+
+class Command(BaseCommand):
+    help = (
+        "Move media referenced by the pages models into the content-addressed storage: one blob "
+        "per distinct content, with the database pointed at it."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Report what would change; write nothing.")
+        parser.add_argument(
+            "--delete-originals", action="store_true",
+            help="Delete the converted files once the database points at their blobs.",
+        )
+        parser.add_argument(
+            "--delete-unreferenced", action="store_true",
+            help="Also delete uploads no row uses, e.g. the leftovers of re-uploads.",
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options["dry_run"]
+        converted = {}  # old name -> blob name
+        missing, blobs, saved = [], set(), 0
+        with transaction.atomic():
+            for model, field in content_addressed_fields():
+                storage = field.storage
+                names = (
+                    model.objects.exclude(**{field.name: ""}).exclude(**{f"{field.name}__isnull": True})
+                    .values_list(field.name, flat=True).distinct()
+                )
+                changed = False
+                for name in names:
+                    if is_blob(name):
+                        continue
+                    if name not in converted:
+                        if not storage.exists(name):
+                            missing.append(f"{model._meta.label}.{field.name}: {name}")
+                            continue
+                        with storage.open(name, "rb") as fh:
+                            if dry_run:
+                                digest, size = content_digest(fh)
+                                blob = blob_name(digest, name)
+                            else:
+                                blob = storage.save(name, fh)
+                                size = storage.size(blob)
+                        converted[name] = blob
+                        if blob in blobs:
+                            saved += size
+                        blobs.add(blob)
+                    self.repoint(model, field.name, name, converted[name], dry_run)
+                    changed = True
+                if changed and not dry_run:
+                    # update() sends no signals
+                    versioning.bump(model)
+            if dry_run:
+                transaction.set_rollback(True)
+
+        for name, blob in converted.items():
+            self.stdout.write(f"{name} -> {blob}")
+        for line in missing:
+            self.stderr.write(f"missing file, left as is: {line}")
+        root = Path(settings.MEDIA_ROOT)
+        unreferenced = self.unreferenced(set(converted))
+        duplicates = 0
+        for name in unreferenced:
+            with open(root / name, "rb") as fh:
+                blob = blob_name(content_digest(File(fh))[0], name)
+            if blob in blobs:
+                duplicates += 1
+                self.stdout.write(f"not referenced by any row: {name} (same content as {blob})")
+            else:
+                self.stdout.write(f"not referenced by any row: {name}")
+        if not dry_run:
+            deleted = (list(converted) if options["delete_originals"] else []) + (
+                unreferenced if options["delete_unreferenced"] else []
+            )
+            for name in deleted:
+                os.remove(root / name)
+        self.stdout.write(
+            f"{'Would convert' if dry_run else 'Converted'} {len(converted)} files into {len(blobs)} blobs "
+            f"({saved:,} bytes of duplicates); {len(missing)} missing, {len(unreferenced)} not referenced "
+            f"({duplicates} of them duplicates of a blob)."
+        )
+
+    def repoint(self, model, field, old, new, dry_run):
+        """Point every row using ``old`` at ``new``, renditions' ``source`` and download name included."""
+        if dry_run:
+            return
+        download = DOWNLOAD_FIELDS.get(model._meta.label_lower, {}).get(field)
+        if download:
+            model.objects.filter(**{field: old, download: ""}).update(**{download: os.path.basename(old)[:255]})
+        model.objects.filter(**{field: old}).update(**{field: new})
+        renditions = f"{field}_renditions"
+        if any(f.name == renditions for f in model._meta.get_fields()):
+            for pk, value in model.objects.filter(**{field: new}).values_list("pk", renditions):
+                if value and value.get("source") == old:
+                    # the derivatives are named after the content, so they stay valid
+                    model.objects.filter(pk=pk).update(**{renditions: {**value, "source": new}})
+
+    def unreferenced(self, converted):
+        """Uploads under ``MEDIA_ROOT`` that no row uses (left alone)."""
+        root = Path(settings.MEDIA_ROOT)
+        if not root.is_dir():
+            return []
+        referenced = set(converted)
+        for model, field in content_addressed_fields():
+            referenced.update(model.objects.values_list(field.name, flat=True))
+        found = []
+        for path in sorted(root.rglob("*")):
+            name = path.relative_to(root).as_posix()
+            if path.is_file() and name.split("/", 1)[0] not in SKIPPED_DIRS and name not in referenced:
+                found.append(name)
+        return found
@@ -0,0 +1,166 @@
+import gzip
+import hashlib
+import json
+import os
+from pathlib import Path
+from urllib.parse import parse_qsl, quote, urlencode, urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from pages.models import Project
+from portfolio_project.testing import discover_routes
+
+try:
+    import brotli
+except ImportError:  # optional; only .gz variants are written without it
+    brotli = None
+
+MANIFEST = "manifest.json"
+INDEX = "index.json"
+# pagination links, rewritten to point into the snapshot
+LINKS = ("next", "previous")
+
+
+def snapshot_roots():
+    """
+    Every URL to export before pagination is followed: the routes of
+    ``pages.urls`` with one detail URL per object, and one list URL per
+    project category.
+    """
+    urls = [url for _, url in discover_routes(apps=["pages"], every_object=True)]
+    categories = {key for key, _ in Project.CATEGORY_CHOICES}
+    categories.update(Project.objects.values_list("category", flat=True).distinct())
+    projects = reverse("projects-list")
+    urls.extend(f"{projects}?{urlencode({'category': c})}" for c in sorted(categories) if c)
+    return urls
+
+
+def file_for(url):
+    """
+    Map a request URL to its place in the tree. A static host ignores query
+    strings, so the parameters become directories, the page number last:
+    ``/api/pages/projects/`` is ``api/pages/projects/index.json`` and
+    ``?category=web&page=2`` is ``api/pages/projects/category/web/page/2/index.json``.
+    """
+    parts = urlsplit(url)
+    segments = [parts.path.strip("/")]
+    for key, value in sorted(parse_qsl(parts.query), key=lambda item: (item[0] == "page", item[0])):
+        segments += [quote(key, safe=""), quote(value, safe="")]
+    return "/".join([segment for segment in segments if segment] + [INDEX])
+
+
+def request_path(url):
+    """``/path/?query`` of an absolute URL from a response."""
+    parts = urlsplit(url)
+    return f"{parts.path}?{parts.query}" if parts.query else parts.path
+
+
+def write_atomic(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+class Command(BaseCommand):
+    help = (
+        "Write every pages API response to a directory tree with .gz/.br variants and a manifest, "
+        "for serving from a static host. Query strings become directories (projects/?page=2 is "
+        "projects/page/2/index.json) and next/previous links point at those files, so the host needs "
+        "no rewrite rules. Only files whose content changed are rewritten."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("output", help="Directory to write the snapshot to.")
+        parser.add_argument(
+            "--base-url", default="http://localhost:8000",
+            help="Public origin of the API; absolute URLs in the JSON (media, next links) use it.",
+        )
+
+    def handle(self, *args, **options):
+        origin = urlsplit(options["base_url"])
+        if origin.scheme not in ("http", "https") or not origin.netloc:
+            raise CommandError("--base-url must look like https://api.example.com")
+        root = Path(options["output"])
+        manifest_path = root / MANIFEST
+        try:
+            previous = json.loads(manifest_path.read_text())["files"]
+        except (FileNotFoundError, KeyError, ValueError):
+            previous = {}
+
+        base_url = f"{origin.scheme}://{origin.netloc}"
+        client = Client(HTTP_HOST=origin.netloc)
+        secure = origin.scheme == "https"
+        files = {}
+        written = 0
+        # the snapshot must reflect the database, not the response cache
+        with override_settings(PAGES_CACHE_ENABLED=False):
+            queue = snapshot_roots()
+            seen = set()
+            while queue:
+                url = queue.pop(0)
+                if url in seen:
+                    continue
+                seen.add(url)
+                response = client.get(url, secure=secure)
+                if response.status_code != 200:
+                    raise CommandError(f"{url} returned {response.status_code}")
+                body = response.content
+                # singleton list routes answer an empty body when there is no row
+                data = json.loads(body) if body else None
+                pages = []
+                if isinstance(data, dict) and any(data.get(link) for link in LINKS):
+                    for link in LINKS:
+                        if data.get(link):
+                            pages.append(request_path(data[link]))
+                            data[link] = f"{base_url}/{file_for(pages[-1])}"
+                    body = JSONRenderer().render(data)
+                entry = {"path": file_for(url), "sha256": hashlib.sha256(body).hexdigest(), "bytes": len(body)}
+                old = previous.get(url)
+                if old and old["sha256"] == entry["sha256"] and (root / entry["path"]).exists():
+                    entry = old
+                else:
+                    entry.update(self.write(root, entry["path"], body))
+                    written += 1
+                files[url] = entry
+
+                # follow pagination so every page of a list is exported
+                queue.extend(pages)
+
+        removed = 0
+        for url, entry in previous.items():
+            if url in files:
+                continue
+            for suffix in ("", ".gz", ".br"):
+                try:
+                    (root / (entry["path"] + suffix)).unlink()
+                except FileNotFoundError:
+                    continue
+            removed += 1
+
+        manifest = {
+            "generated": timezone.now().isoformat(),
+            "base_url": options["base_url"],
+            "files": files,
+        }
+        write_atomic(manifest_path, json.dumps(manifest, indent=2, sort_keys=True).encode())
+        self.stdout.write(
+            f"{len(files)} responses: {written} written, {len(files) - written} unchanged, {removed} removed."
+        )
+
+    def write(self, root, name, body):
+        path = root / name
+        write_atomic(path, body)
+        # mtime=0 keeps the gzip bytes stable between runs
+        gz = gzip.compress(body, compresslevel=9, mtime=0)
+        write_atomic(path.with_name(path.name + ".gz"), gz)
+        sizes = {"gzip": len(gz)}
+        if brotli is not None:
+            br = brotli.compress(body, quality=11)
+            write_atomic(path.with_name(path.name + ".br"), br)
+            sizes["br"] = len(br)
+        return sizes
@@ -0,0 +1,344 @@
+import http.client
+import json
+import os
+import platform
+import random
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from importlib.util import find_spec
+from pathlib import Path
+from urllib.parse import urlencode, urlsplit
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from pages.models import Project
+
+CATEGORIES = [key for key, _ in Project.CATEGORY_CHOICES]
+# what the SPA requests on each route; every page also mounts the Navbar,
+# which loads site settings
+JOURNEYS = {
+    "home": 30,
+    "work": 30,
+    "project": 20,
+    "about": 8,
+    "resume": 8,
+    "contact": 4,
+}
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def server_env(database, **extra):
+    """Environment for a server under test on the SQLite file ``database``."""
+    return {
+        **os.environ,
+        "DATABASE_URL": f"sqlite:///{database}",
+        "DEBUG": "False",
+        # fully offline: nothing leaves the machine
+        "EMAIL_BACKEND": "django.core.mail.backends.console.EmailBackend",
+        "DJANGO_SETTINGS_MODULE": os.environ.get("DJANGO_SETTINGS_MODULE", "portfolio_project.settings"),
+        **extra,
+    }
+
+
+def seed_database(database, projects, messages, stdout):
+    """Migrate and seed ``database`` unless it already exists."""
+    if database.exists():
+        return
+    env = server_env(database)
+    manage = [sys.executable, str(Path(settings.BASE_DIR) / "manage.py")]
+    stdout.write(f"Seeding {database} ...")
+    subprocess.run([*manage, "migrate", "-v0"], env=env, check=True)
+    subprocess.run(
+        [*manage, "seed_load_data", "--projects", str(projects), "--messages", str(messages)],
+        env=env, check=True,
+    )
+
+
+def start_gunicorn(app, env, workers, extra_args, log_path):
+    """Run gunicorn on a free port; returns ``(base_url, process)`` once it answers."""
+    if find_spec("gunicorn") is None:
+        raise CommandError("gunicorn is not installed (pip install -r requirements.txt), or pass --url.")
+    port = free_port()
+    command = [
+        sys.executable, "-m", "gunicorn", app,
+        "--bind", f"127.0.0.1:{port}", "--workers", str(workers),
+        "--log-level", "warning", *extra_args,
+    ]
+    log = open(log_path, "wb")
+    server = subprocess.Popen(command, cwd=settings.BASE_DIR, env=env, stdout=log, stderr=subprocess.STDOUT)
+    base_url = f"http://127.0.0.1:{port}/api"
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise CommandError(f"gunicorn exited with {server.returncode}; see {log.name}")
+        try:
+            status, _ = Target(base_url).request("GET", "/pages/site-settings/")
+            if status == 200:
+                return base_url, server
+        except OSError:
+            pass
+        time.sleep(0.2)
+    stop_server(server)
+    raise CommandError("gunicorn did not answer within 30s")
+
+
+def stop_server(server):
+    server.terminate()
+    try:
+        server.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        server.kill()
+
+
+class Target:
+    """One HTTP connection to the server under test, reused by a client thread."""
+
+    def __init__(self, base_url):
+        parts = urlsplit(base_url)
+        self.host = parts.netloc
+        self.prefix = parts.path.rstrip("/")
+        self.connection = None
+
+    def request(self, method, path, body=None):
+        if self.connection is None:
+            self.connection = http.client.HTTPConnection(self.host, timeout=30)
+        headers = {"Accept": "application/json"}
+        payload = None
+        if body is not None:
+            payload = json.dumps(body).encode()
+            headers["Content-Type"] = "application/json"
+        try:
+            self.connection.request(method, self.prefix + path, payload, headers)
+            response = self.connection.getresponse()
+            data = response.read()
+        except (OSError, http.client.HTTPException):
+            self.connection.close()
+            self.connection = None
+            raise
+        # http.client reconnects by itself after a "Connection: close" response
+        return response.status, data
+
+
+class Frontend:
+    """The request mix of the React app, one journey at a time."""
+
+    def __init__(self, target, rng, catalogue):
+        self.target = target
+        self.rng = rng
+        self.catalogue = catalogue
+
+    def journey(self, name, record):
+        record("site-settings", "GET", "/pages/site-settings/")
+        getattr(self, name)(record)
+
+    def home(self, record):
+        record("bundle", "GET", "/pages/bundle/?" + urlencode({"sections": "site_settings,home,resume"}))
+
+    def about(self, record):
+        record("about", "GET", "/pages/about/")
+
+    def resume(self, record):
+        record("resume", "GET", "/pages/resume/")
+
+    def work(self, record):
+        # the grid, maybe narrowed to a category, then a few pages forward
+        category = self.rng.choice(["", "", *CATEGORIES])
+        pages = self.catalogue["pages"].get(category, 1)
+        depth = min(pages, 1 + int(self.rng.expovariate(0.8)))
+        for page in range(1, depth + 1):
+            params = {"page": page}
+            if category:
+                params["category"] = category
+            record("projects-category" if category else "projects", "GET", "/pages/projects/?" + urlencode(params))
+
+    def project(self, record):
+        slug = self.rng.choice(self.catalogue["slugs"])
+        record("project-detail", "GET", f"/pages/projects/{slug}/")
+
+    def contact(self, record):
+        n = self.rng.randrange(1_000_000)
+        record("contact-post", "POST", "/contact/messages/", {
+            "name": f"Load {n}", "email": f"load{n}@example.com", "subject": "Hello", "message": "Load test " * 20,
+        })
+
+
+class Command(BaseCommand):
+    help = (
+        "Replay the frontend's request mix against a local gunicorn (or --url) and report "
+        "p50/p95/p99 latency and throughput per endpoint, as text and JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", help="Test an already running server, e.g. http://127.0.0.1:8000/api.")
+        parser.add_argument("--database", help="SQLite file for the launched server (default: a temporary one).")
+        parser.add_argument("--projects", type=int, default=2000, help="Seeded projects.")
+        parser.add_argument("--messages", type=int, default=20_000, help="Seeded contact messages.")
+        parser.add_argument("--workers", type=int, default=(os.cpu_count() or 2) + 1, help="gunicorn workers.")
+        parser.add_argument("--gunicorn-args", default="", help="Extra gunicorn arguments.")
+        parser.add_argument("--concurrency", type=int, default=8, help="Client threads.")
+        parser.add_argument("--duration", type=float, default=30.0, help="Seconds to measure.")
+        parser.add_argument("--warmup", type=float, default=3.0, help="Seconds to run before measuring.")
+        parser.add_argument("--seed", type=int, default=0, help="Random seed for the request mix.")
+        parser.add_argument("--output", default="loadtest-results.json", help="Where to write the JSON results.")
+
+    def handle(self, *args, **options):
+        server = None
+        workdir = None
+        try:
+            if options["url"]:
+                base_url = options["url"].rstrip("/")
+            else:
+                workdir = tempfile.mkdtemp(prefix="loadtest-")
+                base_url, server = self.launch(options, workdir)
+            catalogue = self.discover(base_url)
+            self.stdout.write(
+                f"{len(catalogue['slugs'])} project slugs, {catalogue['pages'].get('', 1)} list pages; "
+                f"{options['concurrency']} clients for {options['duration']:.0f}s"
+            )
+            if options["warmup"]:
+                self.drive(base_url, catalogue, options, options["warmup"])
+            samples, elapsed = self.drive(base_url, catalogue, options, options["duration"])
+        finally:
+            if server is not None:
+                stop_server(server)
+            if workdir:
+                shutil.rmtree(workdir, ignore_errors=True)
+
+        results = self.summarize(samples, elapsed, options, base_url)
+        self.report(results)
+        Path(options["output"]).write_text(json.dumps(results, indent=2))
+        self.stdout.write(f"Results written to {options['output']}")
+
+    # server
+
+    def launch(self, options, workdir):
+        database = Path(options["database"] or Path(workdir) / "loadtest.sqlite3").resolve()
+        seed_database(database, options["projects"], options["messages"], self.stdout)
+        return start_gunicorn(
+            "portfolio_project.wsgi:application", server_env(database), options["workers"],
+            options["gunicorn_args"].split(), Path(workdir) / "gunicorn.log",
+        )
+
+    def discover(self, base_url):
+        """Slugs and page counts, read through the API so any server can be targeted."""
+        target = Target(base_url)
+        page_size = settings.REST_FRAMEWORK["PAGE_SIZE"]
+        pages = {}
+        for category in ["", *CATEGORIES]:
+            query = urlencode({"category": category} if category else {})
+            status, body = target.request("GET", f"/pages/projects/?{query}")
+            if status != 200:
+                raise CommandError(f"project list returned {status}")
+            pages[category] = max(1, -(-json.loads(body)["count"] // page_size))
+
+        slugs = []
+        path = "/pages/projects/?pagination=cursor&page_size=100"
+        while path and len(slugs) < 5000:
+            _, body = target.request("GET", path)
+            data = json.loads(body)
+            slugs.extend(p["slug"] for p in data["results"])
+            nxt = data["next"] and urlsplit(data["next"])
+            path = nxt and nxt.path[len(urlsplit(base_url).path):] + "?" + nxt.query
+        if not slugs:
+            raise CommandError("The target has no projects; seed it with seed_load_data.")
+        return {"pages": pages, "slugs": slugs}
+
+    # load
+
+    def drive(self, base_url, catalogue, options, duration):
+        samples = defaultdict(list)  # endpoint -> [(seconds, status)]
+        lock = threading.Lock()
+        names, weights = zip(*JOURNEYS.items())
+        stop = time.monotonic() + duration
+
+        def client(index):
+            rng = random.Random(options["seed"] * 1000 + index)
+            target = Target(base_url)
+            frontend = Frontend(target, rng, catalogue)
+            local = defaultdict(list)
+
+            def record(endpoint, method, path, body=None):
+                start = time.perf_counter()
+                try:
+                    status, _ = target.request(method, path, body)
+                except (OSError, http.client.HTTPException):
+                    status = 0
+                local[endpoint].append((time.perf_counter() - start, status))
+
+            while time.monotonic() < stop:
+                frontend.journey(rng.choices(names, weights)[0], record)
+            with lock:
+                for endpoint, values in local.items():
+                    samples[endpoint].extend(values)
+
+        threads = [threading.Thread(target=client, args=(i,)) for i in range(options["concurrency"])]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return samples, time.perf_counter() - start
+
+    def summarize(self, samples, elapsed, options, base_url):
+        endpoints = {}
+        for endpoint, values in sorted(samples.items()):
+            latencies = [seconds * 1000 for seconds, _ in values]
+            errors = sum(1 for _, status in values if not 200 <= status < 400)
+            endpoints[endpoint] = {
+                "requests": len(values),
+                "errors": errors,
+                "rps": round(len(values) / elapsed, 2),
+                "p50_ms": round(statistics.median(latencies), 2),
+                "p95_ms": round(percentile(latencies, 95), 2),
+                "p99_ms": round(percentile(latencies, 99), 2),
+                "max_ms": round(max(latencies), 2),
+            }
+        everything = [seconds * 1000 for values in samples.values() for seconds, _ in values]
+        return {
+            "started": timezone.now().isoformat(),
+            "target": base_url,
+            "config": {
+                key: options[key] for key in ("workers", "concurrency", "duration", "warmup", "seed", "projects", "messages")
+            },
+            "python": platform.python_version(),
+            "elapsed_s": round(elapsed, 2),
+            "total": {
+                "requests": len(everything),
+                "errors": sum(e["errors"] for e in endpoints.values()),
+                "rps": round(len(everything) / elapsed, 2),
+                "p50_ms": round(statistics.median(everything), 2) if everything else None,
+                "p95_ms": round(percentile(everything, 95), 2) if everything else None,
+                "p99_ms": round(percentile(everything, 99), 2) if everything else None,
+            },
+            "endpoints": endpoints,
+        }
+
+    def report(self, results):
+        self.stdout.write(
+            f"{'endpoint':<20} {'requests':>9} {'errors':>7} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}"
+        )
+        rows = [*results["endpoints"].items(), ("TOTAL", results["total"])]
+        for name, row in rows:
+            self.stdout.write(
+                f"{name:<20} {row['requests']:>9} {row['errors']:>7} {row['rps']:>9.1f} "
+                f"{row['p50_ms']:>9.2f} {row['p95_ms']:>9.2f} {row['p99_ms']:>9.2f}"
+            )
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import Client, override_settings
+
+from portfolio_project.testing import discover_routes, measure, seed
+
+
+class Command(BaseCommand):
+    help = "Report the number of SQL queries and time spent per API endpoint."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--seed", action="store_true",
+            help="Seed a realistic data volume inside a transaction that is rolled back afterwards.",
+        )
+        parser.add_argument("--verbose-sql", action="store_true", help="Print every query.")
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            if options["seed"]:
+                seed()
+            self.report(options["verbose_sql"])
+            transaction.set_rollback(True)
+
+    @override_settings(PAGES_CACHE_ENABLED=False)
+    def report(self, verbose_sql):
+        client = Client()
+        self.stdout.write(f"{'route':<28} {'status':>6} {'queries':>8} {'ms':>9}  url")
+        for name, url in discover_routes():
+            response, queries, elapsed = measure(client, url)
+            self.stdout.write(f"{name:<28} {response.status_code:>6} {len(queries):>8} {elapsed * 1000:>9.1f}  {url}")
+            if verbose_sql:
+                for query in queries:
+                    self.stdout.write(f"    {query['sql']}")
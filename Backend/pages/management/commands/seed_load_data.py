@@ -0,0 +1,140 @@
+import random
+import time
+
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from contact.models import ContactMessage
+from pages import labels, versioning
+from pages.models import (
+    AboutPage, ContentVersion, Education, Experience, HomePage, Project, ResumePage, Role, SiteSettings, Skill,
+)
+
+WORDS = (
+    "django react python shop cart checkout exam student course clinic patient booking tracker "
+    "habit budget planner dashboard api rest chart login auth payment upload gallery blog"
+).split()
+WIDTHS = (320, 640, 960, 1280)
+
+
+def project_renditions(i):
+    return {
+        "source": f"projects/load-{i}.png", "width": 1280, "height": 720,
+        "webp": {str(w): f"derivatives/lo/load-{i}-{w}.webp" for w in WIDTHS},
+    }
+
+
+def through_rows(field, owners, targets):
+    """Rows linking every owner to every target through ``field``'s table."""
+    through = field.through
+    source = field.field.m2m_field_name()
+    target = field.field.m2m_reverse_field_name()
+    return [through(**{f"{source}_id": o.pk, f"{target}_id": t.pk}) for o in owners for t in targets]
+
+
+class Command(BaseCommand):
+    help = "Bulk-insert a large synthetic dataset: projects, contact messages and populated pages."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--projects", type=int, default=10_000)
+        parser.add_argument("--messages", type=int, default=50_000)
+        parser.add_argument("--items", type=int, default=30, help="Roles, skills, education and experience rows.")
+        parser.add_argument("--revisions", type=int, default=3, help="Home, about and resume pages.")
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--clear", action="store_true", help="Delete existing content first.")
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        rng = random.Random(0)
+        batch = options["batch_size"]
+        with transaction.atomic():
+            if options["clear"]:
+                for model in (ContactMessage, Project, HomePage, AboutPage, ResumePage, SiteSettings,
+                              Role, Skill, Education, Experience):
+                    model.objects.all().delete()
+            self.seed_projects(options["projects"], rng, batch)
+            self.seed_pages(options["items"], options["revisions"], batch)
+            self.seed_messages(options["messages"], rng, batch)
+            # bulk_create sends no signals, so cached responses must be invalidated here
+            versioning.bump(*(m for m in apps.get_app_config("pages").get_models() if m is not ContentVersion))
+        self.stdout.write(
+            f"Seeded {options['projects']} projects, {options['messages']} messages and "
+            f"{options['revisions']} page revisions in {time.perf_counter() - start:.1f}s"
+        )
+
+    def seed_projects(self, count, rng, batch):
+        categories = [key for key, _ in Project.CATEGORY_CHOICES]
+        offset = Project.objects.filter(slug__startswith="load-").count()
+        projects = Project.objects.bulk_create(
+            (
+                Project(
+                    title=" ".join(rng.choices(WORDS, k=3)).title(),
+                    slug=f"load-{i}",
+                    description=" ".join(rng.choices(WORDS, k=60)),
+                    category=categories[i % len(categories)],
+                    tools=", ".join(rng.choices(WORDS, k=3)),
+                    tags=", ".join(rng.choices(WORDS, k=2)),
+                    image=f"projects/load-{i}.png",
+                    image_renditions=project_renditions(i),
+                    image_width=1280,
+                    image_height=720,
+                    image_color="#336699",
+                    image_lqip="data:image/webp;base64," + "A" * 200,
+                    live_url="https://example.com",
+                    github_url="https://github.com/example/project",
+                    featured=i % 20 == 0,
+                    order=i % 50,
+                )
+                for i in range(offset, offset + count)
+            ),
+            batch_size=batch,
+        )
+        # bulk_create skips the post_save signal that fills the tag and tool tables
+        labels.sync_labels(projects)
+
+    def seed_pages(self, items, revisions, batch):
+        roles = Role.objects.bulk_create([Role(name=f"Role {i}", order=i) for i in range(items)])
+        skills = Skill.objects.bulk_create([Skill(name=f"Skill {i}", percent=i % 100, order=i) for i in range(items)])
+        education = Education.objects.bulk_create(
+            [Education(title=f"Degree {i}", institution="University", description="Studies. " * 20, order=i)
+             for i in range(items)]
+        )
+        experience = Experience.objects.bulk_create(
+            [Experience(title=f"Job {i}", company="Company", bullets="Built things\nShipped things\nFixed things",
+                        order=i) for i in range(items)]
+        )
+        if not SiteSettings.objects.exists():
+            SiteSettings.objects.bulk_create([SiteSettings(brand_name="Portfolio", logo="site/logo.webp")])
+
+        homes = HomePage.objects.bulk_create(
+            [HomePage(full_name=f"Jane Doe {i}", intro="Hello. " * 30, profile_image="profiles/user.webp")
+             for i in range(revisions)]
+        )
+        abouts = AboutPage.objects.bulk_create(
+            [AboutPage(title=f"About {i}", intro="About me. " * 50, profile_image="about/profile/me.webp",
+                       email="me@example.com") for i in range(revisions)]
+        )
+        resumes = ResumePage.objects.bulk_create(
+            [ResumePage(title=f"Resume {i}", intro="Resume. " * 20, resume_file="resumes/resume.pdf")
+             for i in range(revisions)]
+        )
+        for field, owners, targets in (
+            (HomePage.roles, homes, roles),
+            (AboutPage.skills, abouts, skills),
+            (ResumePage.education, resumes, education),
+            (ResumePage.experience, resumes, experience),
+        ):
+            field.through.objects.bulk_create(through_rows(field, owners, targets), batch_size=batch)
+
+    def seed_messages(self, count, rng, batch):
+        ContactMessage.objects.bulk_create(
+            (
+                ContactMessage(
+                    name=f"Visitor {i}", email=f"visitor{i}@example.com", subject="Hello",
+                    message=" ".join(rng.choices(WORDS, k=40)),
+                )
+                for i in range(count)
+            ),
+            batch_size=batch,
+        )
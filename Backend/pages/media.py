@@ -0,0 +1,365 @@
+"""
+Media URLs for the API, and the view that serves them.
+
+With ``MEDIA_HASHED_URLS`` and ``MEDIA_SERVE`` (only this view resolves
+them) the URLs carry the first hex digits of the file's SHA-256 before the
+extension (``projects/logo.3f2a9c1b04de.png``).
+A URL then only ever names one content, so the view can serve it as
+``immutable`` for a year; a new upload gets a new URL through the API,
+whose responses are revalidated. Derivatives and the blobs of
+``pages.storage`` are named after a hash already and are used as they are;
+downloads of blobs carry the name they were uploaded as, which each row
+keeps for itself (``DOWNLOAD_FIELDS``) and its URL passes on as
+``?filename=``, since one blob can have been uploaded under many names.
+
+Digests are never computed while serializing: uploads are blobs, hashed
+as they are stored, and older files get theirs when ``dedupe_media``
+moves them into blobs, or when this view first serves them. Until then
+the API gives their plain URL.
+
+The view also answers single-range requests (a resumed or streamed PDF),
+conditional requests and, for compressible types, ``Accept-Encoding`` with
+brotli/gzip forms made once per content and kept under
+``MEDIA_ROOT/compressed/``. File bodies go out as ``FileResponse``, which
+gunicorn sends with ``sendfile()``; behind nginx, ``MEDIA_ACCEL_REDIRECT``
+hands the file (and the ranges) to nginx instead.
+"""
+import hashlib
+import mimetypes
+import os
+import re
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotAllowed
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.encoding import filepath_to_uri
+from django.utils.http import content_disposition_header, http_date, urlencode
+
+from .cache import get_cache
+from .compression import compress, negotiate_encoding
+from .images import file_digest
+from .models import MediaBlob
+from .storage import BLOB_DIR, is_blob
+
+# names made only of these come out of filepath_to_uri() unchanged
+SAFE_NAME = re.compile(r"[A-Za-z0-9_.\-~!*()'/]*")
+
+HASH_LENGTH = 12
+HASHED_NAME = re.compile(rf"^(?P<stem>.+)\.(?P<hash>[0-9a-f]{{{HASH_LENGTH}}})(?P<ext>\.[A-Za-z0-9]+)?$")
+# content-addressed already, see images.build_renditions() and pages.storage
+IMMUTABLE_PREFIXES = ("derivatives/", f"{BLOB_DIR}/")
+COMPRESSED_DIR = "compressed"
+COMPRESSED_SUFFIXES = {"br": "br", "gzip": "gz"}
+COMPRESSIBLE = re.compile(r"^(text/|application/(json|xml|javascript|pdf)$|image/svg\+xml$)|\+(json|xml)$")
+# a compressed form is only sent when it is at most this share of the original
+COMPRESSED_RATIO = 0.9
+# file fields whose downloads are named: field -> the column with its upload name
+DOWNLOAD_FIELDS = {
+    "pages.resumepage": {"resume_file": "resume_file_name"},
+}
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+
+_digests = {}  # path -> (mtime_ns, size, sha256)
+
+
+def media_digest(name, storage=default_storage, compute=True):
+    """
+    SHA-256 of the stored file ``name``, or ``None`` if there is none.
+
+    Digests are kept per process and in the pages cache, keyed on the
+    file's mtime and size, so each file is read once rather than per URL.
+    With ``compute=False`` only a digest known already is returned, and
+    ``None`` instead of reading the file.
+    """
+    try:
+        path = storage.path(name)
+        stat = os.stat(path)
+    except (OSError, SuspiciousFileOperation):
+        return None
+    if is_blob(name):
+        return name.rsplit("/", 1)[1][:64]
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    known = _digests.get(path)
+    if known is not None and known[:2] == stamp:
+        return known[2]
+    key = "media:digest:" + hashlib.sha1(path.encode()).hexdigest()
+    cached = get_cache().get(key)
+    if cached is not None and tuple(cached[:2]) == stamp:
+        digest = cached[2]
+    elif not compute:
+        return None
+    else:
+        digest = file_digest(name, storage)
+        get_cache().set(key, (*stamp, digest), None)
+    _digests[path] = (*stamp, digest)
+    return digest
+
+
+def hashed_name(name, storage=default_storage):
+    """``name`` with its content hash before the extension; as is while the hash is not known."""
+    if name.startswith(IMMUTABLE_PREFIXES):
+        return name
+    digest = media_digest(name, storage, compute=False)
+    if digest is None:
+        return name
+    directory, slash, base = name.rpartition("/")
+    stem, dot, ext = base.rpartition(".")
+    if not dot or not stem:
+        stem, ext = base, ""
+    else:
+        ext = "." + ext
+    return f"{directory}{slash}{stem}.{digest[:HASH_LENGTH]}{ext}"
+
+
+class MediaURLs:
+    """
+    Turns stored file names into the absolute URLs the API returns.
+
+    For the filesystem storage the absolute media base is resolved once and
+    names are appended to it, which gives the same string as
+    ``request.build_absolute_uri(storage.url(name))`` without re-parsing the
+    URL for every file; the names are hashed ones with ``MEDIA_HASHED_URLS``.
+    Other storages go through ``storage.url()``.
+    """
+
+    def __init__(self, request, storage=default_storage):
+        self.request = request
+        self.storage = storage
+        self.prefix = None
+        # blobs and derivatives are hashed by name; other names need the serve view
+        self.hashed = settings.MEDIA_HASHED_URLS and settings.MEDIA_SERVE
+        if isinstance(storage, FileSystemStorage):
+            base = storage.base_url
+            self.prefix = request.build_absolute_uri(base) if request else base
+
+    def __call__(self, file, filename=None):
+        """
+        Absolute URL for a ``FieldFile`` or a stored name; ``None`` if empty.
+        ``filename`` names the download of a blob.
+        """
+        name = getattr(file, "name", file)
+        if not name:
+            return None
+        query = f"?{urlencode({'filename': filename})}" if filename and is_blob(name) else ""
+        if self.prefix is not None:
+            if self.hashed:
+                name = hashed_name(name, self.storage)
+            if not SAFE_NAME.fullmatch(name):
+                name = filepath_to_uri(name)
+            return self.prefix + name.lstrip("/") + query
+        url = self.storage.url(name) + query
+        return self.request.build_absolute_uri(url) if self.request else url
+
+
+def fill_download_names(instance):
+    """Keep the name of new uploads on ``instance`` for their downloads, before it is saved."""
+    for field, column in DOWNLOAD_FIELDS.get(instance._meta.label_lower, {}).items():
+        file = getattr(instance, field)
+        if not file:
+            setattr(instance, column, "")
+        elif not file._committed:
+            setattr(instance, column, os.path.basename(file.name)[:255])
+
+
+def download_name(name, requested):
+    """
+    The name to download blob ``name`` as: ``requested`` (from its URL)
+    with the blob's own extension, so a link cannot pass it off as another
+    type, or else the name the blob was first uploaded as.
+    """
+    requested = os.path.basename((requested or "").replace("\\", "/")).strip()
+    if requested:
+        ext = os.path.splitext(name)[1]
+        stem, requested_ext = os.path.splitext(requested)
+        if requested_ext.lower() != ext.lower():
+            requested = stem + ext
+        return requested[:255]
+    return MediaBlob.objects.filter(name=name).values_list("original_name", flat=True).first()
+
+
+def media_urls(request):
+    """The ``MediaURLs`` for ``request``, created once and kept on it."""
+    if request is None:
+        return MediaURLs(None)
+    urls = getattr(request, "_media_urls", None)
+    if urls is None:
+        urls = request._media_urls = MediaURLs(request)
+    return urls
+
+
+def resolve(path):
+    """``(name, digest, immutable)`` for a requested media path, or ``None``."""
+    match = HASHED_NAME.match(path)
+    name = digest = None
+    if match:
+        name = match["stem"] + (match["ext"] or "")
+        digest = media_digest(name)
+        if digest is not None and digest.startswith(match["hash"]):
+            return name, digest, True
+    path_digest = media_digest(path)
+    if path_digest is not None:
+        return path, path_digest, path.startswith(IMMUTABLE_PREFIXES)
+    if digest is not None:
+        # an old hash: the current file, but not for keeps
+        return name, digest, False
+    return None
+
+
+def parse_range(header, size):
+    """
+    ``(first, last)`` byte positions for a single ``bytes=`` range, ``None``
+    to ignore the header and send everything, ``False`` if unsatisfiable.
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None  # multipart ranges are not worth it here
+    first, dash, last = spec.strip().partition("-")
+    if not dash:
+        return None
+    try:
+        if not first:
+            suffix = int(last)
+            if suffix <= 0 or size == 0:
+                return False
+            return max(size - suffix, 0), size - 1
+        first = int(first)
+        last = int(last) if last else None
+    except ValueError:
+        return None
+    if first < 0 or (last is not None and last < first):
+        return None
+    if first >= size:
+        return False
+    return first, size - 1 if last is None else min(last, size - 1)
+
+
+class FileRange:
+    """
+    ``length`` bytes of ``fh`` from where it is. ``fileno()`` lets a WSGI
+    server ``sendfile()`` them straight from the file descriptor; gunicorn
+    starts at its offset and stops at the Content-Length.
+    """
+
+    def __init__(self, fh, length):
+        self.fh = fh
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.fh.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.fh.fileno()
+
+    def close(self):
+        self.fh.close()
+
+
+def precompressed(name, digest, encoding):
+    """
+    The stored name of the ``encoding`` form of ``name``, made on first use
+    and shared by every file with the same content; ``None`` when it does
+    not come out small enough to be worth sending.
+    """
+    path = Path(default_storage.path(name))
+    size = path.stat().st_size
+    if size < settings.PAGES_COMPRESS_MIN_SIZE:
+        return None
+    compressed = f"{COMPRESSED_DIR}/{digest[:2]}/{digest}.{COMPRESSED_SUFFIXES[encoding]}"
+    target = Path(default_storage.path(compressed))
+    if not target.exists():
+        content = compress(path.read_bytes(), encoding, settings.PAGES_COMPRESS_LEVELS[encoding])
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = target.with_name(f".{target.name}.{os.getpid()}.tmp")
+        tmp.write_bytes(content)
+        os.replace(tmp, target)
+    if target.stat().st_size > size * COMPRESSED_RATIO:
+        return None
+    return compressed
+
+
+def serve(request, path):
+    """
+    Serve ``MEDIA_ROOT/path``, or the file a hashed ``path`` names, with
+    caching, range and precompression support.
+    """
+    if request.method not in ("GET", "HEAD"):
+        return HttpResponseNotAllowed(["GET", "HEAD"])
+    found = resolve(path)
+    if found is None:
+        raise Http404("No such media file.")
+    name, digest, immutable = found
+    source = os.stat(default_storage.path(name))
+    content_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+    compressible = bool(COMPRESSIBLE.search(content_type))
+
+    stored, encoding = name, None
+    # ranges are served from the identity bytes only
+    if compressible and "Range" not in request.headers:
+        encoding = negotiate_encoding(request)
+        if encoding is not None:
+            stored = precompressed(name, digest, encoding) or name
+            if stored == name:
+                encoding = None
+    file_path = default_storage.path(stored)
+    size = source.st_size if stored == name else os.stat(file_path).st_size
+    etag = f'"{digest[:HASH_LENGTH]}-{encoding}"' if encoding else f'"{digest[:HASH_LENGTH]}"'
+    modified = int(source.st_mtime)
+
+    def finish(response):
+        response["ETag"] = etag
+        response["Last-Modified"] = http_date(modified)
+        response["Cache-Control"] = IMMUTABLE if immutable else REVALIDATE
+        if compressible:
+            patch_vary_headers(response, ("Accept-Encoding",))
+        if is_blob(name) and not content_type.startswith("image/"):
+            filename = download_name(name, request.GET.get("filename"))
+            if filename:
+                response["Content-Disposition"] = content_disposition_header(False, filename)
+        return response
+
+    not_modified = get_conditional_response(request, etag=etag, last_modified=modified)
+    if not_modified is not None:
+        return finish(not_modified)
+
+    if settings.MEDIA_ACCEL_REDIRECT:
+        # nginx sends the file, ranges included
+        response = HttpResponse(content_type=content_type)
+        response["X-Accel-Redirect"] = settings.MEDIA_ACCEL_REDIRECT + filepath_to_uri(stored)
+        if encoding:
+            response["Content-Encoding"] = encoding
+        return finish(response)
+
+    first, status = 0, 200
+    if_range = request.headers.get("If-Range")
+    if "Range" in request.headers and if_range in (None, etag, http_date(modified)):
+        byte_range = parse_range(request.headers["Range"], size)
+        if byte_range is False:
+            response = HttpResponse(status=416, content_type=content_type)
+            response["Content-Range"] = f"bytes */{size}"
+            return finish(response)
+        if byte_range is not None:
+            first, last = byte_range
+            status = 206
+    length = size - first if status == 200 else last - first + 1
+
+    fh = open(file_path, "rb")
+    fh.seek(first)
+    response = FileResponse(FileRange(fh, length), status=status, content_type=content_type)
+    response.block_size = 64 * 1024
+    response["Content-Length"] = str(length)
+    if encoding:
+        response["Content-Encoding"] = encoding
+    else:
+        response["Accept-Ranges"] = "bytes"
+    if status == 206:
+        response["Content-Range"] = f"bytes {first}-{last}/{size}"
+    return finish(response)
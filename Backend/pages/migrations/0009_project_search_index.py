@@ -0,0 +1,76 @@
+from django.db import migrations
+
+# The project search index, kept here rather than imported from pages.search
+# so that changing the queries cannot change this migration. Later migrations
+# that remake pages_project on SQLite, which drops the triggers, run reinstall().
+SQLITE_SETUP = [
+    """
+    CREATE VIRTUAL TABLE pages_project_fts USING fts5(
+        title, description, tools, tags,
+        content='pages_project', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER pages_project_fts_ai AFTER INSERT ON pages_project BEGIN
+        INSERT INTO pages_project_fts(rowid, title, description, tools, tags)
+        VALUES (new.id, new.title, new.description, new.tools, new.tags);
+    END
+    """,
+    """
+    CREATE TRIGGER pages_project_fts_ad AFTER DELETE ON pages_project BEGIN
+        INSERT INTO pages_project_fts(pages_project_fts, rowid, title, description, tools, tags)
+        VALUES ('delete', old.id, old.title, old.description, old.tools, old.tags);
+    END
+    """,
+    """
+    CREATE TRIGGER pages_project_fts_au AFTER UPDATE ON pages_project BEGIN
+        INSERT INTO pages_project_fts(pages_project_fts, rowid, title, description, tools, tags)
+        VALUES ('delete', old.id, old.title, old.description, old.tools, old.tags);
+        INSERT INTO pages_project_fts(rowid, title, description, tools, tags)
+        VALUES (new.id, new.title, new.description, new.tools, new.tags);
+    END
+    """,
+    "INSERT INTO pages_project_fts(pages_project_fts) VALUES ('rebuild')",
+]
+SQLITE_TEARDOWN = [
+    "DROP TRIGGER IF EXISTS pages_project_fts_ai",
+    "DROP TRIGGER IF EXISTS pages_project_fts_ad",
+    "DROP TRIGGER IF EXISTS pages_project_fts_au",
+    "DROP TABLE IF EXISTS pages_project_fts",
+]
+POSTGRES_SETUP = [
+    "CREATE INDEX IF NOT EXISTS pages_project_search_gin ON pages_project USING gin (("
+    "to_tsvector('english', coalesce(title, '') || ' ' || coalesce(description, '') || ' ' "
+    "|| coalesce(tools, '') || ' ' || coalesce(tags, ''))"
+    "))",
+]
+POSTGRES_TEARDOWN = ["DROP INDEX IF EXISTS pages_project_search_gin"]
+
+
+def forwards(apps, schema_editor):
+    statements = {"sqlite": SQLITE_SETUP, "postgresql": POSTGRES_SETUP}
+    for sql in statements.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(sql)
+
+
+def backwards(apps, schema_editor):
+    statements = {"sqlite": SQLITE_TEARDOWN, "postgresql": POSTGRES_TEARDOWN}
+    for sql in statements.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(sql)
+
+
+def reinstall(apps, schema_editor):
+    backwards(apps, schema_editor)
+    forwards(apps, schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pages', '0008_contentversion'),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, backwards),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.6 on 2026-10-18 11:30
+
+import importlib
+
+from django.db import migrations, models
+
+search_index = importlib.import_module("pages.migrations.0009_project_search_index")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pages', '0009_project_search_index'),
+    ]
+
+    operations = [
+        # runs last when unapplying, after the table remake in RemoveField
+        migrations.RunPython(migrations.RunPython.noop, search_index.reinstall),
+        migrations.AddField(
+            model_name='aboutpage',
+            name='profile_image_renditions',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='homepage',
+            name='profile_image_renditions',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='image_renditions',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='sitesettings',
+            name='logo_renditions',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        # the SQLite table remake above drops the full-text triggers
+        migrations.RunPython(search_index.reinstall, search_index.reinstall),
+    ]
@@ -0,0 +1,101 @@
+# Generated by Django 5.2.6 on 2026-10-18 11:33
+
+import importlib
+
+from django.db import migrations, models
+
+search_index = importlib.import_module("pages.migrations.0009_project_search_index")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pages', '0010_image_renditions'),
+    ]
+
+    operations = [
+        # runs last when unapplying, after the table remake in RemoveField
+        migrations.RunPython(migrations.RunPython.noop, search_index.reinstall),
+        migrations.AddField(
+            model_name='aboutpage',
+            name='profile_image_color',
+            field=models.CharField(blank=True, editable=False, max_length=7),
+        ),
+        migrations.AddField(
+            model_name='aboutpage',
+            name='profile_image_height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='aboutpage',
+            name='profile_image_lqip',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='aboutpage',
+            name='profile_image_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='homepage',
+            name='profile_image_color',
+            field=models.CharField(blank=True, editable=False, max_length=7),
+        ),
+        migrations.AddField(
+            model_name='homepage',
+            name='profile_image_height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='homepage',
+            name='profile_image_lqip',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='homepage',
+            name='profile_image_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='image_color',
+            field=models.CharField(blank=True, editable=False, max_length=7),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='image_height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='image_lqip',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='image_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='sitesettings',
+            name='logo_color',
+            field=models.CharField(blank=True, editable=False, max_length=7),
+        ),
+        migrations.AddField(
+            model_name='sitesettings',
+            name='logo_height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='sitesettings',
+            name='logo_lqip',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='sitesettings',
+            name='logo_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        # the SQLite table remake above drops the full-text triggers
+        migrations.RunPython(search_index.reinstall, search_index.reinstall),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.6 on 2026-10-18 12:08
+
+import importlib
+
+import pages.storage
+from django.db import migrations, models
+
+search_index = importlib.import_module("pages.migrations.0009_project_search_index")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pages', '0012_project_list_indexes'),
+    ]
+
+    operations = [
+        # runs last when unapplying, after the table remake in AlterField
+        migrations.RunPython(migrations.RunPython.noop, search_index.reinstall),
+        migrations.CreateModel(
+            name='MediaBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('original_name', models.CharField(help_text='The name it was first uploaded as.', max_length=255)),
+                ('size', models.PositiveBigIntegerField()),
+                ('created', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='aboutpage',
+            name='profile_image',
+            field=models.ImageField(blank=True, null=True, storage=pages.storage.ContentAddressedStorage(), upload_to='about/profile/'),
+        ),
+        migrations.AlterField(
+            model_name='homepage',
+            name='profile_image',
+            field=models.ImageField(storage=pages.storage.ContentAddressedStorage(), upload_to='profiles/'),
+        ),
+        migrations.AlterField(
+            model_name='project',
+            name='image',
+            field=models.ImageField(blank=True, null=True, storage=pages.storage.ContentAddressedStorage(), upload_to='projects/'),
+        ),
+        migrations.AlterField(
+            model_name='resumepage',
+            name='resume_file',
+            field=models.FileField(blank=True, null=True, storage=pages.storage.ContentAddressedStorage(), upload_to='resumes/'),
+        ),
+        migrations.AlterField(
+            model_name='sitesettings',
+            name='logo',
+            field=models.ImageField(blank=True, null=True, storage=pages.storage.ContentAddressedStorage(), upload_to='site/'),
+        ),
+        # SQLite remakes the project table for the AlterField
+        migrations.RunPython(search_index.reinstall, search_index.reinstall),
+    ]
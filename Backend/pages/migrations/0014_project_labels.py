@@ -0,0 +1,129 @@
+# Generated by Django 5.2.6 on 2026-10-18 12:28
+
+import importlib
+import re
+from itertools import islice
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+search_index = importlib.import_module("pages.migrations.0009_project_search_index")
+
+# how pages.labels split the lists when this migration was written
+SEPARATORS = re.compile(r"[,;|·]|\.(?=[\s,;|·]|$)")
+MAX_LENGTH = 100
+BATCH_SIZE = 500
+
+
+def split_labels(text):
+    labels = {}
+    for part in SEPARATORS.split(text or ""):
+        name = " ".join(part.split())[:MAX_LENGTH]
+        if name:
+            labels.setdefault(name.lower(), name)
+    return labels
+
+
+def parse_labels(apps, schema_editor):
+    """Link every project to the tags and tools of its strings; the tables are new and empty."""
+    Project = apps.get_model("pages", "Project")
+    using = schema_editor.connection.alias
+    for field, label_name, through_name, column in (
+        ("tags", "Tag", "ProjectTag", "tag_id"), ("tools", "Tool", "ProjectTool", "tool_id"),
+    ):
+        Label = apps.get_model("pages", label_name)
+        Through = apps.get_model("pages", through_name)
+        rows = Project.objects.using(using).order_by("id").values_list("id", field).iterator(chunk_size=2000)
+        while batch := list(islice(rows, 2000)):
+            wanted = {pk: split_labels(text) for pk, text in batch}
+            names = {}
+            for labels in wanted.values():
+                for key, name in labels.items():
+                    names.setdefault(key, name)
+            Label.objects.using(using).bulk_create(
+                [Label(key=key, name=name) for key, name in names.items()],
+                ignore_conflicts=True, batch_size=BATCH_SIZE,
+            )
+            keys = list(names)
+            ids = {}
+            for start in range(0, len(keys), BATCH_SIZE):
+                ids.update(
+                    Label.objects.using(using).filter(key__in=keys[start:start + BATCH_SIZE]).values_list("key", "id")
+                )
+            Through.objects.using(using).bulk_create(
+                [Through(project_id=pk, **{column: ids[key]}) for pk, labels in wanted.items() for key in labels],
+                batch_size=BATCH_SIZE,
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pages', '0013_content_addressed_media'),
+    ]
+
+    operations = [
+        # runs last when unapplying, after the table remakes below
+        migrations.RunPython(migrations.RunPython.noop, search_index.reinstall),
+        migrations.CreateModel(
+            name='Tag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('key', models.CharField(max_length=100, unique=True)),
+            ],
+            options={
+                'ordering': ['key'],
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='Tool',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('key', models.CharField(max_length=100, unique=True)),
+            ],
+            options={
+                'ordering': ['key'],
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='ProjectTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='pages.project')),
+                ('tag', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='pages.tag')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='tag_set',
+            field=models.ManyToManyField(blank=True, related_name='projects', through='pages.ProjectTag', to='pages.tag'),
+        ),
+        migrations.CreateModel(
+            name='ProjectTool',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='pages.project')),
+                ('tool', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='pages.tool')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='tool_set',
+            field=models.ManyToManyField(blank=True, related_name='projects', through='pages.ProjectTool', to='pages.tool'),
+        ),
+        migrations.AddConstraint(
+            model_name='projecttag',
+            constraint=models.UniqueConstraint(fields=('tag', 'project'), name='pages_projecttag_unique'),
+        ),
+        migrations.AddConstraint(
+            model_name='projecttool',
+            constraint=models.UniqueConstraint(fields=('tool', 'project'), name='pages_projecttool_unique'),
+        ),
+        # SQLite remakes the project table to add the many-to-many fields
+        migrations.RunPython(search_index.reinstall, search_index.reinstall),
+        migrations.RunPython(parse_labels, migrations.RunPython.noop),
+    ]
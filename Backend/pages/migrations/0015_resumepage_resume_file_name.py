@@ -0,0 +1,38 @@
+# Generated by Django 5.2.6 on 2026-10-18 12:53
+
+import os
+
+from django.db import migrations, models
+
+
+def fill_resume_file_names(apps, schema_editor):
+    ResumePage = apps.get_model("pages", "ResumePage")
+    MediaBlob = apps.get_model("pages", "MediaBlob")
+    originals = dict(MediaBlob.objects.values_list("name", "original_name"))
+    for pk, name in ResumePage.objects.exclude(resume_file="").exclude(resume_file__isnull=True).values_list(
+        "pk", "resume_file",
+    ):
+        # blobs were named per blob until now; older files still have their upload name
+        filename = originals.get(name) or os.path.basename(name)
+        ResumePage.objects.filter(pk=pk).update(resume_file_name=filename[:255])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pages', '0014_project_labels'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='resumepage',
+            name='resume_file_name',
+            field=models.CharField(blank=True, editable=False, help_text="The name the file was uploaded as; its download's.", max_length=255),
+        ),
+        migrations.AlterField(
+            model_name='mediablob',
+            name='original_name',
+            field=models.CharField(help_text='The name it was first uploaded as, for downloads whose URL names none.', max_length=255),
+        ),
+        migrations.RunPython(fill_resume_file_names, migrations.RunPython.noop),
+    ]
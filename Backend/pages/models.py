@@ -1,4 +1,6 @@
 from django.db import models
+
+from .storage import media_storage
 class Project(models.Model):
     CATEGORY_CHOICES = [
         ("ecommerce", "E-Commerce"),
@@ -18,20 +20,73 @@ class Project(models.Model):
     )
     tools = models.CharField(max_length=255, blank=True)
     tags = models.CharField(max_length=255, blank=True)
-    image = models.ImageField(upload_to="projects/", blank=True, null=True)
+    image = models.ImageField(upload_to="projects/", storage=media_storage, blank=True, null=True)
+    image_renditions = models.JSONField(default=dict, blank=True, editable=False)
+    image_width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    image_height = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    image_color = models.CharField(max_length=7, blank=True, editable=False)
+    image_lqip = models.TextField(blank=True, editable=False)
     live_url = models.URLField("Deployment Link", blank=True, null=True)
     github_url = models.URLField("GitHub Link", blank=True, null=True)
     featured = models.BooleanField(default=False)
     order = models.PositiveIntegerField(default=0)
     created = models.DateTimeField(auto_now_add=True)
+    # ``tags``/``tools`` parsed into rows (pages/labels.py), for filtering
+    tag_set = models.ManyToManyField("Tag", through="ProjectTag", related_name="projects", blank=True)
+    tool_set = models.ManyToManyField("Tool", through="ProjectTool", related_name="projects", blank=True)
 
     class Meta:
         ordering = ["-featured", "order", "-created"]
+        # match ProjectViewSet.ordering, so lists read the index in order
+        # instead of sorting; "-id" makes the keyset cursor unique
+        indexes = [
+            models.Index(fields=["-featured", "order", "-created", "-id"], name="pages_project_list_idx"),
+            models.Index(
+                fields=["category", "-featured", "order", "-created", "-id"], name="pages_project_category_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.title
 
 
+class Label(models.Model):
+    name = models.CharField(max_length=100)
+    # the name lowercased with spaces collapsed; what ``?tag=``/``?tool=`` match
+    key = models.CharField(max_length=100, unique=True)
+
+    class Meta:
+        abstract = True
+        ordering = ["key"]
+
+    def __str__(self):
+        return self.name
+
+
+class Tag(Label):
+    pass
+
+
+class Tool(Label):
+    pass
+
+
+class ProjectTag(models.Model):
+    project = models.ForeignKey(Project, on_delete=models.CASCADE)
+    # the unique index leads with the tag, so it serves tag -> projects on its own
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE, db_index=False)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=["tag", "project"], name="pages_projecttag_unique")]
+
+
+class ProjectTool(models.Model):
+    project = models.ForeignKey(Project, on_delete=models.CASCADE)
+    tool = models.ForeignKey(Tool, on_delete=models.CASCADE, db_index=False)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=["tool", "project"], name="pages_projecttool_unique")]
+
 
 class Education(models.Model):
     title = models.CharField(max_length=255)            # e.g. "M.E. in Computer Science and Engineering"
@@ -73,7 +128,10 @@ class ResumePage(models.Model):
     intro = models.TextField(blank=True, help_text="Short intro shown above resume sections.")
     education = models.ManyToManyField(Education, blank=True, related_name="resume_pages")
     experience = models.ManyToManyField(Experience, blank=True, related_name="resume_pages")
-    resume_file = models.FileField(upload_to="resumes/", blank=True, null=True)
+    resume_file = models.FileField(upload_to="resumes/", storage=media_storage, blank=True, null=True)
+    resume_file_name = models.CharField(
+        max_length=255, blank=True, editable=False, help_text="The name the file was uploaded as; its download's.",
+    )
     created = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -100,7 +158,12 @@ class Skill(models.Model):
 class AboutPage(models.Model):
     title = models.CharField(max_length=200, default="About Me")
     intro = models.TextField(blank=True, help_text="Intro paragraph (markdown/plain text)")
-    profile_image = models.ImageField(upload_to="about/profile/", blank=True, null=True)
+    profile_image = models.ImageField(upload_to="about/profile/", storage=media_storage, blank=True, null=True)
+    profile_image_renditions = models.JSONField(default=dict, blank=True, editable=False)
+    profile_image_width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    profile_image_height = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    profile_image_color = models.CharField(max_length=7, blank=True, editable=False)
+    profile_image_lqip = models.TextField(blank=True, editable=False)
     email = models.EmailField(blank=True, null=True)
     location = models.CharField(max_length=200, blank=True, null=True)
     phone = models.CharField(max_length=50, blank=True, null=True)
@@ -114,7 +177,12 @@ class AboutPage(models.Model):
 
 class SiteSettings(models.Model):
     brand_name = models.CharField(max_length=100, default="My portfolio")
-    logo = models.ImageField(upload_to="site/", blank=True, null=True)
+    logo = models.ImageField(upload_to="site/", storage=media_storage, blank=True, null=True)
+    logo_renditions = models.JSONField(default=dict, blank=True, editable=False)
+    logo_width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    logo_height = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    logo_color = models.CharField(max_length=7, blank=True, editable=False)
+    logo_lqip = models.TextField(blank=True, editable=False)
     primary_color = models.CharField(max_length=20, default="#00FFFF")   # cyan
     secondary_color = models.CharField(max_length=20, default="#8A2BE2") # purple
 
@@ -131,10 +199,38 @@ class Role(models.Model):
 class HomePage(models.Model):
     full_name = models.CharField(max_length=200)
     intro = models.TextField(blank=True)
-    profile_image = models.ImageField(upload_to="profiles/")
+    profile_image = models.ImageField(upload_to="profiles/", storage=media_storage)
+    profile_image_renditions = models.JSONField(default=dict, blank=True, editable=False)
+    profile_image_width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    profile_image_height = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    profile_image_color = models.CharField(max_length=7, blank=True, editable=False)
+    profile_image_lqip = models.TextField(blank=True, editable=False)
     roles = models.ManyToManyField(Role, blank=True)
     created = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
         return f"Home: {self.full_name}"
 
+
+
+class ContentVersion(models.Model):
+    """Per-model write counter, bumped by signals; cache keys embed it."""
+    label = models.CharField(max_length=100, unique=True)
+    version = models.PositiveBigIntegerField(default=0)
+    updated = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.label} v{self.version}"
+
+
+class MediaBlob(models.Model):
+    """A file in the content-addressed media storage (``pages.storage``)."""
+    name = models.CharField(max_length=100, unique=True)
+    original_name = models.CharField(
+        max_length=255, help_text="The name it was first uploaded as, for downloads whose URL names none.",
+    )
+    size = models.PositiveBigIntegerField()
+    created = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.original_name
@@ -0,0 +1,237 @@
+import base64
+import json
+from collections import OrderedDict
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+from rest_framework import exceptions
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination over a composite ordering, e.g.
+    ``("-featured", "order", "-created", "-id")``.
+
+    Each page is fetched with a ``WHERE (a, b, ...) > (x, y, ...)`` style
+    condition instead of ``OFFSET``, and no ``COUNT(*)`` is run, so the cost of
+    a page does not grow with its position or the table size. The ordering
+    must end in a unique column so cursors stay stable under inserts.
+
+    Pages follow the queryset's ordering, as set by the view or a filter
+    such as ``?ordering=``, with ``-id`` appended as the tie-breaker; the
+    view's ``cursor_ordering`` applies when the queryset has none. An
+    ordering on anything but columns (a search rank) cannot be paged this
+    way and is a 400.
+    """
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    count_query_param = "count"
+    # filtered tables are counted exactly up to this many rows
+    approximate_count_cap = 10_000
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.model = queryset.model
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(queryset, view)
+        self.page_size = self.get_page_size(request)
+        values, self.reverse = self.decode_cursor(request)
+
+        ordering = self.ordering if not self.reverse else tuple(flip(f) for f in self.ordering)
+        qs = queryset.order_by(*ordering)
+        if values is not None:
+            qs = qs.filter(self.after(ordering, values))
+        rows = list(qs[: self.page_size + 1])
+        self.has_more = len(rows) > self.page_size
+        rows = rows[: self.page_size]
+        self.has_cursor = values is not None
+        if self.reverse:
+            rows.reverse()
+        self.page = rows
+
+        self.approximate_count = None
+        if request.query_params.get(self.count_query_param) == "approx":
+            self.approximate_count = self.estimate_count(queryset)
+        return rows
+
+    def get_ordering(self, queryset, view):
+        ordering = tuple(queryset.query.order_by) or tuple(view.cursor_ordering)
+        columns = {field.name for field in self.model._meta.concrete_fields}
+        if not all(isinstance(field, str) and field.lstrip("-") in columns for field in ordering):
+            raise exceptions.ValidationError(
+                {"pagination": "Cursor pages cannot follow this ordering; use page numbers."}
+            )
+        if not any(field.lstrip("-") == "id" for field in ordering):
+            ordering += ("-id",)
+        return ordering
+
+    def get_paginated_response(self, data):
+        fields = [
+            ("next", self.get_next_link()),
+            ("previous", self.get_previous_link()),
+        ]
+        if self.approximate_count is not None:
+            fields.append(("approximate_count", self.approximate_count))
+        fields.append(("results", data))
+        return Response(OrderedDict(fields))
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return api_settings.PAGE_SIZE
+        return max(1, min(size, self.max_page_size))
+
+    # cursors
+
+    def decode_cursor(self, request):
+        raw = request.query_params.get(self.cursor_query_param)
+        if not raw:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(raw.encode()).decode())
+            values = payload["v"]
+            if len(values) != len(self.ordering):
+                raise ValueError
+            return values, bool(payload.get("r"))
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, obj, reverse):
+        # model instances, or dicts from a values() queryset
+        get = obj.__getitem__ if isinstance(obj, dict) else obj.__getattribute__
+        values = [get(f.lstrip("-")) for f in self.ordering]
+        payload = {"v": [v.isoformat() if hasattr(v, "isoformat") else v for v in values]}
+        if reverse:
+            payload["r"] = 1
+        raw = base64.urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode()).decode()
+        return replace_query_param(self.base_url, self.cursor_query_param, raw)
+
+    def get_next_link(self):
+        if not self.page:
+            return None
+        if self.reverse or self.has_more:
+            return self.encode_cursor(self.page[-1], reverse=False)
+        return None
+
+    def get_previous_link(self):
+        if not self.page:
+            return None
+        if (self.reverse and self.has_more) or (not self.reverse and self.has_cursor):
+            return self.encode_cursor(self.page[0], reverse=True)
+        return None
+
+    def after(self, ordering, values):
+        """
+        Rows strictly after ``values`` in ``ordering``, expanded as
+        ``a > x OR (a = x AND b > y) OR ...`` so each branch can use an index.
+        """
+        condition = Q()
+        equal = {}
+        for field, value in zip(ordering, self.to_python(values)):
+            name = field.lstrip("-")
+            op = "lt" if field.startswith("-") else "gt"
+            condition |= Q(**equal, **{f"{name}__{op}": value})
+            equal[name] = value
+        return condition
+
+    def to_python(self, values):
+        try:
+            return [
+                self.model._meta.get_field(f.lstrip("-")).to_python(v)
+                for f, v in zip(self.ordering, values)
+            ]
+        except ValidationError:
+            raise NotFound(self.invalid_cursor_message)
+
+    def estimate_count(self, queryset):
+        """
+        Cheap row count: planner statistics for an unfiltered table, a capped
+        exact count otherwise.
+        """
+        if not queryset.query.where:
+            estimate = table_estimate(queryset)
+            if estimate is not None:
+                return estimate
+        return queryset.order_by()[: self.approximate_count_cap].count()
+
+
+def flip(field):
+    return field[1:] if field.startswith("-") else f"-{field}"
+
+
+def table_estimate(queryset):
+    table = queryset.model._meta.db_table
+    connection = connections[queryset.db]
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE relname = %s", [table])
+            row = cursor.fetchone()
+            return row[0] if row and row[0] >= 0 else None
+        if connection.vendor == "sqlite":
+            # the primary key index makes this two index seeks
+            cursor.execute(f'SELECT MAX(rowid) - MIN(rowid) + 1 FROM "{table}"')
+            row = cursor.fetchone()
+            return row[0] or 0
+    return None
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Django ``Paginator`` that never counts a large table exactly: an
+    unfiltered table uses ``table_estimate()`` and a filtered one is counted
+    up to ``count_cap`` rows. Small tables, where a count is cheap, are
+    counted exactly. Meant for admin changelists over big tables.
+    """
+    count_cap = 10_000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where and not queryset.query.distinct:
+            estimate = table_estimate(queryset)
+            if estimate is not None and estimate > self.count_cap:
+                return estimate
+        return queryset.order_by()[: self.count_cap].count()
+
+
+class OptionalCursorPagination(BasePagination):
+    """
+    Page-number pagination by default (what the frontend uses), keyset
+    pagination when the client opts in with ``?cursor=`` or
+    ``?pagination=cursor``.
+    """
+    page_number_class = PageNumberPagination
+    keyset_class = KeysetPagination
+    mode_query_param = "pagination"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.select(request).paginate_queryset(queryset, request, view)
+
+    def select(self, request):
+        """The paginator ``request`` asks for, kept as ``self.delegate``."""
+        params = request.query_params
+        if params.get(self.mode_query_param) == "cursor" or self.keyset_class.cursor_query_param in params:
+            self.delegate = self.keyset_class()
+        else:
+            self.delegate = self.page_number_class()
+        return self.delegate
+
+    def get_paginated_response(self, data):
+        return self.delegate.get_paginated_response(data)
+
+    @property
+    def display_page_controls(self):
+        return getattr(self.delegate, "display_page_controls", False)
+
+    def to_html(self):
+        return self.delegate.to_html()
@@ -0,0 +1,90 @@
+import re
+
+from django.db import connections
+from django.db.models import BooleanField, FloatField
+from django.db.models.expressions import RawSQL
+from rest_framework import filters
+from rest_framework.settings import api_settings
+
+# the FTS5 table and its triggers, or the GIN index on Postgres, are created by
+# migration 0009; see its reinstall() for migrations that remake pages_project
+FTS_TABLE = "pages_project_fts"
+FTS_COLUMNS = ("title", "description", "tools", "tags")
+
+# the expression migration 0009 built the GIN index on; queries must use it verbatim
+PG_DOCUMENT = " || ' ' || ".join(f"coalesce({col}, '')" for col in FTS_COLUMNS)
+PG_DOCUMENT = f"to_tsvector('english', {PG_DOCUMENT})"
+
+
+def search_terms(text):
+    """Split user input into plain word tokens; anything else is dropped."""
+    return re.findall(r"\w+", text.lower())
+
+
+def fts5_query(terms):
+    # every term must match; the last one also as a prefix, for search-as-you-type
+    quoted = [f'"{t}"' for t in terms]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+def tsquery(terms):
+    parts = list(terms)
+    parts[-1] += ":*"
+    return " & ".join(parts)
+
+
+def search_projects(queryset, text):
+    """
+    Filter ``queryset`` to projects matching ``text`` and annotate
+    ``search_rank`` (lower is better). Returns ``None`` when the database has
+    no full-text index, so callers can fall back to a plain scan, and
+    ``queryset`` itself, unfiltered and without ``search_rank``, when
+    ``text`` has no search terms (blank or only punctuation); callers that
+    order by the rank must check for that.
+    """
+    terms = search_terms(text)
+    if not terms:
+        return queryset
+    vendor = connections[queryset.db].vendor
+    if vendor == "sqlite":
+        query = fts5_query(terms)
+        # join the FTS table directly: a correlated MATCH per row would make
+        # ranking quadratic in the number of hits
+        return queryset.extra(
+            tables=[FTS_TABLE],
+            where=[f"{FTS_TABLE}.rowid = pages_project.id", f"{FTS_TABLE} MATCH %s"],
+            params=[query],
+            select={"search_rank": f"{FTS_TABLE}.rank"},
+        )
+    if vendor == "postgresql":
+        query = tsquery(terms)
+        return queryset.filter(
+            RawSQL(f"{PG_DOCUMENT} @@ to_tsquery('english', %s)", [query], output_field=BooleanField()),
+        ).annotate(
+            search_rank=RawSQL(f"-ts_rank({PG_DOCUMENT}, to_tsquery('english', %s))", [query], output_field=FloatField()),
+        )
+    return None
+
+
+class ProjectSearchFilter(filters.SearchFilter):
+    """
+    Ranked full-text ``?search=`` over title, description, tools and tags.
+
+    Uses the FTS5 shadow table on SQLite and the tsvector GIN index on
+    Postgres; other backends fall back to DRF's ``icontains`` search.
+    Results are ranked first unless ``?ordering=`` asks for an order, so
+    it must run after ``OrderingFilter``.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        text = request.query_params.get(self.search_param, "")
+        if not text.strip():
+            return queryset
+        result = search_projects(queryset, text)
+        if result is None:
+            return super().filter_queryset(request, queryset, view)
+        if result is queryset or request.query_params.get(api_settings.ORDERING_PARAM):
+            return result
+        ordering = queryset.query.order_by or queryset.model._meta.ordering
+        return result.order_by("search_rank", *ordering)
@@ -4,34 +4,73 @@ from .models import Skill, AboutPage
 from rest_framework import serializers
 from .models import ResumePage, Education, Experience
 from .models import Project
+from .images import srcset
+from .media import media_urls
 
 class ProjectSerializer(serializers.ModelSerializer):
     image = serializers.SerializerMethodField()
+    image_srcset = serializers.SerializerMethodField()
 
     class Meta:
         model = Project
         fields = [
             "id", "title", "slug", "description", "category",
-            "tools", "tags", "image",
+            "tools", "tags", "image", "image_srcset", "image_width", "image_height",
+            "image_color", "image_lqip",
             "live_url", "github_url",
             "featured", "order", "created"
         ]
 
     def get_image(self, obj):
-        req = self.context.get("request")
-        if obj.image:
-            return req.build_absolute_uri(obj.image.url) if req else obj.image.url
-        return None
+        return media_urls(self.context.get("request"))(obj.image)
+
+    def get_image_srcset(self, obj):
+        return srcset(obj.image_renditions, media_urls(self.context.get("request")))
+
+
+class ProjectRowSerializer:
+    """
+    ``ProjectSerializer`` output straight from ``values()`` rows, skipping
+    model instances and per-field serializer machinery, for the hot list
+    (see ``pages.fast.FastReadMixin``).
+    """
+    columns = (
+        "id", "title", "slug", "description", "category", "tools", "tags",
+        "image", "image_renditions", "image_width", "image_height", "image_color", "image_lqip",
+        "live_url", "github_url", "featured", "order", "created",
+    )
+    created = serializers.DateTimeField()
+
+    def __init__(self, request):
+        self.request = request
+        self.media_url = media_urls(request)
+
+    def fetch(self, queryset):
+        return queryset.values(*self.columns)
+
+    def to_representation(self, row):
+        return {
+            "id": row["id"],
+            "title": row["title"],
+            "slug": row["slug"],
+            "description": row["description"],
+            "category": row["category"],
+            "tools": row["tools"],
+            "tags": row["tags"],
+            "image": self.media_url(row["image"]),
+            "image_srcset": srcset(row["image_renditions"], self.media_url),
+            "image_width": row["image_width"],
+            "image_height": row["image_height"],
+            "image_color": row["image_color"],
+            "image_lqip": row["image_lqip"],
+            "live_url": row["live_url"],
+            "github_url": row["github_url"],
+            "featured": row["featured"],
+            "order": row["order"],
+            "created": self.created.to_representation(row["created"]) if row["created"] is not None else None,
+        }
 
 
-
-def _abs_url(file_field, request):
-    if not file_field:
-        return None
-    if request:
-        return request.build_absolute_uri(file_field.url)
-    return getattr(file_field, "url", None)
-
 class EducationSerializer(serializers.ModelSerializer):
     class Meta:
         model = Education
@@ -60,8 +99,7 @@ class ResumePageSerializer(serializers.ModelSerializer):
         fields = ["id", "title", "intro", "education", "experience", "resume_file", "created"]
 
     def get_resume_file(self, obj):
-        req = self.context.get("request")
-        return _abs_url(obj.resume_file, req)
+        return media_urls(self.context.get("request"))(obj.resume_file, obj.resume_file_name)
 
 
 class SkillSerializer(serializers.ModelSerializer):
@@ -69,24 +107,24 @@ class SkillSerializer(serializers.ModelSerializer):
         model = Skill
         fields = ["id", "name", "percent", "order"]
 
-def _absolute_url(field_file, request):
-    if not field_file:
-        return None
-    if request:
-        return request.build_absolute_uri(field_file.url)
-    return getattr(field_file, "url", None)
-
 class AboutPageSerializer(serializers.ModelSerializer):
     profile_image = serializers.SerializerMethodField()
+    profile_image_srcset = serializers.SerializerMethodField()
     skills = SkillSerializer(many=True)
 
     class Meta:
         model = AboutPage
-        fields = ["id", "title", "intro", "profile_image", "email", "location", "phone", "skills", "created"]
+        fields = [
+            "id", "title", "intro", "profile_image", "profile_image_srcset",
+            "profile_image_width", "profile_image_height", "profile_image_color", "profile_image_lqip",
+            "email", "location", "phone", "skills", "created",
+        ]
 
     def get_profile_image(self, obj):
-        req = self.context.get("request")
-        return _absolute_url(obj.profile_image, req)
+        return media_urls(self.context.get("request"))(obj.profile_image)
+
+    def get_profile_image_srcset(self, obj):
+        return srcset(obj.profile_image_renditions, media_urls(self.context.get("request")))
 
 
 class RoleSerializer(serializers.ModelSerializer):
@@ -96,23 +134,36 @@ class RoleSerializer(serializers.ModelSerializer):
 
 class SiteSettingsSerializer(serializers.ModelSerializer):
     logo = serializers.SerializerMethodField()
+    logo_srcset = serializers.SerializerMethodField()
     class Meta:
         model = SiteSettings
-        fields = ["brand_name", "logo", "primary_color", "secondary_color"]
+        fields = [
+            "brand_name", "logo", "logo_srcset", "logo_width", "logo_height", "logo_color", "logo_lqip",
+            "primary_color", "secondary_color",
+        ]
 
     def get_logo(self, obj):
-        req = self.context.get("request")
-        return req.build_absolute_uri(obj.logo.url) if obj.logo and req else (obj.logo.url if obj.logo else None)
+        return media_urls(self.context.get("request"))(obj.logo)
+
+    def get_logo_srcset(self, obj):
+        return srcset(obj.logo_renditions, media_urls(self.context.get("request")))
 
 class HomePageSerializer(serializers.ModelSerializer):
     profile_image = serializers.SerializerMethodField()
+    profile_image_srcset = serializers.SerializerMethodField()
     roles = RoleSerializer(many=True)
     class Meta:
         model = HomePage
-        fields = ["id", "full_name", "intro", "profile_image", "roles"]
+        fields = [
+            "id", "full_name", "intro", "profile_image", "profile_image_srcset",
+            "profile_image_width", "profile_image_height", "profile_image_color", "profile_image_lqip",
+            "roles",
+        ]
 
     def get_profile_image(self, obj):
-        req = self.context.get("request")
-        return req.build_absolute_uri(obj.profile_image.url) if obj.profile_image and req else (obj.profile_image.url if obj.profile_image else None)
+        return media_urls(self.context.get("request"))(obj.profile_image)
+
+    def get_profile_image_srcset(self, obj):
+        return srcset(obj.profile_image_renditions, media_urls(self.context.get("request")))
 
 
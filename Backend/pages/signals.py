@@ -0,0 +1,59 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+
+from . import images, labels, media, singletons, versioning
+from .models import ContentVersion, MediaBlob, Project, ProjectTag, ProjectTool, Tag, Tool
+
+# not content, or (the label tables) written in bulk by labels.sync_labels(), which bumps them once
+UNSIGNALLED = (ContentVersion, MediaBlob, Tag, Tool, ProjectTag, ProjectTool)
+
+
+def content_changed(sender, **kwargs):
+    versioning.bump(sender)
+    singletons.forget(sender)
+
+
+def image_saving(sender, instance, **kwargs):
+    images.fill_metadata(instance)
+
+
+def download_saving(sender, instance, **kwargs):
+    media.fill_download_names(instance)
+
+
+def image_saved(sender, instance, **kwargs):
+    images.schedule(instance)
+
+
+def project_saved(sender, instance, update_fields=None, raw=False, **kwargs):
+    if raw or (update_fields is not None and not {"tags", "tools"} & set(update_fields)):
+        return
+    labels.sync_labels([instance], using=kwargs.get("using") or "default")
+
+
+def relation_changed(sender, instance, action, model, **kwargs):
+    # both sides of the through table can appear in a serializer
+    if action in ("post_add", "post_remove", "post_clear"):
+        versioning.bump(type(instance), model)
+        singletons.forget(type(instance), model)
+
+
+def connect(app_config):
+    """Invalidate cached content on every write to a model of this app."""
+    for model in app_config.get_models():
+        if model in UNSIGNALLED:
+            continue
+        uid = f"pages-content-{model._meta.label_lower}"
+        post_save.connect(content_changed, sender=model, dispatch_uid=uid)
+        post_delete.connect(content_changed, sender=model, dispatch_uid=uid)
+        if model._meta.label_lower in images.IMAGE_FIELDS:
+            pre_save.connect(image_saving, sender=model, dispatch_uid=f"{uid}-images")
+            post_save.connect(image_saved, sender=model, dispatch_uid=f"{uid}-images")
+        if model._meta.label_lower in media.DOWNLOAD_FIELDS:
+            pre_save.connect(download_saving, sender=model, dispatch_uid=f"{uid}-downloads")
+        for field in model._meta.local_many_to_many:
+            m2m_changed.connect(
+                relation_changed,
+                sender=field.remote_field.through,
+                dispatch_uid=f"pages-content-{field.remote_field.through._meta.label_lower}",
+            )
+    post_save.connect(project_saved, sender=Project, dispatch_uid="pages-project-labels")
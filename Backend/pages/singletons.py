@@ -0,0 +1,85 @@
+"""
+The site's one-row content: the newest ``HomePage``, ``AboutPage`` and
+``ResumePage`` and the first ``SiteSettings``, kept in process memory with
+their relations prefetched.
+
+Each process keeps the instance next to the content versions it was loaded
+at (``pages.versioning``), so a worker revalidates it against the shared
+``ContentVersion`` rows instead of querying for it again; views behind
+``CachedResponseMixin`` pass the versions they have already read, and then
+revalidation costs nothing. A write bumps those versions from the signals,
+which reaches every worker on its next request, and also drops the copy in
+the writing process straight away.
+"""
+from .models import AboutPage, Education, Experience, HomePage, ResumePage, Role, SiteSettings, Skill
+from .versioning import acurrent_versions, current_versions, label_for
+
+
+class Singleton:
+    def __init__(self, queryset, models):
+        self.queryset = queryset
+        self.models = models
+        self.labels = {label_for(model) for model in models}
+        # (versions, instance); replaced whole, so readers in other threads never see half of it
+        self.entry = None
+
+    def own_versions(self, versions):
+        """This singleton's part of ``versions``, or ``None`` if some of its models are missing."""
+        own = tuple(pair for pair in versions or () if pair[0] in self.labels)
+        return own if len(own) == len(self.labels) else None
+
+    def get(self, versions=None):
+        versions = self.own_versions(versions) or current_versions(self.models)[0]
+        entry = self.entry
+        if entry is not None and entry[0] == versions:
+            return entry[1]
+        # read after the versions: at worst the instance is newer than they say, and reloaded once more
+        instance = self.queryset.first()
+        self.entry = (versions, instance)
+        return instance
+
+    async def aget(self, versions=None):
+        versions = self.own_versions(versions) or (await acurrent_versions(self.models))[0]
+        entry = self.entry
+        if entry is not None and entry[0] == versions:
+            return entry[1]
+        instance = await self.queryset.afirst()
+        self.entry = (versions, instance)
+        return instance
+
+    def forget(self):
+        self.entry = None
+
+
+SINGLETONS = {
+    "site_settings": Singleton(SiteSettings.objects.order_by("pk"), (SiteSettings,)),
+    "home": Singleton(HomePage.objects.prefetch_related("roles").order_by("-created"), (HomePage, Role)),
+    "resume": Singleton(
+        ResumePage.objects.prefetch_related("education", "experience").order_by("-created"),
+        (ResumePage, Education, Experience),
+    ),
+    "about": Singleton(AboutPage.objects.prefetch_related("skills").order_by("-created"), (AboutPage, Skill)),
+}
+
+
+def latest(name, versions=None):
+    """The ``name`` singleton's instance, or ``None`` when there is none yet."""
+    return SINGLETONS[name].get(versions)
+
+
+async def alatest(name, versions=None):
+    """``latest()`` for async views."""
+    return await SINGLETONS[name].aget(versions)
+
+
+def forget(*models):
+    """Drop this process's copies that depend on ``models`` (called from signals)."""
+    labels = {label_for(model) for model in models}
+    for singleton in SINGLETONS.values():
+        if singleton.labels & labels:
+            singleton.forget()
+
+
+def clear():
+    for singleton in SINGLETONS.values():
+        singleton.forget()
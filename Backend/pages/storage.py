@@ -0,0 +1,65 @@
+import hashlib
+import os
+import re
+
+from django.apps import apps
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+BLOB_DIR = "blobs"
+BLOB_NAME = re.compile(rf"^{BLOB_DIR}/[0-9a-f]{{2}}/[0-9a-f]{{64}}(\.[a-z0-9]{{1,10}})?$")
+EXTENSION = re.compile(r"\.[a-z0-9]{1,10}")
+
+
+def content_digest(content):
+    """SHA-256 and size of a ``File``, read a chunk at a time."""
+    digest = hashlib.sha256()
+    size = 0
+    for chunk in content.chunks():
+        digest.update(chunk)
+        size += len(chunk)
+    return digest.hexdigest(), size
+
+
+def blob_name(digest, name):
+    """Where content with ``digest`` is stored; ``name`` only lends its extension."""
+    ext = os.path.splitext(name)[1].lower()
+    if not EXTENSION.fullmatch(ext):
+        ext = ""
+    return f"{BLOB_DIR}/{digest[:2]}/{digest}{ext}"
+
+
+def is_blob(name):
+    return bool(BLOB_NAME.match(name or ""))
+
+
+@deconstructible(path="pages.storage.ContentAddressedStorage")
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    ``MEDIA_ROOT`` storage that files uploads under their SHA-256:
+    ``blobs/ab/ab12…ef.jpg``. Uploading a file that is already stored, under
+    any name, writes nothing and returns the existing blob's name, so all
+    the rows that use it share one file.
+
+    The name the file was first uploaded as is kept in ``MediaBlob``, and
+    the rows' own upload names next to them (``pages.media.DOWNLOAD_FIELDS``).
+    ``upload_to`` no longer shows in the stored name.
+    """
+
+    def __init__(self, **kwargs):
+        # two uploads of the same content race to write identical bytes
+        kwargs.setdefault("allow_overwrite", True)
+        super().__init__(**kwargs)
+
+    def _save(self, name, content):
+        digest, size = content_digest(content)
+        blob = blob_name(digest, name)
+        if not self.exists(blob):
+            super()._save(blob, content)
+        apps.get_model("pages", "MediaBlob").objects.get_or_create(
+            name=blob, defaults={"original_name": os.path.basename(name)[:255], "size": size},
+        )
+        return blob
+
+
+media_storage = ContentAddressedStorage()
@@ -1,3 +1,1314 @@
-from django.test import TestCase
+import asyncio
+import gzip
+import io
+import json
+import os
+import random
+import shutil
+import tempfile
+import time
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection, connections
+from django.db.models import F
+from django.test import LiveServerTestCase, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve, reverse
+
+from contact.models import ContactMessage
+from portfolio_project import metrics
+from portfolio_project.testing import SMALL_SEED, discover_routes, measure, seed
+from portfolio_project.routers import ReplicaRouter
+
+from . import compression, singletons
+from .cache import response_cache_key
+from .images import build_renditions, file_digest
+from .media import FileRange, media_digest, parse_range
+from .pagination import KeysetPagination
+from .management.commands.bench_databases import run_workload
+from .models import (
+    AboutPage, ContentVersion, Education, Experience, HomePage, MediaBlob, Project, ResumePage, Role, SiteSettings,
+    Skill, Tag, Tool,
+)
+from .storage import media_storage
+
+
+class PageBundleTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        SiteSettings.objects.create(brand_name="Portfolio")
+        home = HomePage.objects.create(full_name="Jane Doe", profile_image="profiles/user.webp")
+        home.roles.set([Role.objects.create(name=f"Role {i}", order=i) for i in range(10)])
+        resume = ResumePage.objects.create(title="Resume")
+        resume.education.set([Education.objects.create(title=f"Edu {i}") for i in range(10)])
+        resume.experience.set([Experience.objects.create(title=f"Exp {i}") for i in range(10)])
+        about = AboutPage.objects.create(title="About")
+        about.skills.set([Skill.objects.create(name=f"Skill {i}") for i in range(10)])
+
+    def setUp(self):
+        cache.clear()
+        singletons.clear()
+
+    def test_bundle_returns_all_sections(self):
+        # content versions 1, site settings 1, home 2, resume 3, about 2
+        with self.assertNumQueries(9):
+            res = self.client.get(reverse("page-bundle"))
+        self.assertEqual(res.status_code, 200)
+        data = res.json()
+        self.assertEqual(set(data), {"site_settings", "home", "resume", "about"})
+        self.assertEqual(data["site_settings"]["brand_name"], "Portfolio")
+        self.assertEqual(len(data["home"]["roles"]), 10)
+        self.assertEqual(len(data["resume"]["education"]), 10)
+        self.assertEqual(len(data["about"]["skills"]), 10)
+
+    def test_bundle_sections_param(self):
+        with self.assertNumQueries(4):
+            res = self.client.get(reverse("page-bundle"), {"sections": "site_settings,home"})
+        self.assertEqual(set(res.json()), {"site_settings", "home"})
+
+    def test_bundle_rejects_unknown_section(self):
+        res = self.client.get(reverse("page-bundle"), {"sections": "home,blog"})
+        self.assertEqual(res.status_code, 400)
+
+
+class SingletonTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.about = AboutPage.objects.create(title="About")
+        cls.about.skills.set([Skill.objects.create(name=f"Skill {i}") for i in range(3)])
+
+    def setUp(self):
+        cache.clear()
+        singletons.clear()
+
+    def test_kept_in_memory_until_the_versions_change(self):
+        with self.assertNumQueries(3):
+            first = singletons.latest("about")
+        with self.assertNumQueries(1):
+            self.assertIs(singletons.latest("about"), first)
+        with self.assertNumQueries(0):
+            self.assertEqual([s.name for s in first.skills.all()], ["Skill 0", "Skill 1", "Skill 2"])
+        # another process's write: only the shared version moves
+        ContentVersion.objects.filter(label="pages.aboutpage").update(version=F("version") + 1)
+        self.assertIsNot(singletons.latest("about"), first)
+
+    def test_signals_drop_the_local_copy(self):
+        singletons.latest("about")
+        newer = AboutPage.objects.create(title="Newer")
+        self.assertEqual(singletons.latest("about"), newer)
+        newer.skills.add(Skill.objects.create(name="Extra"))
+        self.assertEqual([s.name for s in singletons.latest("about").skills.all()], ["Extra"])
+
+    @override_settings(PAGES_CACHE_ENABLED=False)
+    def test_views_reuse_the_versions_they_read(self):
+        self.client.get(reverse("about-list"))
+        for route in ("about-list", "about-latest"):
+            with self.assertNumQueries(1):
+                self.assertEqual(self.client.get(reverse(route)).json()["title"], "About")
+        self.about.title = "Edited"
+        self.about.save()
+        self.assertEqual(self.client.get(reverse("about-list")).json()["title"], "Edited")
+
+    @override_settings(ROOT_URLCONF="portfolio_project.urls_async", PAGES_CACHE_ENABLED=False)
+    async def test_async_views(self):
+        response = await self.async_client.get("/api/pages/about/")
+        self.assertEqual(json.loads(response.content)["title"], "About")
+        self.assertEqual(singletons.SINGLETONS["about"].entry[1].title, "About")
+
+
+class ResponseCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.home = HomePage.objects.create(full_name="Jane Doe", profile_image="profiles/user.webp")
+        cls.role = Role.objects.create(name="Developer")
+        cls.home.roles.add(cls.role)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_second_request_is_served_from_cache(self):
+        url = reverse("home-list")
+        first = self.client.get(url)
+        self.assertEqual(first["X-Cache"], "MISS")
+        with self.assertNumQueries(1):
+            second = self.client.get(url)
+        self.assertEqual(second["X-Cache"], "HIT")
+        self.assertEqual(first.content, second.content)
+        self.assertEqual(second["Content-Type"], "application/json")
+
+    def test_cache_key_includes_query_and_host(self):
+        url = reverse("home-list")
+        self.client.get(url)
+        self.assertEqual(self.client.get(url, {"page": 1})["X-Cache"], "MISS")
+        self.assertEqual(self.client.get(url, HTTP_HOST="example.com")["X-Cache"], "MISS")
+
+    def test_save_invalidates(self):
+        url = reverse("home-list")
+        self.client.get(url)
+        self.home.full_name = "John Doe"
+        self.home.save()
+        res = self.client.get(url)
+        self.assertEqual(res["X-Cache"], "MISS")
+        self.assertEqual(res.json()["results"][0]["full_name"], "John Doe")
+
+    def test_related_save_and_m2m_change_invalidate(self):
+        url = reverse("home-list")
+        self.client.get(url)
+        self.role.name = "Engineer"
+        self.role.save()
+        self.assertEqual(self.client.get(url).json()["results"][0]["roles"][0]["name"], "Engineer")
+        self.home.roles.clear()
+        self.assertEqual(self.client.get(url).json()["results"][0]["roles"], [])
+
+    def test_unrelated_write_keeps_entry(self):
+        url = reverse("home-list")
+        self.client.get(url)
+        Skill.objects.create(name="Python")
+        self.assertEqual(self.client.get(url)["X-Cache"], "HIT")
+
+    def test_stale_entry_served_while_another_request_revalidates(self):
+        url = reverse("home-list")
+        self.client.get(url)
+        self.home.full_name = "John Doe"
+        self.home.save()
+        key = response_cache_key(self.client.get(url).wsgi_request)
+        self.home.full_name = "Jim Doe"
+        self.home.save()
+        cache.add(key + ":lock", 1)
+        res = self.client.get(url)
+        self.assertEqual(res["X-Cache"], "STALE")
+        self.assertEqual(res.json()["results"][0]["full_name"], "John Doe")
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.about = AboutPage.objects.create(title="About")
+        cls.about.skills.add(Skill.objects.create(name="Python"))
+
+    def setUp(self):
+        cache.clear()
+
+    def test_responses_carry_validators(self):
+        res = self.client.get(reverse("about-latest"))
+        self.assertTrue(res["ETag"].startswith('"'))
+        self.assertIn("Last-Modified", res)
+
+    def test_matching_etag_returns_304_without_running_the_view(self):
+        url = reverse("about-list")
+        etag = self.client.get(url)["ETag"]
+        cache.clear()
+        with self.assertNumQueries(1):
+            res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, 304)
+        self.assertEqual(res["ETag"], etag)
+        self.assertEqual(res.content, b"")
+
+    def test_if_modified_since(self):
+        url = reverse("about-list")
+        last_modified = self.client.get(url)["Last-Modified"]
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 304)
+
+    def test_write_changes_etag(self):
+        url = reverse("about-list")
+        etag = self.client.get(url)["ETag"]
+        self.about.skills.add(Skill.objects.create(name="Django"))
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, 200)
+        self.assertNotEqual(res["ETag"], etag)
+        self.assertEqual(len(res.json()["skills"]), 2)
+
+
+class CompressionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        PageBundleTests.setUpTestData()
+
+    def setUp(self):
+        cache.clear()
+        self.url = reverse("page-bundle")
+
+    def test_brotli_and_gzip(self):
+        identity = self.client.get(self.url)
+        self.assertGreater(len(identity.content), settings.PAGES_COMPRESS_MIN_SIZE)
+        self.assertNotIn("Content-Encoding", identity)
+        for accept, encoding, decompress in (
+            ("gzip, deflate, br", "br", compression.brotli.decompress),
+            ("gzip", "gzip", gzip.decompress),
+            ("br;q=0.5, gzip", "gzip", gzip.decompress),
+            ("*", "br", compression.brotli.decompress),
+        ):
+            with self.subTest(accept=accept):
+                response = self.client.get(self.url, headers={"accept-encoding": accept})
+                self.assertEqual(response["Content-Encoding"], encoding)
+                self.assertEqual(decompress(response.content), identity.content)
+                self.assertIn("Accept-Encoding", response["Vary"])
+                self.assertEqual(response["ETag"], identity["ETag"][:-1] + f'-{encoding}"')
+        for accept in ("identity", "br;q=0, gzip;q=0", "*;q=0"):
+            with self.subTest(accept=accept):
+                self.assertNotIn("Content-Encoding", self.client.get(self.url, headers={"accept-encoding": accept}))
+
+    def test_small_bodies_are_sent_as_they_are(self):
+        response = self.client.get(reverse("site-settings-list"), headers={"accept-encoding": "br"})
+        self.assertLess(len(response.content), settings.PAGES_COMPRESS_MIN_SIZE)
+        self.assertNotIn("Content-Encoding", response)
+        self.assertIn("Accept-Encoding", response["Vary"])
+
+    def test_compressed_once_per_version(self):
+        headers = {"accept-encoding": "br"}
+        with mock.patch("pages.compression.compress", wraps=compression.compress) as compress:
+            first = self.client.get(self.url, headers=headers)
+            second = self.client.get(self.url, headers=headers)
+            self.assertEqual(compress.call_count, 1)
+            self.assertEqual(compress.call_args.args[2], settings.PAGES_COMPRESS_LEVELS["br"])
+            self.assertEqual(second["X-Cache"], "HIT")
+            self.assertEqual(first.content, second.content)
+            self.assertEqual(
+                self.client.get(self.url, headers={**headers, "if-none-match": first["ETag"]}).status_code, 304
+            )
+
+            HomePage.objects.update(full_name="John Doe")
+            HomePage.objects.get().save()
+            third = self.client.get(self.url, headers=headers)
+            self.assertEqual(compress.call_count, 2)
+            self.assertIn(b"John Doe", compression.brotli.decompress(third.content))
+
+    def test_stale_body_keeps_its_etag_and_is_not_stored(self):
+        headers = {"accept-encoding": "br"}
+        old = self.client.get(self.url, headers=headers)
+        HomePage.objects.get().save()
+        cache.add(response_cache_key(old.wsgi_request) + ":lock", 1)
+        stale = self.client.get(self.url, headers=headers)
+        self.assertEqual(stale["X-Cache"], "STALE")
+        self.assertEqual(stale["ETag"], old["ETag"])
+        cache.delete(response_cache_key(old.wsgi_request) + ":lock")
+        with mock.patch("pages.compression.compress", wraps=compression.compress) as compress:
+            fresh = self.client.get(self.url, headers=headers)
+        self.assertEqual(compress.call_count, 1)
+        self.assertNotEqual(fresh["ETag"], old["ETag"])
+
+    @override_settings(PAGES_CACHE_ENABLED=False)
+    def test_uncached_responses_use_the_cheap_levels(self):
+        with mock.patch("pages.compression.compress", wraps=compression.compress) as compress:
+            self.client.get(self.url, headers={"accept-encoding": "gzip"})
+            self.client.get(self.url, headers={"accept-encoding": "gzip"})
+        self.assertEqual(compress.call_count, 2)
+        self.assertEqual(compress.call_args.args[2], settings.PAGES_COMPRESS_UNCACHED_LEVELS["gzip"])
+
+    @override_settings(PAGES_COMPRESS_ENABLED=False)
+    def test_can_be_turned_off(self):
+        self.assertNotIn("Content-Encoding", self.client.get(self.url, headers={"accept-encoding": "br"}))
+
+    @override_settings(ROOT_URLCONF="portfolio_project.urls_async")
+    async def test_async_views_share_the_compressed_bodies(self):
+        headers = {"accept-encoding": "br"}
+        response = await self.async_client.get(self.url, headers=headers)
+        self.assertEqual(response["Content-Encoding"], "br")
+        with mock.patch("pages.compression.compress", wraps=compression.compress) as compress:
+            cached = await self.async_client.get(self.url, headers=headers)
+        compress.assert_not_called()
+        self.assertEqual(cached.content, response.content)
+
+
+# queries per route with the response cache off; the first query of every
+# pages route is the content version lookup
+QUERY_BUDGETS = {
+    "page-bundle": 9,
+    "site-settings-list": 3,
+    "site-settings-detail": 2,
+    "home-list": 4,
+    "home-detail": 3,
+    "about-list": 3,
+    "about-detail": 3,
+    "about-latest": 3,
+    "skills-list": 3,
+    "skills-detail": 2,
+    "education-list": 3,
+    "education-detail": 2,
+    "experience-list": 3,
+    "experience-detail": 2,
+    "resume-list": 4,
+    "resume-detail": 4,
+    "projects-list": 3,
+    "projects-detail": 2,
+    "projects-facets": 2,
+}
+SERIALIZATION_BUDGET = 0.25  # seconds per request
+
+
+@override_settings(PAGES_CACHE_ENABLED=False)
+class QueryBudgetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seed(**SMALL_SEED)
+
+    def pages_routes(self):
+        return discover_routes(apps=["pages"])
+
+    def query_counts(self, routes):
+        counts = {}
+        for name, url in routes:
+            response, queries, _ = measure(self.client, url)
+            self.assertEqual(response.status_code, 200, name)
+            counts[name] = (len(queries), "\n".join(q["sql"] for q in queries))
+        return counts
+
+    def test_every_route_has_a_budget(self):
+        self.assertEqual({name for name, _ in self.pages_routes()}, set(QUERY_BUDGETS))
+
+    def test_query_counts_do_not_grow_with_data(self):
+        routes = self.pages_routes()
+        small = self.query_counts(routes)
+        seed(start=max(SMALL_SEED.values()))
+        large = self.query_counts(routes)
+        for name, _ in routes:
+            with self.subTest(route=name):
+                self.assertEqual(large[name][0], small[name][0], large[name][1])
+                self.assertEqual(large[name][0], QUERY_BUDGETS[name], large[name][1])
+
+    def test_serialization_time(self):
+        seed(start=max(SMALL_SEED.values()))
+        for name, url in self.pages_routes():
+            with self.subTest(route=name):
+                self.client.get(url)  # warm up
+                start = time.perf_counter()
+                self.client.get(url)
+                self.assertLess(time.perf_counter() - start, SERIALIZATION_BUDGET)
+
+
+class ProjectSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Project.objects.create(title="Shop front", slug="shop", description="An online store", tools="React, Django")
+        Project.objects.create(title="Exam portal", slug="exam", description="Django exams, django everywhere",
+                               tools="Django")
+        Project.objects.create(title="Tracker", slug="tracker", description="Habit tracker", tags="productivity")
+
+    def setUp(self):
+        cache.clear()
+
+    def search(self, text, **params):
+        res = self.client.get(reverse("projects-list"), {"search": text, **params})
+        self.assertEqual(res.status_code, 200)
+        return [p["slug"] for p in res.json()["results"]]
+
+    def test_matches_every_indexed_column(self):
+        self.assertEqual(self.search("store"), ["shop"])
+        self.assertEqual(self.search("react"), ["shop"])
+        self.assertEqual(self.search("productivity"), ["tracker"])
+
+    def test_results_are_ranked(self):
+        self.assertEqual(self.search("django"), ["exam", "shop"])
+        # ahead of the default ordering, which puts shop first
+        Project.objects.filter(slug="exam").update(order=5)
+        self.assertEqual(self.search("django"), ["exam", "shop"])
+
+    def test_prefix_and_multiple_terms(self):
+        self.assertEqual(self.search("trac"), ["tracker"])
+        self.assertEqual(self.search("online sto"), ["shop"])
+        self.assertEqual(self.search("online exam"), [])
+
+    def test_index_follows_updates_and_deletes(self):
+        project = Project.objects.get(slug="tracker")
+        project.description = "Budget planner"
+        project.save()
+        self.assertEqual(self.search("habit"), [])
+        self.assertEqual(self.search("budget"), ["tracker"])
+        project.delete()
+        self.assertEqual(self.search("budget"), [])
+
+    def test_ordering_param_overrides_rank(self):
+        self.assertEqual(self.search("django", ordering="created"), ["shop", "exam"])
+        self.assertEqual(self.search("django", ordering="-created"), ["exam", "shop"])
+
+    def test_punctuation_only_search_is_ignored(self):
+        self.assertEqual(len(self.search('"*')), 3)
+
+
+class ProjectLabelTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Project.objects.create(title="Shop", slug="shop", tags="React, Shop", tools="Django · React")
+        Project.objects.create(title="Blog", slug="blog", tags="react, mini project.", tools="Vue.js. Flask")
+        Project.objects.create(title="Tracker", slug="tracker", tools="Django")
+
+    def setUp(self):
+        cache.clear()
+
+    def filter(self, query):
+        res = self.client.get(f"{reverse('projects-list')}?{query}")
+        self.assertEqual(res.status_code, 200)
+        return sorted(p["slug"] for p in res.json()["results"])
+
+    def test_strings_are_parsed_into_shared_rows(self):
+        self.assertEqual(list(Tag.objects.values_list("name", flat=True)), ["mini project", "React", "Shop"])
+        self.assertEqual(list(Tool.objects.values_list("name", flat=True)), ["Django", "Flask", "React", "Vue.js"])
+        project = Project.objects.get(slug="shop")
+        self.assertEqual(sorted(project.tag_set.values_list("key", flat=True)), ["react", "shop"])
+        project.tags = "Shop,  Online   Store"
+        project.save()
+        self.assertEqual(sorted(project.tag_set.values_list("name", flat=True)), ["Online Store", "Shop"])
+
+    def test_all_labels_by_default(self):
+        self.assertEqual(self.filter("tag=react"), ["blog", "shop"])
+        self.assertEqual(self.filter("tag=REACT&tool=django"), ["shop"])
+        self.assertEqual(self.filter("tag=react&tag=shop"), ["shop"])
+        self.assertEqual(self.filter("tag=react,mini%20project"), ["blog"])
+        self.assertEqual(self.filter("tool=vue.js"), ["blog"])
+        self.assertEqual(self.filter("tag=nope"), [])
+
+    def test_any_label(self):
+        self.assertEqual(self.filter("tool=flask,django&match=any"), ["blog", "shop", "tracker"])
+        self.assertEqual(self.filter("tag=shop&tool=flask&match=any"), ["blog", "shop"])
+        self.assertEqual(self.client.get(reverse("projects-list"), {"tag": "react", "match": "most"}).status_code, 400)
+
+    def test_combines_with_search_and_keeps_the_strings(self):
+        self.assertEqual(self.filter("tag=react&search=blog"), ["blog"])
+        res = self.client.get(reverse("projects-list"), {"tool": "flask"})
+        self.assertEqual(res.json()["results"][0]["tools"], "Vue.js. Flask")
+        self.assertEqual(res.json()["results"][0]["tags"], "react, mini project.")
+
+    def test_saving_a_project_bumps_the_label_versions_once(self):
+        project = Project.objects.get(slug="shop")
+        project.tags = "One, Two, Three, Four"
+        with CaptureQueriesContext(connection) as queries:
+            project.save()
+        bumps = [q["sql"] for q in queries if q["sql"].startswith('UPDATE "pages_contentversion"')]
+        # the project, then the tag, tool and link tables together
+        self.assertEqual(len(bumps), 2)
+        deletes = [q["sql"] for q in queries if q["sql"].startswith("DELETE")]
+        self.assertEqual(len(deletes), 2)
+
+    def test_seeded_projects_get_labels(self):
+        call_command("seed_load_data", "--projects", "20", "--messages", "0", "--revisions", "0", "--items", "0",
+                     stdout=io.StringIO())
+        tagged = Project.objects.filter(slug__startswith="load-", tag_set__isnull=False).distinct().count()
+        self.assertEqual(tagged, 20)
+
+
+class ProjectFacetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Project.objects.create(title="Shop", slug="shop", category="ecommerce", featured=True,
+                               tags="React, Shop", tools="Django")
+        Project.objects.create(title="Cart", slug="cart", category="ecommerce", tags="react", tools="Flask")
+        Project.objects.create(title="Exam", slug="exam", category="education", tags="Quiz", tools="Django")
+
+    def setUp(self):
+        cache.clear()
+
+    def facets(self, **params):
+        res = self.client.get(reverse("projects-facets"), params)
+        self.assertEqual(res.status_code, 200)
+        data = res.json()
+        return {
+            "total": data["total"],
+            **{facet: {row["value"]: row["count"] for row in data[facet]} for facet in ("category", "featured", "tag", "tool")},
+        }
+
+    def test_counts(self):
+        data = self.facets()
+        self.assertEqual(data["total"], 3)
+        self.assertEqual(data["category"], {"ecommerce": 2, "education": 1, "healthcare": 0, "productivity": 0, "other": 0})
+        self.assertEqual(data["featured"], {True: 1, False: 2})
+        self.assertEqual(data["tag"], {"react": 2, "shop": 1, "quiz": 1})
+        self.assertEqual(data["tool"], {"django": 2, "flask": 1})
+        res = self.client.get(reverse("projects-facets")).json()
+        # most used first
+        self.assertEqual([row["value"] for row in res["tag"]], ["react", "quiz", "shop"])
+
+    def test_counts_follow_filters_and_search(self):
+        data = self.facets(category="ecommerce")
+        self.assertEqual(data["total"], 2)
+        self.assertEqual(data["tool"], {"django": 1, "flask": 1})
+        # the category counts ignore the category filter, so the other choices keep theirs
+        self.assertEqual(data["category"]["education"], 1)
+        data = self.facets(tool="django", search="exam")
+        self.assertEqual(data["total"], 1)
+        self.assertEqual(data["category"], {"ecommerce": 0, "education": 1, "healthcare": 0, "productivity": 0, "other": 0})
+        self.assertEqual(data["tag"], {"quiz": 1})
+
+    @override_settings(PAGES_CACHE_ENABLED=False)
+    def test_one_aggregate_query(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.facets(tag="react", search="shop")
+        counting = [q["sql"] for q in queries if "UNION ALL" in q["sql"]]
+        self.assertEqual(len(counting), 1)
+
+    def test_cached_until_a_project_changes(self):
+        self.facets()
+        with self.assertNumQueries(1):
+            self.assertEqual(self.facets()["total"], 3)
+        Project.objects.create(title="Notes", slug="notes", category="productivity", tags="React")
+        data = self.facets()
+        self.assertEqual(data["category"]["productivity"], 1)
+        self.assertEqual(data["tag"]["react"], 3)
+
+
+class KeysetPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for i in range(10):
+            Project.objects.create(title=f"P{i}", slug=f"p{i}", featured=i in (3, 7), order=i % 4)
+
+    def setUp(self):
+        cache.clear()
+
+    def expected(self):
+        return list(Project.objects.order_by("-featured", "order", "-created", "-id").values_list("slug", flat=True))
+
+    def walk(self, url, key="next"):
+        slugs, pages = [], 0
+        while url:
+            data = self.client.get(url).json()
+            slugs += [p["slug"] for p in data["results"]]
+            url, pages = data[key], pages + 1
+        return slugs, pages
+
+    def test_page_number_mode_is_still_the_default(self):
+        data = self.client.get(reverse("projects-list")).json()
+        self.assertEqual(data["count"], 10)
+        self.assertEqual(len(data["results"]), 3)
+
+    def test_cursor_walk_follows_model_ordering(self):
+        slugs, pages = self.walk(reverse("projects-list") + "?pagination=cursor")
+        self.assertEqual(slugs, self.expected())
+        self.assertEqual(pages, 4)
+
+    def test_cursor_pages_run_no_count(self):
+        with self.assertNumQueries(2):  # content versions + page
+            data = self.client.get(reverse("projects-list"), {"pagination": "cursor"}).json()
+        self.assertNotIn("count", data)
+
+    def test_previous_links(self):
+        url = reverse("projects-list") + "?pagination=cursor&page_size=4"
+        data = self.client.get(url).json()
+        self.assertIsNone(data["previous"])
+        last = self.client.get(self.client.get(data["next"]).json()["next"]).json()
+        self.assertIsNone(last["next"])
+        slugs, _ = self.walk(last["previous"], key="previous")
+        self.assertEqual(len(slugs), 8)
+        self.assertEqual(set(slugs), set(self.expected()[:8]))
+
+    def test_stable_under_concurrent_inserts(self):
+        before = self.expected()
+        data = self.client.get(reverse("projects-list"), {"pagination": "cursor"}).json()
+        seen = [p["slug"] for p in data["results"]]
+        # sorts before the current page: must neither shift nor duplicate rows
+        Project.objects.create(title="New", slug="new", featured=True, order=0)
+        rest, _ = self.walk(data["next"])
+        self.assertEqual(seen + rest, before)
+
+    @mock.patch.object(KeysetPagination, "max_page_size", 4)
+    def test_page_size_is_capped(self):
+        data = self.client.get(reverse("projects-list"), {"pagination": "cursor", "page_size": 1000}).json()
+        self.assertEqual(len(data["results"]), 4)
+        data = self.client.get(reverse("projects-list"), {"pagination": "cursor", "page_size": 2}).json()
+        self.assertEqual(len(data["results"]), 2)
+
+    def test_cursor_walk_follows_the_ordering_param(self):
+        slugs, _ = self.walk(reverse("projects-list") + "?pagination=cursor&ordering=order&page_size=3")
+        self.assertEqual(slugs, list(Project.objects.order_by("order", "-id").values_list("slug", flat=True)))
+
+    def test_search_cannot_be_paged_by_cursor(self):
+        # the rank is not a column a keyset can seek on
+        res = self.client.get(reverse("projects-list"), {"pagination": "cursor", "search": "p1"})
+        self.assertEqual(res.status_code, 400)
+        self.assertIn("pagination", res.json())
+        res = self.client.get(reverse("projects-list"), {"pagination": "cursor", "search": "p1", "ordering": "order"})
+        self.assertEqual([p["slug"] for p in res.json()["results"]], ["p1"])
+
+    def test_approximate_count(self):
+        data = self.client.get(reverse("projects-list"), {"pagination": "cursor", "count": "approx"}).json()
+        self.assertEqual(data["approximate_count"], 10)
+        data = self.client.get(
+            reverse("projects-list"), {"pagination": "cursor", "count": "approx", "category": "other"}
+        ).json()
+        self.assertEqual(data["approximate_count"], 10)
+
+    def test_invalid_cursor(self):
+        self.assertEqual(self.client.get(reverse("projects-list"), {"cursor": "garbage"}).status_code, 404)
+
+
+def make_image(width, height, fmt="JPEG", name="photo.jpg"):
+    from PIL import Image
+
+    buf = io.BytesIO()
+    Image.new("RGB", (width, height), (200, 40, 40)).save(buf, fmt)
+    return SimpleUploadedFile(name, buf.getvalue())
+
+
+class TempMediaMixin:
+    def setUp(self):
+        super().setUp()
+        self.media_root = tempfile.mkdtemp()
+        override = self.settings(MEDIA_ROOT=self.media_root, IMAGE_DERIVATIVES_ASYNC=False)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        cache.clear()
+
+
+class ImageDerivativeTests(TempMediaMixin, TestCase):
+    def test_upload_builds_width_ladder_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            project = Project.objects.create(title="P", slug="p", image=make_image(1000, 500))
+        project.refresh_from_db()
+        renditions = project.image_renditions
+        self.assertEqual((renditions["width"], renditions["height"]), (1000, 500))
+        self.assertEqual(list(renditions["webp"]), ["320", "640", "960", "1000"])
+
+        data = self.client.get(reverse("projects-detail", kwargs={"slug": "p"})).json()
+        self.assertEqual((data["image_width"], data["image_height"]), (1000, 500))
+        self.assertTrue(data["image_srcset"]["webp"]["320"].startswith("http://testserver/media/derivatives/"))
+
+    def test_identical_uploads_share_derivatives(self):
+        first = build_renditions(Project.image.field.storage.save("projects/a.jpg", make_image(700, 700)))
+        second = build_renditions(Project.image.field.storage.save("projects/b.jpg", make_image(700, 700)))
+        self.assertEqual(first["webp"], second["webp"])
+
+    def test_small_images_are_not_upscaled(self):
+        renditions = build_renditions(Project.image.field.storage.save("projects/s.png", make_image(100, 50, "PNG")))
+        self.assertEqual(list(renditions["webp"]), ["100"])
+
+    def test_unchanged_image_is_not_rebuilt(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            project = Project.objects.create(title="P", slug="p", image=make_image(400, 400))
+        project.refresh_from_db()
+        with self.captureOnCommitCallbacks() as callbacks:
+            project.title = "Q"
+            project.save()
+        self.assertEqual(callbacks, [])
+
+
+class ImageMetadataTests(TempMediaMixin, TestCase):
+    def test_upload_stores_metadata_on_save(self):
+        project = Project.objects.create(title="P", slug="p", image=make_image(300, 200))
+        project.refresh_from_db()
+        self.assertEqual((project.image_width, project.image_height), (300, 200))
+        self.assertEqual(project.image_color, "#c82828")
+        self.assertTrue(project.image_lqip.startswith("data:image/webp;base64,"))
+
+    def test_metadata_is_inline_in_api(self):
+        Project.objects.create(title="P", slug="p", image=make_image(300, 200))
+        data = self.client.get(reverse("projects-detail", kwargs={"slug": "p"})).json()
+        self.assertEqual(data["image_width"], 300)
+        self.assertEqual(data["image_color"], "#c82828")
+        self.assertTrue(data["image_lqip"].startswith("data:image/webp;base64,"))
+
+    def test_removing_image_clears_metadata(self):
+        project = Project.objects.create(title="P", slug="p", image=make_image(300, 200))
+        project.image = None
+        project.save()
+        project.refresh_from_db()
+        self.assertEqual((project.image_width, project.image_color, project.image_lqip), (None, "", ""))
+
+
+class MediaServingTests(TempMediaMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        # stored before the content-addressed storage, under its upload name
+        self.storage = default_storage
+        # like a real PDF, its streams are compressed already
+        self.pdf = random.Random(0).randbytes(10_000)
+        self.resume = ResumePage.objects.create(
+            title="Resume", resume_file=self.storage.save("resumes/cv.pdf", io.BytesIO(self.pdf)),
+        )
+        # what a backfill or the first download does; serializing never hashes
+        media_digest(self.resume.resume_file.name)
+
+    def resume_url(self):
+        url = self.client.get(reverse("resume-list")).json()["resume_file"]
+        return url.removeprefix("http://testserver")
+
+    def test_api_emits_hashed_urls(self):
+        url = self.resume_url()
+        self.assertRegex(url, r"^/media/resumes/cv\.[0-9a-f]{12}\.pdf$")
+        with self.captureOnCommitCallbacks(execute=True):
+            Project.objects.create(title="P", slug="p", image=make_image(400, 200))
+        data = self.client.get(reverse("projects-detail", kwargs={"slug": "p"})).json()
+        # blobs and derivatives are content-addressed already
+        self.assertRegex(data["image"], r"/media/blobs/\w\w/[0-9a-f]{64}\.jpg$")
+        self.assertRegex(data["image_srcset"]["webp"]["320"], r"/media/derivatives/\w\w/[0-9a-f]{64}-320\.webp$")
+        with self.settings(MEDIA_HASHED_URLS=False):
+            cache.clear()
+            self.assertEqual(self.resume_url(), "/media/resumes/cv.pdf")
+        # the web server serves media: it could not resolve the hashed name
+        with self.settings(MEDIA_SERVE=False):
+            cache.clear()
+            self.assertEqual(self.resume_url(), "/media/resumes/cv.pdf")
+            data = self.client.get(reverse("projects-detail", kwargs={"slug": "p"})).json()
+            self.assertRegex(data["image"], r"/media/blobs/\w\w/[0-9a-f]{64}\.jpg$")
+
+    def test_serializing_never_hashes(self):
+        self.storage.save("resumes/new.pdf", io.BytesIO(self.pdf[::-1]))
+        ResumePage.objects.update(resume_file="resumes/new.pdf")
+        with mock.patch("pages.media.file_digest", wraps=file_digest) as hashed:
+            self.assertEqual(self.resume_url(), "/media/resumes/new.pdf")
+            hashed.assert_not_called()
+            # serving it learns the digest, for the next render
+            self.assertEqual(self.client.get("/media/resumes/new.pdf").status_code, 200)
+            hashed.assert_called_once()
+        cache.clear()
+        self.assertRegex(self.resume_url(), r"^/media/resumes/new\.[0-9a-f]{12}\.pdf$")
+
+    def test_hashed_url_is_immutable(self):
+        response = self.client.get(self.resume_url())
+        self.assertEqual(response["Cache-Control"], "public, max-age=31536000, immutable")
+        self.assertEqual(response["Content-Type"], "application/pdf")
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+        self.assertEqual(b"".join(response.streaming_content), self.pdf)
+        self.assertEqual(self.client.get(self.resume_url(), headers={"if-none-match": response["ETag"]}).status_code, 304)
+
+        plain = self.client.get("/media/resumes/cv.pdf")
+        self.assertEqual(plain["Cache-Control"], "no-cache")
+        outdated = self.client.get("/media/resumes/cv.000000000000.pdf")
+        self.assertEqual((outdated.status_code, outdated["Cache-Control"]), (200, "no-cache"))
+        self.assertEqual(self.client.get("/media/resumes/missing.pdf").status_code, 404)
+        self.assertEqual(self.client.get("/media/../manage.py").status_code, 404)
+        self.assertEqual(self.client.post(self.resume_url()).status_code, 405)
+
+    def test_ranges(self):
+        url = self.resume_url()
+        response = self.client.get(url, headers={"range": "bytes=100-199"})
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response["Content-Range"], f"bytes 100-199/{len(self.pdf)}")
+        self.assertEqual(response["Content-Length"], "100")
+        self.assertEqual(b"".join(response.streaming_content), self.pdf[100:200])
+
+        tail = self.client.get(url, headers={"range": "bytes=-10"})
+        self.assertEqual(b"".join(tail.streaming_content), self.pdf[-10:])
+        resumed = self.client.get(url, headers={"range": "bytes=9000-", "if-range": response["ETag"]})
+        self.assertEqual(b"".join(resumed.streaming_content), self.pdf[9000:])
+        # the file changed since the first part: start over
+        changed = self.client.get(url, headers={"range": "bytes=9000-", "if-range": '"0123456789ab"'})
+        self.assertEqual(changed.status_code, 200)
+        unsatisfiable = self.client.get(url, headers={"range": f"bytes={len(self.pdf)}-"})
+        self.assertEqual(unsatisfiable.status_code, 416)
+        self.assertEqual(unsatisfiable["Content-Range"], f"bytes */{len(self.pdf)}")
+
+    def test_parse_range(self):
+        self.assertEqual(parse_range("bytes=0-0", 10), (0, 0))
+        self.assertEqual(parse_range("bytes=5-100", 10), (5, 9))
+        self.assertEqual(parse_range("bytes=-100", 10), (0, 9))
+        self.assertIsNone(parse_range("bytes=0-1,5-6", 10))
+        self.assertIsNone(parse_range("items=0-1", 10))
+        self.assertIsNone(parse_range("bytes=5-1", 10))
+        self.assertIs(parse_range("bytes=10-", 10), False)
+
+    def test_file_range_leaves_the_offset_for_sendfile(self):
+        path = self.storage.path(self.resume.resume_file.name)
+        with open(path, "rb") as fh:
+            fh.seek(300)
+            part = FileRange(fh, 50)
+            self.assertEqual(os.lseek(part.fileno(), 0, os.SEEK_CUR), 300)
+            self.assertEqual(part.read(4096), self.pdf[300:350])
+            self.assertEqual(part.read(4096), b"")
+
+    def test_precompressed(self):
+        svg = b'<svg xmlns="http://www.w3.org/2000/svg">' + b'<rect width="1" height="1"/>' * 200 + b"</svg>"
+        name = self.storage.save("site/logo.svg", io.BytesIO(svg))
+        with mock.patch("pages.media.compress", wraps=compression.compress) as compress:
+            for _ in range(2):
+                response = self.client.get(f"/media/{name}", headers={"accept-encoding": "br, gzip"})
+                self.assertEqual(response["Content-Encoding"], "br")
+                self.assertEqual(compression.brotli.decompress(b"".join(response.streaming_content)), svg)
+        self.assertEqual(compress.call_count, 1)
+        self.assertIn("Accept-Encoding", response["Vary"])
+        self.assertTrue(response["ETag"].endswith('-br"'))
+
+        ranged = self.client.get(f"/media/{name}", headers={"accept-encoding": "br", "range": "bytes=0-3"})
+        self.assertNotIn("Content-Encoding", ranged)
+        self.assertEqual(b"".join(ranged.streaming_content), svg[:4])
+        # files that do not compress go out as they are
+        self.assertNotIn("Content-Encoding", self.client.get(self.resume_url(), headers={"accept-encoding": "br"}))
+
+    @override_settings(MEDIA_ACCEL_REDIRECT="/internal-media/")
+    def test_accel_redirect(self):
+        response = self.client.get(self.resume_url())
+        self.assertEqual(response["X-Accel-Redirect"], "/internal-media/resumes/cv.pdf")
+        self.assertEqual(response["Cache-Control"], "public, max-age=31536000, immutable")
+        self.assertEqual(response.content, b"")
+
+
+class ContentAddressedStorageTests(TempMediaMixin, TestCase):
+    def test_identical_uploads_share_one_blob(self):
+        first = media_storage.save("profiles/sugan.jpg", io.BytesIO(b"same bytes"))
+        second = media_storage.save("projects/sugan_KOovDJT.jpg", io.BytesIO(b"same bytes"))
+        other = media_storage.save("profiles/sugan.jpg", io.BytesIO(b"other bytes"))
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, other)
+        self.assertRegex(first, r"^blobs/[0-9a-f]{2}/[0-9a-f]{64}\.jpg$")
+        self.assertEqual(len(os.listdir(os.path.dirname(media_storage.path(first)))), 1)
+        blob = MediaBlob.objects.get(name=first)
+        self.assertEqual((blob.original_name, blob.size), ("sugan.jpg", 10))
+
+    def test_model_uploads_and_downloads(self):
+        resume = ResumePage.objects.create(
+            title="Resume", resume_file=SimpleUploadedFile("Jane_Doe_CV.pdf", b"%PDF-1.4 resume"),
+        )
+        again = ResumePage.objects.create(
+            title="Resume", resume_file=SimpleUploadedFile("cv (1).pdf", b"%PDF-1.4 resume"),
+        )
+        self.assertEqual(resume.resume_file.name, again.resume_file.name)
+        self.assertEqual((resume.resume_file_name, again.resume_file_name), ("Jane_Doe_CV.pdf", "cv (1).pdf"))
+        # the newest page's own name, though its blob was first uploaded as another
+        url = self.client.get(reverse("resume-list")).json()["resume_file"]
+        self.assertTrue(url.endswith(f"/media/{again.resume_file.name}?filename=cv+%281%29.pdf"), url)
+        response = self.client.get(url)
+        self.assertEqual(response["Cache-Control"], "public, max-age=31536000, immutable")
+        self.assertEqual(response["Content-Disposition"], 'inline; filename="cv (1).pdf"')
+        self.assertEqual(b"".join(response.streaming_content), b"%PDF-1.4 resume")
+
+        plain = self.client.get(f"/media/{resume.resume_file.name}")
+        self.assertEqual(plain["Content-Disposition"], 'inline; filename="Jane_Doe_CV.pdf"')
+        # a link cannot change the type it is saved as
+        renamed = self.client.get(f"/media/{resume.resume_file.name}", {"filename": "../setup.exe"})
+        self.assertEqual(renamed["Content-Disposition"], 'inline; filename="setup.pdf"')
+
+    def test_dedupe_media_command(self):
+        legacy = default_storage
+        png = make_image(8, 8, "PNG", "logo.png").read()
+        logo = legacy.save("projects/logo.png", io.BytesIO(png))
+        copy = legacy.save("projects/logo_usFVNVN.png", io.BytesIO(png))
+        orphan = legacy.save("projects/logo_old.png", io.BytesIO(png))
+        cv = legacy.save("resumes/cv.pdf", io.BytesIO(b"%PDF-1.4 resume"))
+        ResumePage.objects.create(title="Resume", resume_file=cv)
+        a = Project.objects.create(title="A", slug="a", image=logo, image_renditions={"source": logo, "webp": {}})
+        Project.objects.create(title="B", slug="b", image=copy)
+        Project.objects.create(title="C", slug="c")
+        Project.objects.filter(slug="c").update(image="projects/gone.png")  # the file is missing
+
+        call_command("dedupe_media", "--dry-run", stdout=io.StringIO(), stderr=io.StringIO())
+        self.assertEqual(Project.objects.get(slug="a").image.name, logo)
+
+        self.client.get(reverse("projects-list"))
+        out = io.StringIO()
+        call_command("dedupe_media", "--delete-originals", stdout=out, stderr=io.StringIO())
+        names = dict(Project.objects.values_list("slug", "image"))
+        self.assertRegex(names["a"], r"^blobs/")
+        self.assertEqual(names["a"], names["b"])
+        self.assertEqual(names["c"], "projects/gone.png")
+        a.refresh_from_db()
+        self.assertEqual(a.image_renditions["source"], names["a"])
+        self.assertFalse(legacy.exists(logo) or legacy.exists(copy))
+        self.assertTrue(legacy.exists(orphan))
+        self.assertIn(f"not referenced by any row: {orphan} (same content as {names['a']})", out.getvalue())
+        self.assertIn(f"Converted 3 files into 2 blobs ({len(png):,} bytes of duplicates); 1 missing", out.getvalue())
+        resume = ResumePage.objects.get()
+        self.assertRegex(resume.resume_file.name, r"^blobs/")
+        self.assertEqual(resume.resume_file_name, "cv.pdf")
+        # the cached list had the old names
+        self.assertIn(names["a"], self.client.get(reverse("projects-list")).content.decode())
+
+        call_command("dedupe_media", "--delete-unreferenced", stdout=io.StringIO(), stderr=io.StringIO())
+        self.assertFalse(legacy.exists(orphan))
+
+
+class ExportSnapshotTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for i in range(4):
+            Project.objects.create(title=f"Project {i}", slug=f"project-{i}", category="web")
+
+    def setUp(self):
+        self.output = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.output, ignore_errors=True)
+
+    def export(self):
+        out = io.StringIO()
+        call_command("export_api", self.output, "--base-url", "https://api.example.com", stdout=out)
+        with open(f"{self.output}/manifest.json") as fh:
+            return json.load(fh)["files"], out.getvalue()
+
+    def test_writes_every_page_detail_and_category(self):
+        files, _ = self.export()
+        projects = reverse("projects-list")
+        for url in [projects, f"{projects}?page=2", f"{projects}?category=web", f"{projects}?category=web&page=2",
+                    reverse("projects-detail", kwargs={"slug": "project-3"}), reverse("page-bundle")]:
+            self.assertIn(url, files)
+
+        entry = files[f"{projects}?page=2"]
+        self.assertEqual(entry["path"], "api/pages/projects/page/2/index.json")
+        self.assertEqual(files[f"{projects}?category=web&page=2"]["path"], "api/pages/projects/category/web/page/2/index.json")
+        with open(f"{self.output}/{entry['path']}", "rb") as fh:
+            body = fh.read()
+        with open(f"{self.output}/{entry['path']}.gz", "rb") as fh:
+            self.assertEqual(gzip.decompress(fh.read()), body)
+        live = self.client.get(f"{projects}?page=2", secure=True, HTTP_HOST="api.example.com").json()
+        exported = json.loads(body)
+        self.assertEqual(exported["results"], live["results"])
+        self.assertEqual(exported["previous"], "https://api.example.com/api/pages/projects/index.json")
+
+    def test_links_point_at_exported_files(self):
+        files, _ = self.export()
+        links = 0
+        for entry in files.values():
+            with open(f"{self.output}/{entry['path']}", "rb") as fh:
+                data = json.loads(fh.read() or "null")
+            for link in ("next", "previous"):
+                if isinstance(data, dict) and data.get(link):
+                    path = data[link].removeprefix("https://api.example.com/")
+                    self.assertTrue(os.path.isfile(f"{self.output}/{path}"), data[link])
+                    links += 1
+        self.assertGreater(links, 0)
+
+    def test_rerun_rewrites_only_changed_files(self):
+        files, _ = self.export()
+        _, output = self.export()
+        self.assertIn(f"{len(files)} unchanged", output)
+
+        project = Project.objects.get(slug="project-0")
+        project.title = "Renamed"
+        project.save()
+        _, output = self.export()
+        self.assertNotIn(" 0 written", output)
+        self.assertNotIn(f"{len(files)} unchanged", output)
+
+    def test_removed_objects_are_deleted(self):
+        files, _ = self.export()
+        detail = reverse("projects-detail", kwargs={"slug": "project-3"})
+        Project.objects.get(slug="project-3").delete()
+        new_files, _ = self.export()
+        self.assertNotIn(detail, new_files)
+        self.assertFalse(os.path.exists(f"{self.output}/{files[detail]['path']}"))
+
+
+@override_settings(PAGES_CACHE_ENABLED=False)
+class FastSerializerTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        renditions = {"source": "projects/p.png", "width": 800, "height": 600,
+                      "webp": {"320": "derivatives/ab/ab-320.webp", "640": "derivatives/ab/ab-640.webp"}}
+        for i in range(7):
+            Project.objects.create(
+                title=f"Project {i}", slug=f"project-{i}", description="Django shop", tools="Python",
+                category="ecommerce" if i % 2 else "education", featured=i == 3, order=i,
+                image=f"projects/p {i}é.png" if i % 3 else None, image_renditions=renditions if i % 3 else {},
+                image_width=800, image_height=600, image_color="#aabbcc", image_lqip="data:image/webp;base64,AA",
+                live_url="https://example.com" if i % 2 else None,
+            )
+
+    def test_output_is_byte_identical(self):
+        projects = reverse("projects-list")
+        urls = [
+            projects, f"{projects}?page=2", f"{projects}?category=education", f"{projects}?search=shop",
+            f"{projects}?ordering=-order", f"{projects}?pagination=cursor&page_size=4",
+            reverse("projects-detail", kwargs={"slug": "project-4"}),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                fast = self.client.get(url)
+                with self.settings(PAGES_FAST_SERIALIZERS=False):
+                    slow = self.client.get(url)
+                self.assertEqual(fast.status_code, 200)
+                self.assertEqual(fast.content, slow.content)
+
+    def test_cursor_links_work_on_rows(self):
+        data = self.client.get(reverse("projects-list"), {"pagination": "cursor", "page_size": 4}).json()
+        rest = self.client.get(data["next"]).json()
+        self.assertEqual(len(data["results"]) + len(rest["results"]), 7)
+
+    def test_missing_detail_is_404(self):
+        response = self.client.get(reverse("projects-detail", kwargs={"slug": "nope"}))
+        self.assertEqual(response.status_code, 404)
+
+
+@skipUnless(connection.vendor == "sqlite", "EXPLAIN QUERY PLAN output is SQLite specific")
+@override_settings(PAGES_CACHE_ENABLED=False)
+class ProjectIndexTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        categories = [key for key, _ in Project.CATEGORY_CHOICES]
+        Project.objects.bulk_create(
+            Project(title=f"P {i}", slug=f"p-{i}", category=categories[i % 5], featured=i % 7 == 0, order=i % 13)
+            for i in range(300)
+        )
+
+    def plans(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        plans = []
+        with connection.cursor() as cursor:
+            for query in ctx.captured_queries:
+                sql = query["sql"]
+                if sql.startswith("SELECT") and '"pages_project"' in sql:
+                    cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+                    plans.append((sql, [row[-1] for row in cursor.fetchall()]))
+        self.assertTrue(plans)
+        return response, plans
+
+    def assertIndexed(self, url):
+        response, plans = self.plans(url)
+        for sql, steps in plans:
+            for step in steps:
+                table_scan = step.startswith("SCAN pages_project") and "INDEX" not in step
+                self.assertFalse(table_scan or "TEMP B-TREE" in step, f"{step}\n{sql}")
+        return response
+
+    def test_list_pages_use_the_list_index(self):
+        projects = reverse("projects-list")
+        self.assertIndexed(projects)
+        self.assertIndexed(f"{projects}?page=5")
+
+    def test_category_filter_uses_the_category_index(self):
+        self.assertIndexed(f"{reverse('projects-list')}?category=education&page=2")
+
+    def test_cursor_pages_use_the_list_index(self):
+        projects = reverse("projects-list")
+        data = self.assertIndexed(f"{projects}?pagination=cursor").json()
+        self.assertIndexed(data["next"].replace("http://testserver", ""))
+        self.assertIndexed(f"{projects}?pagination=cursor&category=healthcare")
+
+    def test_default_order_is_model_order(self):
+        slugs = [p["slug"] for p in self.client.get(reverse("projects-list"), {"page_size": 3}).json()["results"]]
+        expected = Project.objects.order_by("-featured", "order", "-created", "-id").values_list("slug", flat=True)
+        self.assertEqual(slugs, list(expected[:3]))
+
+
+class LoadHarnessTests(LiveServerTestCase):
+    def test_seed_and_drive(self):
+        call_command("seed_load_data", "--projects", "40", "--messages", "20", "--items", "4", stdout=io.StringIO())
+        self.assertEqual(Project.objects.filter(category="healthcare").count(), 8)
+        self.assertEqual(ContactMessage.objects.count(), 20)
+        self.assertEqual(ResumePage.objects.first().experience.count(), 4)
+
+        output = os.path.join(tempfile.mkdtemp(), "results.json")
+        self.addCleanup(shutil.rmtree, os.path.dirname(output))
+        call_command(
+            "loadtest", "--url", f"{self.live_server_url}/api", "--duration", "1", "--warmup", "0",
+            "--concurrency", "2", "--output", output, stdout=io.StringIO(),
+        )
+        with open(output) as fh:
+            results = json.load(fh)
+        self.assertGreater(results["total"]["requests"], 0)
+        self.assertEqual(results["total"]["errors"], 0)
+        self.assertIn("site-settings", results["endpoints"])
+        self.assertEqual(
+            set(results["endpoints"]["site-settings"]),
+            {"requests", "errors", "rps", "p50_ms", "p95_ms", "p99_ms", "max_ms"},
+        )
+
+    def test_database_workload(self):
+        call_command("seed_load_data", "--projects", "10", "--messages", "0", "--items", "1", stdout=io.StringIO())
+        result = run_workload(threads=1, duration=0.3, write_ratio=0.5)
+        self.assertGreater(result["read"]["requests"], 0)
+        self.assertGreater(result["write"]["requests"], 0)
+        self.assertEqual(result["read"]["errors"] + result["write"]["errors"], 0, result["error_samples"])
+        self.assertEqual(ContactMessage.objects.count(), result["write"]["requests"])
+
+    def test_slow_client_bench(self):
+        output = os.path.join(tempfile.mkdtemp(), "results.json")
+        self.addCleanup(shutil.rmtree, os.path.dirname(output))
+        call_command(
+            "bench_asgi", "--url", f"live={self.live_server_url}/api", "--clients", "10", "--slow-seconds", "0.2",
+            "--duration", "1", "--probes", "2", "--output", output, stdout=io.StringIO(),
+        )
+        with open(output) as fh:
+            live = json.load(fh)["deployments"]["live"]
+        self.assertEqual(live["slow_clients"]["served"], 10)
+        self.assertGreater(live["probes"]["requests"], 0)
+        self.assertEqual(live["probes"]["errors"], 0)
+
+
+@override_settings(METRICS_TOKEN="secret")
+class MetricsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def scrape(self):
+        return self.client.get(reverse("metrics"), HTTP_AUTHORIZATION="Bearer secret").content.decode()
+
+    def test_server_timing_header(self):
+        projects = reverse("projects-list")
+        Project.objects.create(title="Timed", slug="timed", description="x", category="web")
+        header = self.client.get(projects)["Server-Timing"]
+        names = [part.split(";")[0] for part in header.split(", ")]
+        self.assertEqual(names, ["db", "serialize", "app", "render", "total"])
+        self.assertRegex(header, r'db;dur=[\d.]+;desc="\d+ queries"')
+        # the cached response is rendered inside the view, and still counted as render
+        render = float(header.split("render;dur=")[1].split(",")[0])
+        self.assertGreater(render, 0)
+
+    @override_settings(PAGES_FAST_SERIALIZERS=False)
+    def test_serialize_phase_leaves_out_sql(self):
+        AboutPage.objects.create(title="About").skills.set([Skill.objects.create(name=f"Skill {i}") for i in range(3)])
+        Project.objects.create(title="Timed", slug="timed")
+        for route, kwargs in (("about-list", {}), ("projects-list", {}), ("projects-detail", {"slug": "timed"})):
+            header = self.client.get(reverse(route, kwargs=kwargs))["Server-Timing"]
+            durations = {
+                part.split(";")[0]: float(part.split("dur=")[1].split(";")[0]) for part in header.split(", ")
+            }
+            self.assertIn("serialize", durations, route)
+            # the phases are disjoint
+            self.assertAlmostEqual(
+                sum(value for name, value in durations.items() if name != "total"), durations["total"], delta=0.1,
+            )
+
+    def test_histograms_per_url_name(self):
+        self.client.get(reverse("projects-list"))
+        self.client.get("/api/does-not-exist/")
+        body = self.scrape()
+        self.assertIn('django_request_phase_seconds_bucket{view="projects-list",phase="total",le="+Inf"}', body)
+        self.assertIn('django_request_phase_seconds_count{view="unmatched",phase="db"}', body)
+        self.assertRegex(body, r'django_requests_total\{view="projects-list",method="GET",status="200"\} \d+')
+        self.assertIn('django_db_queries_total{view="projects-list"}', body)
+
+    def test_workers_are_merged(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        other = {
+            "histograms": [["projects-list", "total", [1] * len(metrics.BUCKETS) + [0.0005, 1]]],
+            "requests": [["projects-list", "GET", "200", 1000]],
+            "queries": [["projects-list", 3000]],
+        }
+        with open(os.path.join(directory, "1.json"), "w") as fh:
+            json.dump(other, fh)
+        with override_settings(METRICS_DIR=directory):
+            self.client.get(reverse("projects-list"))
+            body = self.scrape()
+            self.assertTrue(os.path.exists(os.path.join(directory, f"{os.getpid()}.json")))
+        count = next(
+            int(line.split()[-1]) for line in body.splitlines()
+            if line.startswith('django_requests_total{view="projects-list",method="GET",status="200"}')
+        )
+        self.assertGreater(count, 1000)
+
+    def test_token(self):
+        self.assertEqual(self.client.get(reverse("metrics")).status_code, 403)
+        response = self.client.get(reverse("metrics"), HTTP_AUTHORIZATION="Bearer secret")
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(METRICS_TOKEN="")
+    def test_closed_without_a_token(self):
+        self.assertEqual(self.client.get(reverse("metrics")).status_code, 403)
+        with self.settings(DEBUG=True):
+            self.assertEqual(self.client.get(reverse("metrics")).status_code, 200)
+
+
+@override_settings(PAGES_CACHE_ENABLED=False)
+class AsyncReadViewTests(TestCase):
+    ASYNC_URLCONF = "portfolio_project.urls_async"
+
+    @classmethod
+    def setUpTestData(cls):
+        PageBundleTests.setUpTestData()
+        for i in range(7):
+            Project.objects.create(
+                title=f"Project {i}", slug=f"project-{i}", description="Built with django",
+                category="web" if i % 2 else "healthcare", order=i,
+            )
+
+    def setUp(self):
+        cache.clear()
+
+    def get_async(self, url, **extra):
+        with self.settings(ROOT_URLCONF=self.ASYNC_URLCONF):
+            return async_to_sync(self.async_client.get)(url, **extra)
+
+    def test_read_routes_are_async(self):
+        for name in ("page-bundle", "site-settings-list", "home-list", "about-list", "resume-list", "projects-list"):
+            with self.subTest(route=name):
+                path = reverse(name)
+                self.assertTrue(iscoroutinefunction(resolve(path, urlconf=self.ASYNC_URLCONF).func))
+                self.assertFalse(iscoroutinefunction(resolve(path).func))
+
+    def test_same_responses_as_drf(self):
+        urls = [
+            reverse("page-bundle"),
+            reverse("page-bundle") + "?sections=home,about",
+            reverse("page-bundle") + "?sections=blog",
+            reverse("site-settings-list"),
+            reverse("home-list"),
+            reverse("about-list"),
+            reverse("about-latest"),
+            reverse("resume-list"),
+            reverse("projects-list"),
+            reverse("projects-list") + "?page=3",
+            reverse("projects-list") + "?page=9",
+            reverse("projects-list") + "?category=web&search=django",
+            reverse("projects-list") + "?ordering=-order",
+            reverse("projects-list") + "?pagination=cursor",
+            reverse("projects-detail", args=["project-3"]),
+            reverse("projects-detail", args=["missing"]),
+        ]
+        for url in urls:
+            for fast in (True, False):
+                with self.subTest(url=url, fast=fast), self.settings(PAGES_FAST_SERIALIZERS=fast):
+                    expected, actual = self.client.get(url), self.get_async(url)
+                    self.assertEqual(actual.status_code, expected.status_code)
+                    self.assertEqual(actual.content, expected.content)
+                    for header in ("Content-Type", "Allow", "ETag", "Last-Modified", "Cache-Control"):
+                        self.assertEqual(actual.get(header), expected.get(header), header)
+
+    def test_media_urls_are_built_off_the_event_loop(self):
+        on_loop = []
+
+        def hashed_name(name, storage=None):
+            try:
+                on_loop.append(asyncio.get_running_loop() is not None)
+            except RuntimeError:
+                on_loop.append(False)
+            return name
+
+        with self.settings(MEDIA_HASHED_URLS=True), mock.patch("pages.media.hashed_name", side_effect=hashed_name):
+            for name in ("page-bundle", "about-list", "projects-list"):
+                self.get_async(reverse(name))
+        self.assertTrue(on_loop)
+        self.assertFalse(any(on_loop))
+
+    def test_browsable_api_and_head_go_to_drf(self):
+        response = self.get_async(reverse("projects-list"), headers={"Accept": "text/html"})
+        self.assertContains(response, "Django REST framework")
+        with self.settings(ROOT_URLCONF=self.ASYNC_URLCONF):
+            response = async_to_sync(self.async_client.head)(reverse("projects-list"))
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(PAGES_CACHE_ENABLED=True)
+    def test_cache_is_shared_with_drf(self):
+        url = reverse("projects-list")
+        response = self.get_async(url)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(self.client.get(url)["X-Cache"], "HIT")
+        self.assertEqual(self.get_async(url, headers={"If-None-Match": response["ETag"]}).status_code, 304)
+
+        Project.objects.filter(slug="project-1").update(title="Renamed")
+        Project.objects.get(slug="project-1").save()
+        response = self.get_async(url + "?page=3")
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(self.client.get(url + "?page=3").content, response.content)
+
+
+class DatabaseProfileTests(SimpleTestCase):
+    @skipUnless(settings.DATABASE_PROFILE == "sqlite", "SQLite profile only")
+    def test_sqlite_profile(self):
+        options = settings.DATABASES["default"]["OPTIONS"]
+        self.assertEqual(options["transaction_mode"], "IMMEDIATE")
+        self.assertIn("PRAGMA journal_mode=WAL;", options["init_command"])
+        self.assertIn("PRAGMA synchronous=NORMAL;", options["init_command"])
+        self.assertGreater(settings.DATABASES["default"]["CONN_MAX_AGE"], 0)
+
+    def test_router_without_replica(self):
+        router = ReplicaRouter()
+        self.assertEqual(router.db_for_read(Project), "default")
+        self.assertEqual(router.db_for_write(Project), "default")
+
+    def test_router_with_replica(self):
+        router = ReplicaRouter()
+        with mock.patch.dict(settings.DATABASES, {"replica": {}}):
+            self.assertEqual(router.db_for_read(Project), "replica")
+            self.assertEqual(router.db_for_read(ContactMessage), "default")
+            self.assertEqual(router.db_for_write(Project), "default")
+            self.assertEqual(router.db_for_write(ContactMessage), "default")
+            # reading back inside a write transaction stays on the primary
+            with mock.patch.object(connections["default"], "in_atomic_block", True):
+                self.assertEqual(router.db_for_read(Project), "default")
+            self.assertTrue(router.allow_migrate("default", "pages"))
+            self.assertFalse(router.allow_migrate("replica", "pages"))
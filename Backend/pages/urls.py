@@ -1,6 +1,6 @@
-from django.urls import include, path
+from django.urls import include, path, re_path
 from rest_framework.routers import DefaultRouter
-from . import views
+from . import async_views, views
 
 router = DefaultRouter()
 router.register(r"site-settings", views.SiteSettingsViewSet, basename="site-settings")
@@ -13,6 +13,36 @@ router.register(r"resume", views.ResumePageViewSet, basename="resume")
 router.register(r"projects", views.ProjectViewSet, basename="projects")
 
 urlpatterns = [
+    path("bundle/", views.PageBundleView.as_view(), name="page-bundle"),
     path("", include(router.urls)),
 ]
 
+
+# Served in front of urlpatterns under ASGI (portfolio_project/urls_async.py).
+# Each async view reuses the routed DRF view and falls back to it.
+routed = {pattern.name: pattern.callback for pattern in router.urls}
+
+async_urlpatterns = [
+    path(
+        "bundle/",
+        async_views.PageBundleView.as_view(sync_view=views.PageBundleView.as_view()),
+        name="page-bundle",
+    ),
+    path(
+        "site-settings/",
+        async_views.ListView.as_view(sync_view=routed["site-settings-list"]),
+        name="site-settings-list",
+    ),
+    path("home/", async_views.ListView.as_view(sync_view=routed["home-list"]), name="home-list"),
+    path("about/", async_views.LatestView.as_view(sync_view=routed["about-list"]), name="about-list"),
+    path("about/latest/", async_views.LatestView.as_view(sync_view=routed["about-latest"]), name="about-latest"),
+    path("resume/", async_views.LatestView.as_view(sync_view=routed["resume-list"]), name="resume-list"),
+    path("projects/", async_views.ListView.as_view(sync_view=routed["projects-list"]), name="projects-list"),
+    # the DRF action itself, so the detail pattern below does not take "facets" for a slug
+    path("projects/facets/", routed["projects-facets"], name="projects-facets"),
+    re_path(
+        r"^projects/(?P<slug>[^/.]+)/$",
+        async_views.DetailView.as_view(sync_view=routed["projects-detail"]),
+        name="projects-detail",
+    ),
+]
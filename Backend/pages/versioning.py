@@ -0,0 +1,52 @@
+from django.db.models import F
+from django.utils import timezone
+
+from .models import ContentVersion
+
+
+def label_for(model):
+    return model._meta.label_lower
+
+
+def bump(*models):
+    """Increment the content version of each model (called from signals), in one UPDATE once they exist."""
+    now = timezone.now()
+    labels = {label_for(model) for model in models}
+    updated = ContentVersion.objects.filter(label__in=labels).update(version=F("version") + 1, updated=now)
+    if updated == len(labels):
+        return
+    existing = set(ContentVersion.objects.filter(label__in=labels).values_list("label", flat=True))
+    for label in labels - existing:
+        obj, created = ContentVersion.objects.get_or_create(label=label, defaults={"version": 1})
+        if not created:
+            ContentVersion.objects.filter(pk=obj.pk).update(version=F("version") + 1, updated=now)
+
+
+def current_versions(models):
+    """
+    Return ``(versions, last_modified)`` for the given models in one query.
+
+    ``versions`` is a hashable tuple of ``(label, version)`` pairs, so it can be
+    stored next to cached content and compared on the next request. Models that
+    were never written to report version 0 and do not count towards
+    ``last_modified``.
+    """
+    labels = sorted({label_for(m) for m in models})
+    return summarize(labels, version_rows(labels))
+
+
+async def acurrent_versions(models):
+    """``current_versions()`` for async views."""
+    labels = sorted({label_for(m) for m in models})
+    return summarize(labels, [row async for row in version_rows(labels)])
+
+
+def version_rows(labels):
+    return ContentVersion.objects.filter(label__in=labels).values_list("label", "version", "updated")
+
+
+def summarize(labels, rows):
+    rows = {label: (version, updated) for label, version, updated in rows}
+    versions = tuple((label, rows[label][0] if label in rows else 0) for label in labels)
+    stamps = [updated for _, updated in rows.values()]
+    return versions, (max(stamps) if stamps else None)
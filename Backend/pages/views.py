@@ -9,76 +9,150 @@ from .serializers import AboutPageSerializer, SkillSerializer
 from .models import ResumePage, Education, Experience
 from .serializers import ResumePageSerializer, EducationSerializer, ExperienceSerializer
 from rest_framework import viewsets, filters
-from .models import Project
-from .serializers import ProjectSerializer
-
-class ProjectViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset = Project.objects.all().order_by("-created")
+from rest_framework.exceptions import ValidationError
+from rest_framework.views import APIView
+from .models import Project, ProjectTag, ProjectTool, Role, Tag, Tool
+from .serializers import ProjectRowSerializer, ProjectSerializer
+from portfolio_project.metrics import phase
+from .cache import CachedResponseMixin
+from .facets import facet_counts
+from .fast import FastReadMixin
+from .labels import ProjectLabelFilter
+from .pagination import OptionalCursorPagination
+from .search import ProjectSearchFilter
+from . import singletons
+
+class ProjectViewSet(FastReadMixin, CachedResponseMixin, viewsets.ReadOnlyModelViewSet):
+    cache_models = (Project, Tag, Tool, ProjectTag, ProjectTool)
+    # the model ordering plus a unique tie-breaker; the list, the keyset
+    # cursor and the composite indexes on Project all share it
+    ordering = [*Project._meta.ordering, "-id"]
+    queryset = Project.objects.all().order_by(*ordering)
     serializer_class = ProjectSerializer
+    row_serializer_class = ProjectRowSerializer
     lookup_field = "slug"
+    # search goes last: it puts its rank in front of the ordering the others left
+    filter_backends = [ProjectLabelFilter, filters.OrderingFilter, ProjectSearchFilter]
+    pagination_class = OptionalCursorPagination
+    cursor_ordering = ordering
     search_fields = ["title", "description", "tools", "tags"]
     ordering_fields = ["created", "order", "featured"]
 
     def get_queryset(self):
-        qs = super().get_queryset()
+        return self.filter_category(super().get_queryset())
+
+    def filter_category(self, qs):
         category = self.request.query_params.get("category")
         if category:
             qs = qs.filter(category=category)
         return qs
 
+    @action(detail=False)
+    def facets(self, request):
+        """Counts for the filter bar under the request's filters and search (pages/facets.py)."""
+        uncategorized = self.filter_queryset(super().get_queryset())
+        return Response(facet_counts(self.filter_category(uncategorized), uncategorized))
+
 
-class EducationViewSet(viewsets.ReadOnlyModelViewSet):
+class EducationViewSet(CachedResponseMixin, viewsets.ReadOnlyModelViewSet):
+    cache_models = (Education,)
     queryset = Education.objects.all().order_by("order")
     serializer_class = EducationSerializer
 
-class ExperienceViewSet(viewsets.ReadOnlyModelViewSet):
+class ExperienceViewSet(CachedResponseMixin, viewsets.ReadOnlyModelViewSet):
+    cache_models = (Experience,)
     queryset = Experience.objects.all().order_by("order")
     serializer_class = ExperienceSerializer
 
-class ResumePageViewSet(viewsets.ReadOnlyModelViewSet):
+class ResumePageViewSet(CachedResponseMixin, viewsets.ReadOnlyModelViewSet):
+    cache_models = (ResumePage, Education, Experience)
     queryset = ResumePage.objects.all().prefetch_related("education", "experience").order_by("-created")
     serializer_class = ResumePageSerializer
+    singleton = "resume"
 
     # return single object for list route (frontend convenience)
     def list(self, request, *args, **kwargs):
-        instance = self.get_queryset().first()
+        instance = singletons.latest(self.singleton, self.content_versions)
         if not instance:
             return Response(None)
-        serializer = self.get_serializer(instance, context={"request": request})
-        return Response(serializer.data)
+        return Response(self.serialize(instance))
 
 
-class SkillViewSet(viewsets.ReadOnlyModelViewSet):
+class SkillViewSet(CachedResponseMixin, viewsets.ReadOnlyModelViewSet):
+    cache_models = (Skill,)
     queryset = Skill.objects.all().order_by("order")
     serializer_class = SkillSerializer
 
-class AboutPageViewSet(viewsets.ReadOnlyModelViewSet):
+class AboutPageViewSet(CachedResponseMixin, viewsets.ReadOnlyModelViewSet):
+    cache_models = (AboutPage, Skill)
     queryset = AboutPage.objects.all().prefetch_related("skills").order_by("-created")
     serializer_class = AboutPageSerializer
+    singleton = "about"
 
     # override list() so frontend can fetch single object from the same endpoint
     def list(self, request, *args, **kwargs):
-        instance = self.get_queryset().first()
+        instance = singletons.latest(self.singleton, self.content_versions)
         if not instance:
             return Response(None)
-        serializer = self.get_serializer(instance, context={"request": request})
-        return Response(serializer.data)
+        return Response(self.serialize(instance))
 
     # optional: endpoint to fetch latest explicitly
     @action(detail=False, methods=["get"])
     def latest(self, request):
-        instance = self.get_queryset().first()
+        instance = singletons.latest(self.singleton, self.content_versions)
         if not instance:
             return Response(None)
-        serializer = self.get_serializer(instance, context={"request": request})
-        return Response(serializer.data)
+        return Response(self.serialize(instance))
 
 
-class SiteSettingsViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset = SiteSettings.objects.all()
+class SiteSettingsViewSet(CachedResponseMixin, viewsets.ReadOnlyModelViewSet):
+    cache_models = (SiteSettings,)
+    queryset = SiteSettings.objects.all().order_by("id")
     serializer_class = SiteSettingsSerializer
 
-class HomePageViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset = HomePage.objects.all().order_by("-created")
+class HomePageViewSet(CachedResponseMixin, viewsets.ReadOnlyModelViewSet):
+    cache_models = (HomePage, Role)
+    queryset = HomePage.objects.all().prefetch_related("roles").order_by("-created")
     serializer_class = HomePageSerializer
 
+
+
+class PageBundleView(CachedResponseMixin, APIView):
+    """
+    Everything the home page needs on first paint, in one response.
+
+    Sections can be narrowed with ``?sections=home,site_settings``; each
+    section costs a fixed number of queries regardless of content size.
+    """
+    cache_models = (SiteSettings, HomePage, Role, ResumePage, Education, Experience, AboutPage, Skill)
+
+    # section (a ``pages.singletons`` name) -> serializer
+    SECTIONS = {
+        "site_settings": SiteSettingsSerializer,
+        "home": HomePageSerializer,
+        "resume": ResumePageSerializer,
+        "about": AboutPageSerializer,
+    }
+
+    def get_sections(self, request):
+        raw = request.query_params.get("sections")
+        if not raw:
+            return list(self.SECTIONS)
+        sections = [s.strip() for s in raw.split(",") if s.strip()]
+        unknown = [s for s in sections if s not in self.SECTIONS]
+        if unknown:
+            raise ValidationError({"sections": f"Unknown section(s): {', '.join(unknown)}"})
+        return sections
+
+    def serialize_section(self, request, name, instance):
+        if not instance:
+            return None
+        serializer = self.SECTIONS[name](instance, context={"request": request})
+        with phase("serialize"):
+            return serializer.data
+
+    def get(self, request, *args, **kwargs):
+        return Response({
+            name: self.serialize_section(request, name, singletons.latest(name, self.content_versions))
+            for name in self.get_sections(request)
+        })
@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'portfolio_project.settings')
+# route the read API and contact create to the async views (see urls_async.py)
+os.environ.setdefault('ASYNC_API_VIEWS', 'True')
 
 application = get_asgi_application()
@@ -0,0 +1,284 @@
+"""
+Per-request timing: a Server-Timing header on every response and Prometheus
+histograms per URL name on ``/metrics``.
+
+Each request is split into phases:
+
+- ``db``: time inside SQL, from ``connection.execute_wrapper``
+- named phases, marked in code with ``phase("email")``: ``serialize``
+  (serializer ``.data`` and the fast path's rows), ``email``, ``compress``
+- ``render``: DRF/template rendering, after the view returned or inside
+  it when marked with ``phase("render")`` (the response cache does this)
+- ``app``: the rest of the view: filtering, permission checks, pagination
+- ``total``: the whole middleware stack below ``TimingMiddleware``
+
+SQL that runs inside a phase (querysets are lazy, so serializing often
+runs some) counts as ``db``, not as the phase, so the phases add up to
+``total``.
+
+Every worker process keeps its own histograms. With ``METRICS_DIR`` set,
+each process also writes them to ``<METRICS_DIR>/<pid>.json`` (at most once
+per ``METRICS_FLUSH_INTERVAL``), and ``/metrics`` adds up all the files.
+Any gunicorn worker can answer a scrape with the totals of all of them.
+Scrapes need ``Authorization: Bearer <METRICS_TOKEN>``; without a token
+set, ``/metrics`` only answers under ``DEBUG``.
+Clear the directory when the service starts.
+"""
+import atexit
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse, HttpResponseForbidden
+
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_current = ContextVar("request_timer", default=None)
+
+
+class RequestTimer:
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.db = 0.0
+        self.queries = 0
+        self.phases = {}
+        self.render_start = self.render_end = None
+
+    def durations(self, end):
+        phases = dict(self.phases)
+        # views that render early (e.g. to cache the bytes) mark it with phase("render")
+        render = phases.pop("render", 0.0)
+        if self.render_end is not None:
+            render += self.render_end - self.render_start
+        total = end - self.start
+        app = total - self.db - render - sum(phases.values())
+        return {"db": self.db, **phases, "app": max(app, 0.0), "render": render, "total": total}
+
+
+def timed_execute(execute, sql, params, many, context):
+    # the timer travels in a ContextVar, so queries the async ORM runs in
+    # a worker thread are charged to the request that awaited them
+    timer = _current.get()
+    if timer is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timer.db += time.perf_counter() - start
+        timer.queries += 1
+
+
+def install(connection, **kwargs):
+    if timed_execute not in connection.execute_wrappers:
+        connection.execute_wrappers.append(timed_execute)
+
+
+connection_created.connect(install)
+
+
+@contextmanager
+def phase(name):
+    """Time a block of the current request as its own Server-Timing phase."""
+    timer = _current.get()
+    start = time.perf_counter()
+    db = timer.db if timer is not None else 0.0
+    try:
+        yield
+    finally:
+        if timer is not None:
+            elapsed = time.perf_counter() - start - (timer.db - db)
+            timer.phases[name] = timer.phases.get(name, 0.0) + elapsed
+
+
+class Registry:
+    """This process's histograms, optionally mirrored to ``METRICS_DIR``."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms = {}  # (view, phase) -> [bucket counts..., sum, count]
+        self.requests = {}  # (view, method, status) -> count
+        self.queries = {}  # view -> count
+        self.last_flush = 0.0
+
+    def observe(self, view, method, status, durations, queries):
+        with self.lock:
+            for name, seconds in durations.items():
+                row = self.histograms.setdefault((view, name), [0] * (len(BUCKETS) + 2))
+                for i, bound in enumerate(BUCKETS):
+                    if seconds <= bound:
+                        row[i] += 1
+                row[-2] += seconds
+                row[-1] += 1
+            key = (view, method, str(status))
+            self.requests[key] = self.requests.get(key, 0) + 1
+            self.queries[view] = self.queries.get(view, 0) + queries
+        if time.monotonic() - self.last_flush >= settings.METRICS_FLUSH_INTERVAL:
+            self.flush()
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "histograms": [[*key, row[:]] for key, row in self.histograms.items()],
+                "requests": [[*key, count] for key, count in self.requests.items()],
+                "queries": [[view, count] for view, count in self.queries.items()],
+            }
+
+    def flush(self):
+        directory = settings.METRICS_DIR
+        self.last_flush = time.monotonic()
+        if not directory:
+            return
+        path = Path(directory) / f"{os.getpid()}.json"
+        tmp = path.with_name(f".{path.name}.tmp")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp.write_text(json.dumps(self.snapshot()))
+        os.replace(tmp, path)
+
+    def collect(self):
+        """This process's data plus every other worker's last flush."""
+        self.flush()
+        directory = settings.METRICS_DIR
+        if not directory:
+            return [self.snapshot()]
+        snapshots = []
+        for path in Path(directory).glob("*.json"):
+            try:
+                snapshots.append(json.loads(path.read_text()))
+            except (OSError, ValueError):
+                continue  # a worker is replacing it right now
+        return snapshots
+
+
+registry = Registry()
+atexit.register(lambda: registry.flush() if registry.requests else None)
+
+
+def merge(snapshots):
+    histograms, requests, queries = {}, {}, {}
+    for snapshot in snapshots:
+        for view, name, row in snapshot["histograms"]:
+            merged = histograms.setdefault((view, name), [0] * len(row))
+            for i, value in enumerate(row):
+                merged[i] += value
+        for view, method, status, count in snapshot["requests"]:
+            requests[(view, method, status)] = requests.get((view, method, status), 0) + count
+        for view, count in snapshot["queries"]:
+            queries[view] = queries.get(view, 0) + count
+    return histograms, requests, queries
+
+
+def label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def exposition(snapshots):
+    """Prometheus text format for the merged snapshots."""
+    histograms, requests, queries = merge(snapshots)
+    lines = [
+        "# HELP django_request_phase_seconds Time per request phase, by URL name.",
+        "# TYPE django_request_phase_seconds histogram",
+    ]
+    for (view, name), row in sorted(histograms.items()):
+        labels = f'view="{label(view)}",phase="{label(name)}"'
+        # bucket counts are stored cumulatively, as the format wants them
+        for bound, count in zip(BUCKETS, row):
+            lines.append(f'django_request_phase_seconds_bucket{{{labels},le="{bound}"}} {count}')
+        lines.append(f'django_request_phase_seconds_bucket{{{labels},le="+Inf"}} {row[-1]}')
+        lines.append(f"django_request_phase_seconds_sum{{{labels}}} {row[-2]}")
+        lines.append(f"django_request_phase_seconds_count{{{labels}}} {row[-1]}")
+    lines += [
+        "# HELP django_requests_total Responses, by URL name, method and status.",
+        "# TYPE django_requests_total counter",
+    ]
+    for (view, method, status), count in sorted(requests.items()):
+        lines.append(
+            f'django_requests_total{{view="{label(view)}",method="{label(method)}",status="{status}"}} {count}'
+        )
+    lines += [
+        "# HELP django_db_queries_total SQL queries, by URL name.",
+        "# TYPE django_db_queries_total counter",
+    ]
+    for view, count in sorted(queries.items()):
+        lines.append(f'django_db_queries_total{{view="{label(view)}"}} {count}')
+    return "\n".join(lines) + "\n"
+
+
+def server_timing(durations, queries):
+    parts = []
+    for name, seconds in durations.items():
+        desc = f';desc="{queries} queries"' if name == "db" else ""
+        parts.append(f"{name};dur={seconds * 1000:.2f}{desc}")
+    return ", ".join(parts)
+
+
+class TimingMiddleware:
+    """Put it first in ``MIDDLEWARE`` so ``total`` covers the whole stack."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        # connections opened before this module was imported missed the signal
+        for connection in connections.all(initialized_only=True):
+            install(connection)
+        timer = RequestTimer()
+        token = _current.set(timer)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, timer)
+
+    async def __acall__(self, request):
+        timer = RequestTimer()
+        token = _current.set(timer)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, timer)
+
+    def finish(self, request, response, timer):
+        durations = timer.durations(time.perf_counter())
+        response["Server-Timing"] = server_timing(durations, timer.queries)
+        match = getattr(request, "resolver_match", None)
+        view = (match.view_name if match else None) or "unmatched"
+        registry.observe(view, request.method, response.status_code, durations, timer.queries)
+        return response
+
+    def process_template_response(self, request, response):
+        # runs right before the response is rendered
+        timer = _current.get()
+        if timer is not None:
+            timer.render_start = time.perf_counter()
+
+            def rendered(response):
+                timer.render_end = time.perf_counter()
+
+            response.add_post_render_callback(rendered)
+        return response
+
+
+def metrics_view(request):
+    """The Prometheus scrape; it needs ``METRICS_TOKEN``, or ``DEBUG`` when no token is set."""
+    token = settings.METRICS_TOKEN
+    if not (request.headers.get("Authorization") == f"Bearer {token}" if token else settings.DEBUG):
+        return HttpResponseForbidden()
+    return HttpResponse(
+        exposition(registry.collect()), content_type="text/plain; version=0.0.4; charset=utf-8"
+    )
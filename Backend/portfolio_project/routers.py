@@ -0,0 +1,34 @@
+from django.conf import settings
+from django.db import connections
+
+
+class ReplicaRouter:
+    """
+    Sends reads of ``pages`` models to the "replica" database when one is
+    configured. Everything else, contact messages and every write, goes to
+    "default".
+
+    Reads inside a transaction on the primary stay there, so code that
+    writes and reads back (the admin, ``get_or_create``, the version bumps in
+    ``pages.signals``) sees its own writes. Other reads may lag behind the
+    primary by the replication delay; cached responses catch up once the
+    replica has the new content versions.
+    """
+    replica_apps = {"pages"}
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label not in self.replica_apps or "replica" not in settings.DATABASES:
+            return "default"
+        if connections["default"].in_atomic_block:
+            return "default"
+        return "replica"
+
+    def db_for_write(self, model, **hints):
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # the replica holds the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == "default"
@@ -13,6 +13,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 import os
 from pathlib import Path
 import environ
+from django.core.exceptions import ImproperlyConfigured
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -27,7 +28,7 @@ environ.Env.read_env(os.path.join(BASE_DIR, ".env"))
 SECRET_KEY = 'django-insecure-(tv+atugn(&mvcr3^(@+a$9dste(7r@^(yyzwsbvb%fg#b4_%v'
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = env("DEBUG", default=True)
 
 ALLOWED_HOSTS = ['*']
 
@@ -48,9 +49,12 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # first, so its total covers everything below (see portfolio_project/metrics.py)
+    "portfolio_project.metrics.TimingMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     'django.middleware.security.SecurityMiddleware',    
-    "whitenoise.middleware.WhiteNoiseMiddleware", 
+    # whitenoise, usable from ASGI without a thread per request
+    "portfolio_project.middleware.WhiteNoiseMiddleware",
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -59,7 +63,9 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
-ROOT_URLCONF = 'portfolio_project.urls'
+# async views for the read API and contact create; asgi.py turns this on
+ASYNC_API_VIEWS = env.bool("ASYNC_API_VIEWS", default=False)
+ROOT_URLCONF = 'portfolio_project.urls_async' if ASYNC_API_VIEWS else 'portfolio_project.urls'
 
 TEMPLATES = [
     {
@@ -94,13 +100,86 @@ REST_FRAMEWORK = {
 
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# DATABASE_URL lets tools such as `manage.py loadtest` point at another database
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    'default': env.db('DATABASE_URL', default=f"sqlite:///{BASE_DIR / 'db.sqlite3'}"),
 }
 
+# DATABASE_PROFILE tunes the connection for its engine (picked from the URL
+# by default); `manage.py bench_databases` compares them:
+#   sqlite   - WAL, synchronous=NORMAL, mmap, a busy timeout, IMMEDIATE
+#              transactions and persistent connections
+#   postgres - a psycopg 3 connection pool per process; DATABASE_REPLICA_URL
+#              adds a "replica" that serves pages reads (see routers.py)
+#   plain    - DATABASE_URL exactly as given
+_engine = DATABASES["default"]["ENGINE"].rsplit(".", 1)[-1]
+DATABASE_PROFILE = env("DATABASE_PROFILE", default="postgres" if _engine == "postgresql" else "sqlite")
+if DATABASE_PROFILE not in ("plain", {"sqlite3": "sqlite", "postgresql": "postgres"}.get(_engine)):
+    raise ImproperlyConfigured(f"DATABASE_PROFILE={DATABASE_PROFILE} does not fit the {_engine} DATABASE_URL")
+
+if DATABASE_PROFILE == "sqlite":
+    DATABASES["default"]["CONN_MAX_AGE"] = env.int("DATABASE_CONN_MAX_AGE", default=600)
+    DATABASES["default"]["CONN_HEALTH_CHECKS"] = True
+    DATABASES["default"].setdefault("OPTIONS", {}).update({
+        # wait this many seconds for another writer instead of "database is locked"
+        "timeout": env.int("SQLITE_BUSY_TIMEOUT", default=20),
+        # take the write lock at BEGIN: a deferred transaction that reads and
+        # then writes fails at once when another writer got in between
+        "transaction_mode": "IMMEDIATE",
+        "init_command": (
+            "PRAGMA journal_mode=WAL;"
+            "PRAGMA synchronous=NORMAL;"
+            f"PRAGMA mmap_size={env.int('SQLITE_MMAP_SIZE', default=256 * 2**20)};"
+            "PRAGMA temp_store=MEMORY;"
+            "PRAGMA cache_size=-20000;"
+        ),
+    })
+elif DATABASE_PROFILE == "postgres":
+    if env("DATABASE_REPLICA_URL", default=""):
+        DATABASES["replica"] = env.db("DATABASE_REPLICA_URL")
+        # tests run against the primary only
+        DATABASES["replica"]["TEST"] = {"MIRROR": "default"}
+    for _database in DATABASES.values():
+        # pooled connections are returned to the pool at the end of each request
+        _database["CONN_MAX_AGE"] = 0
+        _database.setdefault("OPTIONS", {})["pool"] = {
+            "min_size": env.int("DATABASE_POOL_MIN_SIZE", default=2),
+            "max_size": env.int("DATABASE_POOL_MAX_SIZE", default=10),
+            "timeout": env.int("DATABASE_POOL_TIMEOUT", default=10),
+        }
+
+DATABASE_ROUTERS = ["portfolio_project.routers.ReplicaRouter"]
+
+
+# Cache from .env, e.g. CACHE_URL=redis://127.0.0.1:6379/1 or
+# CACHE_URL=filecache:///var/tmp/portfolio-cache (locmem is per worker)
+CACHES = {
+    "default": env.cache("CACHE_URL", default="locmemcache://"),
+}
+
+# Server-Timing and /metrics; set METRICS_DIR to a directory shared by all
+# gunicorn workers of one host, and clear it on start
+METRICS_DIR = env("METRICS_DIR", default="")
+METRICS_FLUSH_INTERVAL = 1.0  # seconds
+# bearer token for /metrics; without one it only answers under DEBUG
+METRICS_TOKEN = env("METRICS_TOKEN", default="")
+
+# Read-through cache for the pages API (see pages/cache.py)
+PAGES_CACHE_ENABLED = env.bool("PAGES_CACHE_ENABLED", default=True)
+PAGES_CACHE_ALIAS = "default"
+PAGES_CACHE_TIMEOUT = env.int("PAGES_CACHE_TIMEOUT", default=60 * 60 * 24)
+PAGES_CACHE_LOCK_TIMEOUT = 30
+PAGES_CACHE_FILL_WAIT = 2.0
+# build hot list responses from values() rows (see pages/fast.py)
+PAGES_FAST_SERIALIZERS = env.bool("PAGES_FAST_SERIALIZERS", default=True)
+# brotli/gzip for the pages API, cached per content version (see pages/compression.py)
+PAGES_COMPRESS_ENABLED = env.bool("PAGES_COMPRESS_ENABLED", default=True)
+PAGES_COMPRESS_MIN_SIZE = env.int("PAGES_COMPRESS_MIN_SIZE", default=1024)  # bytes
+# cached bodies are compressed once per version, so they get the slow,
+# small levels; the others (cache off, HEAD) are compressed per request
+PAGES_COMPRESS_LEVELS = {"br": 11, "gzip": 9}
+PAGES_COMPRESS_UNCACHED_LEVELS = {"br": 5, "gzip": 6}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -142,7 +221,24 @@ STATIC_ROOT = BASE_DIR / "staticfiles"
 STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
 
 MEDIA_URL = "/media/"
-MEDIA_ROOT = BASE_DIR / "media"
+MEDIA_ROOT = Path(env("MEDIA_ROOT", default=str(BASE_DIR / "media")))
+# Media in production: uploads are content-addressed blobs (run `manage.py
+# dedupe_media` once for files from before), so the web server can send
+# /media/blobs/ and /media/derivatives/ with "Cache-Control: immutable".
+# MEDIA_SERVE=True has Django serve /media/ as well (pages.media.serve, with
+# ranges and brotli/gzip forms; add MEDIA_ACCEL_REDIRECT behind nginx), which
+# older, unconverted files need for hashed URLs. It is on under DEBUG.
+MEDIA_SERVE = env.bool("MEDIA_SERVE", default=DEBUG)
+# content-hashed media URLs, served as immutable; older files' hashed names
+# only resolve through pages.media.serve, so they stay plain without it
+MEDIA_HASHED_URLS = env.bool("MEDIA_HASHED_URLS", default=True)
+# behind nginx, e.g. "/internal-media/" for an `internal` location aliased
+# to MEDIA_ROOT: nginx then sends the files (and ranges) itself
+MEDIA_ACCEL_REDIRECT = env("MEDIA_ACCEL_REDIRECT", default="")
+
+# WebP (and AVIF) renditions of uploaded images, see pages/images.py
+IMAGE_DERIVATIVES_ASYNC = env.bool("IMAGE_DERIVATIVES_ASYNC", default=True)
+IMAGE_DERIVATIVES_AVIF = env.bool("IMAGE_DERIVATIVES_AVIF", default=False)
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
@@ -160,6 +256,22 @@ DEFAULT_FROM_EMAIL = env("DEFAULT_FROM_EMAIL")
 
 OWNER_EMAIL = env("OWNER_EMAIL", default=EMAIL_HOST_USER)
 
+# Contact emails go through the outbox table, so the POST does not wait on
+# SMTP. A `manage.py send_outbox --loop` process is a required part of the
+# deployment: without one nothing is sent. Set CONTACT_EMAIL_OUTBOX=False to
+# send inside the request instead, e.g. in development
+CONTACT_EMAIL_OUTBOX = env.bool("CONTACT_EMAIL_OUTBOX", default=True)
+CONTACT_OUTBOX_RETRY_DELAY = env.int("CONTACT_OUTBOX_RETRY_DELAY", default=30)  # seconds, doubles per attempt
+CONTACT_OUTBOX_MAX_RETRY_DELAY = 60 * 60
+CONTACT_OUTBOX_LEASE = 5 * 60
+
+# `manage.py archive_messages` moves messages older than CONTACT_RETENTION_DAYS,
+# or beyond the newest CONTACT_RETENTION_MAX_ROWS, into gzipped NDJSON files
+# under CONTACT_ARCHIVE_DIR (0 turns a rule off)
+CONTACT_RETENTION_DAYS = env.int("CONTACT_RETENTION_DAYS", default=365)
+CONTACT_RETENTION_MAX_ROWS = env.int("CONTACT_RETENTION_MAX_ROWS", default=0)
+CONTACT_ARCHIVE_DIR = Path(env("CONTACT_ARCHIVE_DIR", default=str(BASE_DIR / "archive" / "contact")))
+
 
 CORS_ALLOW_CREDENTIALS = True
 
@@ -0,0 +1,116 @@
+"""
+Helpers shared by the apps' query budget tests, ``query_report`` and
+``export_api``: seed a realistic content volume, find every API route and
+measure a request to it.
+"""
+import time
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from contact import urls as contact_urls
+from contact.models import ContactMessage
+from pages import singletons, urls as pages_urls
+from pages.models import (
+    AboutPage, Education, Experience, HomePage, Project, ResumePage, Role, SiteSettings, Skill,
+)
+
+# a few rows of everything, enough for every route; budget tests measure at
+# this size and again after seed(start=...) has added the full volume
+SMALL_SEED = {"projects": 5, "items": 2, "messages": 5, "revisions": 1}
+# each app's router, and its routes that are not registered on one
+API_ROUTES = {
+    "pages": (pages_urls.router, ["page-bundle"]),
+    "contact": (contact_urls.router, []),
+}
+
+
+def discover_routes(apps=tuple(API_ROUTES), every_object=False):
+    """
+    Return ``(name, url)`` for every list, detail and extra action route of
+    ``apps`` (``pages.urls`` and ``contact.urls``). Detail URLs point at the
+    first object of the viewset's queryset, so data must exist, or at each
+    of them with ``every_object``.
+    """
+    routes = []
+    for app in apps:
+        router, extra_routes = API_ROUTES[app]
+        routes += [(name, reverse(name)) for name in extra_routes]
+        for prefix, viewset, basename in router.registry:
+            routes.append((f"{basename}-list", reverse(f"{basename}-list")))
+            lookup_field = viewset.lookup_field
+            kwarg = viewset.lookup_url_kwarg or lookup_field
+            values = viewset.queryset.values_list(lookup_field, flat=True)
+            for value in values if every_object else [values.first()]:
+                if value is not None:
+                    routes.append((f"{basename}-detail", reverse(f"{basename}-detail", kwargs={kwarg: value})))
+            for extra in viewset.get_extra_actions():
+                if not extra.detail:
+                    name = f"{basename}-{extra.url_name}"
+                    routes.append((name, reverse(name)))
+    return routes
+
+
+def seed(projects=300, items=40, messages=300, revisions=5, start=0):
+    """
+    Create a realistic content volume (bulk inserts, no media files). Rows
+    are numbered from ``start``, so seeding again with a higher one adds to
+    what is there.
+    """
+    categories = [key for key, _ in Project.CATEGORY_CHOICES]
+    Project.objects.bulk_create(
+        Project(
+            title=f"Project {i}",
+            slug=f"project-{i}",
+            description="A longer description of the project. " * 10,
+            category=categories[i % len(categories)],
+            tools="Python, Django, React",
+            tags="web, api",
+            image=f"projects/project-{i}.png",
+            featured=i % 10 == 0,
+            order=i,
+        )
+        for i in range(start, start + projects)
+    )
+    roles = Role.objects.bulk_create(Role(name=f"Role {i}", order=i) for i in range(start, start + items))
+    skills = Skill.objects.bulk_create(
+        Skill(name=f"Skill {i}", percent=i % 100, order=i) for i in range(start, start + items)
+    )
+    education = Education.objects.bulk_create(
+        Education(title=f"Degree {i}", institution="University", order=i) for i in range(start, start + items)
+    )
+    experience = Experience.objects.bulk_create(
+        Experience(title=f"Job {i}", company="Company", bullets="one\ntwo\nthree", order=i)
+        for i in range(start, start + items)
+    )
+
+    if not SiteSettings.objects.exists():
+        SiteSettings.objects.create(brand_name="Portfolio", logo="site/logo.webp")
+    # several revisions of each page, so list endpoints serialize more than one
+    for i in range(revisions):
+        home = HomePage.objects.create(full_name=f"Jane Doe {i}", profile_image="profiles/user.webp")
+        home.roles.set(roles)
+        resume = ResumePage.objects.create(title=f"Resume {i}", resume_file="resumes/resume.pdf")
+        resume.education.set(education)
+        resume.experience.set(experience)
+        about = AboutPage.objects.create(title=f"About {i}", profile_image="about/logo.webp")
+        about.skills.set(skills)
+
+    ContactMessage.objects.bulk_create(
+        ContactMessage(name=f"Visitor {i}", email=f"visitor{i}@example.com", subject="Hello", message="Hi " * 50)
+        for i in range(start, start + messages)
+    )
+
+
+def measure(client, url):
+    """
+    ``(response, queries, seconds)`` for a GET of ``url``, made as the first
+    request of a fresh process: the worst case.
+    """
+    singletons.clear()
+    with CaptureQueriesContext(connection) as ctx:
+        start = time.perf_counter()
+        response = client.get(url)
+        elapsed = time.perf_counter() - start
+    return response, ctx.captured_queries, elapsed
@@ -0,0 +1,17 @@
+"""
+The URLconf under ASGI (``ASYNC_API_VIEWS``): the async read views and the
+async contact create in front of the regular routes, which still serve
+everything else.
+"""
+from django.urls import include, path
+
+from contact.urls import async_urlpatterns as contact_async_urlpatterns
+from pages.urls import async_urlpatterns as pages_async_urlpatterns
+
+from .urls import urlpatterns as sync_urlpatterns
+
+urlpatterns = [
+    path("api/pages/", include(pages_async_urlpatterns)),
+    path("api/contact/", include(contact_async_urlpatterns)),
+    *sync_urlpatterns,
+]
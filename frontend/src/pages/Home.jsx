@@ -25,40 +25,27 @@ export default function Home() {
       try {
         try { console.log("API baseURL:", API.defaults.baseURL); } catch (e) {}
 
-        const [sRes, hRes, rRes] = await Promise.allSettled([
-          API.get("pages/site-settings/"),
-          API.get("pages/home/"),
-          API.get("pages/resume/"),
-        ]);
+        // one round trip for everything the first paint needs
+        const res = await API.get("pages/bundle/", {
+          params: { sections: "site_settings,home,resume" },
+        });
 
         if (!mounted) return;
 
-        const normalize = (res) => {
-          if (!res) return null;
-          if (res.status !== "fulfilled") {
-            console.error("API error:", res.reason);
-            return null;
-          }
-          const data = res.value && res.value.data;
-          console.log("API response:", { url: res.value?.config?.url, data });
-          if (!data) return null;
-          if (data.results && Array.isArray(data.results)) return data.results.length ? data.results[0] : null;
-          if (Array.isArray(data)) return data.length ? data[0] : null;
-          if (typeof data === "object") return data;
-          return null;
-        };
-
-        const s = normalize(sRes);
-        const h = normalize(hRes);
-        const r = normalize(rRes);
+        const data = (res && res.data) || {};
+        console.log("API response:", { url: res?.config?.url, data });
+
+        const s = data.site_settings || null;
+        const h = data.home || null;
+        const r = data.resume || null;
 
         if (s) setSettings(s);
         if (h) setHome(h);
         if (r) setResume(r);
 
         const missingNow = [];
-        if (!s) missingNow.push("SiteSettings (api/pages/site-settings/) — create one in admin");
-        if (!h) missingNow.push("HomePage (api/pages/home/) — create one in admin");
+        if (!s) missingNow.push("SiteSettings (api/pages/bundle/) — create one in admin");
+        if (!h) missingNow.push("HomePage (api/pages/bundle/) — create one in admin");
         setMissing(missingNow);
       } catch (err) {
         console.error("Fetch error:", err);
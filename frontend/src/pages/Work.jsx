@@ -6,6 +6,13 @@ import LoadingScreen from "../components/LoadingScreen";
 
 function ProjectCard({ project }) {
   const { title, category, tools, image, slug } = project;
+  const { image_width, image_height, image_color, image_lqip } = project;
+  const placeholder = {
+    backgroundColor: image_color || undefined,
+    backgroundImage: image_lqip ? `url(${image_lqip})` : undefined,
+    backgroundSize: "cover",
+    backgroundPosition: "center",
+  };
   return (
     <motion.div
       layout
@@ -14,9 +21,16 @@ function ProjectCard({ project }) {
       aria-label={title}
     >
       {/* Thumbnail */}
-      <div className="w-full h-48 md:h-40 lg:h-48 bg-gray-800">
+      <div className="w-full h-48 md:h-40 lg:h-48 bg-gray-800" style={image ? placeholder : undefined}>
         {image ? (
-          <img src={image} alt={title} className="w-full h-full object-cover" />
+          <img
+            src={image}
+            alt={title}
+            width={image_width || undefined}
+            height={image_height || undefined}
+            loading="lazy"
+            className="w-full h-full object-cover"
+          />
         ) : (
           <div className="w-full h-full bg-gradient-to-br from-gray-800 to-gray-700 flex items-center justify-center text-gray-500">
             No image
@@ -88,17 +102,27 @@ export default function Work() {
   const [page, setPage] = useState(1);
   const [pageSize] = useState(3); // consistent with DRF PAGE_SIZE
   const [category, setCategory] = useState(""); // "", "ecommerce", "education", etc.
+  const [tag, setTag] = useState(""); // a tag key from the facets, "" for any
+  const [facets, setFacets] = useState(null); // counts for the filter bar
+  const [searchInput, setSearchInput] = useState("");
+  const [search, setSearch] = useState(""); // debounced copy of searchInput
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
 
+  const TAG_LIMIT = 8;
+
+  // categories and their counts come from the facets; every category is listed there
+  const categoryFacets = facets?.category || [];
   const CATEGORY_OPTIONS = [
-    { key: "", label: "All" },
-    { key: "ecommerce", label: "E-Commerce" },
-    { key: "education", label: "Education" },
-    { key: "healthcare", label: "Healthcare" },
-    { key: "productivity", label: "Productivity Tools" },
-    { key: "other", label: "Other" },
+    {
+      key: "",
+      label: "All",
+      count: facets ? categoryFacets.reduce((sum, c) => sum + c.count, 0) : undefined,
+    },
+    ...categoryFacets.map((c) => ({ key: c.value, label: c.label, count: c.count })),
   ];
+  const TAG_OPTIONS = (facets?.tag || []).slice(0, TAG_LIMIT);
+  const withCount = (label, n) => (n === undefined ? label : `${label} (${n})`);
 
   const fetchProjects = useCallback(
     async (opts = {}) => {
@@ -110,6 +134,10 @@ export default function Work() {
         };
         const activeCategory = opts.category !== undefined ? opts.category : category;
         if (activeCategory) params.category = activeCategory;
+        const activeSearch = opts.search !== undefined ? opts.search : search;
+        if (activeSearch) params.search = activeSearch;
+        const activeTag = opts.tag !== undefined ? opts.tag : tag;
+        if (activeTag) params.tag = activeTag;
 
         const res = await API.get("pages/projects/", { params });
         const data = res.data || {};
@@ -130,12 +158,41 @@ export default function Work() {
         setLoading(false);
       }
     },
-    [page, category]
+    [page, category, search, tag]
   );
 
   useEffect(() => {
-    fetchProjects({ page, category });
-  }, [fetchProjects, page, category]);
+    fetchProjects({ page, category, search, tag });
+  }, [fetchProjects, page, category, search, tag]);
+
+  // one request for all the filter bar's counts, under the same filters
+  useEffect(() => {
+    let cancelled = false;
+    const params = {};
+    if (category) params.category = category;
+    if (search) params.search = search;
+    if (tag) params.tag = tag;
+    API.get("pages/projects/facets/", { params })
+      .then((res) => {
+        if (!cancelled) setFacets(res.data || null);
+      })
+      .catch((err) => console.error(err));
+    return () => {
+      cancelled = true;
+    };
+  }, [category, search, tag]);
+
+  // search-as-you-type: the backend matches the last word as a prefix
+  useEffect(() => {
+    const t = setTimeout(() => {
+      const next = searchInput.trim();
+      if (next !== search) {
+        setSearch(next);
+        setPage(1);
+      }
+    }, 250);
+    return () => clearTimeout(t);
+  }, [searchInput, search]);
 
   const totalPages = Math.max(1, Math.ceil(count / pageSize));
   const canPrev = page > 1;
@@ -155,7 +212,13 @@ export default function Work() {
     fetchProjects({ page: 1, category: newCat });
   }
 
-  if (loading) return <LoadingScreen />;
+  function handleTagChange(newTag) {
+    setTag(newTag);
+    setPage(1);
+    fetchProjects({ page: 1, tag: newTag });
+  }
+
+  if (loading && projects.length === 0 && !search) return <LoadingScreen />;
   if (error)
     return (
       <main className="min-h-auto text-white flex items-center justify-center">
@@ -193,7 +256,7 @@ export default function Work() {
                       : "bg-white/3 text-gray-200"
                   }`}
                 >
-                  {c.label}
+                  {withCount(c.label, c.count)}
                 </button>
               ))}
             </div>
@@ -210,7 +273,7 @@ export default function Work() {
                 >
                   {CATEGORY_OPTIONS.map((c) => (
                     <option key={c.key} value={c.key}>
-                      {c.label}
+                      {withCount(c.label, c.count)}
                     </option>
                   ))}
                 </select>
@@ -223,9 +286,46 @@ export default function Work() {
             </div>
           </div>
 
-          {/* (search removed) */}
+          <div className="w-full md:w-64">
+            <label className="sr-only" htmlFor="project-search">Search projects</label>
+            <input
+              id="project-search"
+              type="search"
+              value={searchInput}
+              onChange={(e) => setSearchInput(e.target.value)}
+              placeholder="Search projects"
+              className="w-full px-4 py-2 rounded-lg bg-gray-900 border border-white/6 text-gray-200 focus:outline-none focus:ring-2 focus:ring-cyan-400"
+            />
+          </div>
         </div>
 
+        {/* tags, most used first */}
+        {(TAG_OPTIONS.length > 0 || tag) && (
+          <div className="flex items-center gap-2 flex-wrap -mt-4 mb-8">
+            {tag && (
+              <button
+                onClick={() => handleTagChange("")}
+                className="px-3 py-1 rounded-full text-xs font-medium bg-gradient-to-r from-cyan-400 to-purple-500 text-black"
+              >
+                Clear tag
+              </button>
+            )}
+            {TAG_OPTIONS.map((t) => (
+              <button
+                key={t.value}
+                onClick={() => handleTagChange(tag === t.value ? "" : t.value)}
+                className={`px-3 py-1 rounded-full text-xs ${
+                  tag === t.value
+                    ? "bg-gradient-to-r from-cyan-400 to-purple-500 text-black"
+                    : "bg-white/3 text-gray-300"
+                }`}
+              >
+                {withCount(t.label, t.count)}
+              </button>
+            ))}
+          </div>
+        )}
+
         {/* grid */}
         <AnimatePresence>
           <motion.div